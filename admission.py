@@ -0,0 +1,167 @@
+"""
+Admission control for outbound LLM requests.
+
+Every request to the API first takes one of a fixed number of slots.
+Requests that find every slot taken wait in a queue per session, and freed
+slots go to the sessions in turn, so one user comparing ten courses cannot
+starve everyone else. When the queue is too deep, new requests are shed at
+once, and so are requests that have waited too long. A shed request is an
+upstream failure, so the caller serves a cached copy if it has one instead
+of piling on. Background work without a session, such as refreshes, is shed
+at half the depth.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from metrics import observe
+
+# Requests to the API in flight at once, across all sessions of this process
+MAX_CONCURRENT = int(os.getenv("UNIADVISOR_MAX_CONCURRENT", "8"))
+# Queued requests beyond which new ones are shed
+SHED_QUEUE_DEPTH = int(os.getenv("UNIADVISOR_SHED_QUEUE", "32"))
+# Seconds a request may wait for a slot before it is shed
+ADMISSION_TIMEOUT = float(os.getenv("UNIADVISOR_ADMISSION_TIMEOUT", "30"))
+
+_session = contextvars.ContextVar("admission_session", default=None)
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of being queued or kept waiting"""
+
+
+@contextmanager
+def session(session_id):
+    """Attribute the requests made in this block, on this thread, to session_id"""
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+def current_session():
+    return _session.get()
+
+
+def run_in_session(session_id, fn, *args):
+    """Call fn(*args) with its requests attributed to session_id; for submitting to thread pools"""
+    with session(session_id):
+        return fn(*args)
+
+
+class AdmissionController:
+    """
+    Slots for concurrent requests with per-session queues served round robin.
+    Sessions with waiting requests are kept in dispatch order; a session
+    that is given a slot moves to the back.
+    """
+
+    def __init__(self, slots=MAX_CONCURRENT, shed_depth=SHED_QUEUE_DEPTH, timeout=ADMISSION_TIMEOUT):
+        self.slots = slots
+        self.shed_depth = shed_depth
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queues = OrderedDict()  # session -> deque of waiting tickets
+        self._waiting = 0
+        self._counters = {"admitted": 0, "queued": 0, "shed": 0, "timed_out": 0, "max_depth": 0}
+
+    @contextmanager
+    def slot(self, session_id=None):
+        """Hold a slot for the block, attributed to session_id or the current session"""
+        self.acquire(session_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, session_id=None):
+        """Wait for a slot; raises Overloaded if the request is shed"""
+        session_id = session_id if session_id is not None else current_session()
+        started = time.monotonic()
+        with self._cond:
+            if self._active < self.slots and not self._waiting:
+                self._active += 1
+                self._counters["admitted"] += 1
+                return
+            limit = self.shed_depth if session_id is not None else self.shed_depth // 2
+            if self._waiting >= limit:
+                self._counters["shed"] += 1
+                raise Overloaded(f"The service is busy ({self._waiting} requests waiting); please try again shortly")
+
+            ticket = object()
+            self._queues.setdefault(session_id, deque()).append(ticket)
+            self._waiting += 1
+            self._counters["queued"] += 1
+            self._counters["max_depth"] = max(self._counters["max_depth"], self._waiting)
+            deadline = started + self.timeout
+            while not (self._active < self.slots and self._next() is ticket):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._dequeue(session_id, ticket)
+                    self._counters["timed_out"] += 1
+                    self._cond.notify_all()
+                    raise Overloaded(f"No request slot became free within {self.timeout:g}s; "
+                                     "please try again shortly")
+                self._cond.wait(remaining)
+
+            self._dequeue(session_id, ticket)
+            if session_id in self._queues:
+                self._queues.move_to_end(session_id)
+            self._active += 1
+            self._counters["admitted"] += 1
+            # Another session may now be first in line with a slot still free
+            self._cond.notify_all()
+        observe("admission_wait_seconds", time.monotonic() - started)
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _next(self):
+        # Caller must hold self._cond; the ticket that gets the next free slot
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def _dequeue(self, session_id, ticket):
+        # Caller must hold self._cond
+        queue = self._queues[session_id]
+        queue.remove(ticket)
+        self._waiting -= 1
+        if not queue:
+            del self._queues[session_id]
+
+    def position(self, session_id):
+        """
+        (place in line, requests waiting) for the session's next waiting
+        request, or None if it has none. Each session ahead in the rotation
+        gets one slot before this one.
+        """
+        with self._cond:
+            if session_id not in self._queues:
+                return None
+            return list(self._queues).index(session_id) + 1, self._waiting
+
+    def stats(self):
+        """Return admission counters and the current number of active and waiting requests"""
+        with self._cond:
+            stats = dict(self._counters)
+            stats["active"] = self._active
+            stats["waiting"] = self._waiting
+            stats["sessions_waiting"] = len(self._queues)
+        stats["slots"] = self.slots
+        return stats
+
+
+_default_admission = AdmissionController()
+
+
+def get_default_admission():
+    """Return the process-wide controller shared by all sessions"""
+    return _default_admission
@@ -0,0 +1,320 @@
+"""
+Headless JSON API serving the profiles the Streamlit page shows.
+
+Usage:
+    python api.py --port 8080
+
+Endpoints:
+    GET  /v1/universities/<university>
+    GET  /v1/universities/<university>/courses/<course>
+    POST /v1/batch   {"requests": [{"university": ..., "course": ...}, ...]}
+    GET  /health
+
+Names are canonicalized and profiles come from the same prompts, parser,
+single-flight registry and cache as app.py, so a profile generated for the
+page is served here for free and vice versa. Responses carry an ETag derived
+from the body: a client that sends it back in If-None-Match gets an empty
+304 while the profile is unchanged. Bodies are gzipped for clients that
+accept it, under an ETag of their own, and the compressed form is kept for
+repeated requests.
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+from admission import Overloaded, current_session, run_in_session, session
+from profiles import REFRESHING, ProfileFetchError, canonical_names, get_course_information, get_university_info
+
+API_HOST = os.getenv("UNIADVISOR_API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("UNIADVISOR_API_PORT", "8080"))
+FETCH_WORKERS = int(os.getenv("UNIADVISOR_FETCH_WORKERS", "8"))
+
+# Largest batch accepted in one request, and the largest request body
+MAX_BATCH = int(os.getenv("UNIADVISOR_API_MAX_BATCH", "20"))
+MAX_BODY_BYTES = 64 * 1024
+
+# Bodies smaller than this are sent uncompressed; gzip would barely shrink them
+GZIP_MIN_BYTES = 1024
+# Seconds an idle keep-alive connection is held open
+IDLE_TIMEOUT = 30
+# Seconds a client turned away by admission control is asked to wait before retrying
+RETRY_AFTER = 5
+
+
+class APIError(Exception):
+    """An error answered with the given HTTP status, a JSON message and any extra response headers"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class CompressedBodies:
+    """Gzipped response bodies by ETag, so a popular profile is compressed once"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._bodies = OrderedDict()
+
+    def get(self, etag, body):
+        with self._lock:
+            compressed = self._bodies.get(etag)
+            if compressed is not None:
+                self._bodies.move_to_end(etag)
+                return compressed
+        compressed = gzip.compress(body, compresslevel=6)
+        with self._lock:
+            self._bodies[etag] = compressed
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+        return compressed
+
+
+logger = logging.getLogger(__name__)
+compressed_bodies = CompressedBodies()
+executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="api-fetch")
+
+
+def etag_of(body, encoding=None):
+    """Strong ETag of body; each content encoding of it gets a tag of its own"""
+    tag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header lists etag, ignoring weak validator prefixes"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip, honouring q-values and "*" """
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, *params = [part.strip() for part in coding.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def is_shed(error):
+    """True if a fetch failed because admission control turned its request away"""
+    while error is not None:
+        if isinstance(error, Overloaded):
+            return True
+        error = error.__cause__
+    return False
+
+
+def json_response(status, payload, headers, conditional=True):
+    """
+    Encode payload as a response, answering 304 when the client already has
+    it and compressing it when the client accepts gzip. Returns
+    (status, response headers, body).
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    gzipped = len(body) >= GZIP_MIN_BYTES and accepts_gzip(headers.get("accept-encoding", ""))
+    etag = etag_of(body, "gzip" if gzipped else None)
+    response_headers = {"Content-Type": "application/json", "ETag": etag, "Vary": "Accept-Encoding",
+                        "Cache-Control": "no-cache"}
+    if conditional and status == HTTPStatus.OK and etag_matches(headers.get("if-none-match", ""), etag):
+        return HTTPStatus.NOT_MODIFIED, response_headers, b""
+    if gzipped:
+        body = compressed_bodies.get(etag, body)
+        response_headers["Content-Encoding"] = "gzip"
+    return status, response_headers, body
+
+
+def profile_result(university, course=None):
+    """
+    Fetch one profile on a worker thread; raises ProfileFetchError. An
+    expired profile being regenerated is flagged with "refreshing" and the
+    time it was generated.
+    """
+    university, course = canonical_names(university, course)
+    profile = get_course_information(university, course) if course else get_university_info(university)
+    result = {"university": university, "course": course} if course else {"university": university}
+    # The profile may be shared with concurrent callers, so the marker is not popped off it
+    result["profile"] = {field: value for field, value in profile.items() if field != REFRESHING}
+    if REFRESHING in profile:
+        result["refreshing"] = True
+        result["generated_at"] = profile[REFRESHING]
+    return result
+
+
+async def fetch(university, course=None):
+    # Executor threads do not inherit the context, so the client's session is passed along
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, run_in_session, current_session(), profile_result, university, course)
+
+
+async def batch(body):
+    """Answer every request of a batch concurrently; failures are reported per item"""
+    try:
+        requests = json.loads(body or b"{}").get("requests")
+    except (ValueError, AttributeError):
+        raise APIError(HTTPStatus.BAD_REQUEST, 'Expected a JSON object with a "requests" list')
+    if not isinstance(requests, list) or not requests:
+        raise APIError(HTTPStatus.BAD_REQUEST, '"requests" must be a non-empty list')
+    if len(requests) > MAX_BATCH:
+        raise APIError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"At most {MAX_BATCH} requests per batch")
+    for item in requests:
+        if not isinstance(item, dict) or not isinstance(item.get("university"), str) or not item["university"].strip():
+            raise APIError(HTTPStatus.BAD_REQUEST, 'Every request needs a "university" name')
+        if not isinstance(item.get("course"), (str, type(None))):
+            raise APIError(HTTPStatus.BAD_REQUEST, '"course" must be a name or null')
+
+    async def answer(item):
+        try:
+            return await fetch(item["university"], item.get("course") or None)
+        except ProfileFetchError as e:
+            return {"university": item["university"], "course": item.get("course"), "error": str(e)}
+
+    return {"results": await asyncio.gather(*(answer(item) for item in requests))}
+
+
+async def route(method, path, body):
+    """Dispatch a request to its endpoint and return the payload to send"""
+    parts = [unquote(part) for part in path.strip("/").split("/")]
+    if parts == ["health"] and method == "GET":
+        return {"status": "ok"}
+    if parts[:2] == ["v1", "batch"] and len(parts) == 2:
+        if method != "POST":
+            raise APIError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+        return await batch(body)
+    if parts[:2] == ["v1", "universities"] and len(parts) in (3, 5) and (len(parts) == 3 or parts[3] == "courses"):
+        if method != "GET":
+            raise APIError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET")
+        if not all(part.strip() for part in parts[2::2]):
+            raise APIError(HTTPStatus.BAD_REQUEST, "University and course names must not be empty")
+        try:
+            return await fetch(parts[2], parts[4] if len(parts) == 5 else None)
+        except ProfileFetchError as e:
+            if is_shed(e):
+                raise APIError(HTTPStatus.SERVICE_UNAVAILABLE, str(e), {"Retry-After": str(RETRY_AFTER)})
+            raise APIError(HTTPStatus.BAD_GATEWAY, str(e))
+    raise APIError(HTTPStatus.NOT_FOUND, f"No endpoint at {path}")
+
+
+async def read_request(reader):
+    """Read one request; returns (method, target, version, headers, body), or None at end of stream"""
+    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+    if not request_line.strip():
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise APIError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+        if len(headers) > 100:
+            raise APIError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers")
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise APIError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length < 0:
+        raise APIError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise APIError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target, version, headers, body
+
+
+def encode_response(status, headers, body, keep_alive):
+    status = HTTPStatus(status)
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    headers = dict(headers, **{"Content-Length": str(len(body)),
+                               "Connection": "keep-alive" if keep_alive else "close"})
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def handle_connection(reader, writer):
+    """
+    Serve requests on one connection until the client closes it or goes
+    idle. Each client address queues for admission as its own session.
+    """
+    peer = writer.get_extra_info("peername")
+    try:
+        with session(f"api:{peer[0] if peer else 'unknown'}"):
+            await serve_requests(reader, writer)
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_requests(reader, writer):
+    """Answer requests in turn until the connection is not kept alive"""
+    while True:
+        keep_alive = False
+        try:
+            request = await read_request(reader)
+            if request is None:
+                break
+            method, target, version, headers, body = request
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            payload = await route(method, urlsplit(target).path, body)
+            response = json_response(HTTPStatus.OK, payload, headers, conditional=method == "GET")
+        except APIError as e:
+            response = json_response(e.status, {"error": str(e)}, {}, conditional=False)
+            response[1].update(e.headers)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            raise
+        except Exception:
+            logger.exception("Error handling request")
+            response = json_response(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}, {},
+                                     conditional=False)
+        writer.write(encode_response(*response, keep_alive))
+        await writer.drain()
+        if not keep_alive:
+            break
+
+
+async def serve(host=API_HOST, port=API_PORT):
+    server = await asyncio.start_server(handle_connection, host, port)
+    print(f"Profile API listening on http://{host}:{port}/v1")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve university and course profiles as JSON")
+    parser.add_argument("--host", default=API_HOST, help=f"interface to listen on (default {API_HOST})")
+    parser.add_argument("--port", type=int, default=API_PORT, help=f"port to listen on (default {API_PORT})")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,259 +1,85 @@
 import streamlit as st
-from openai import OpenAI
 import os
-from dotenv import load_dotenv
-import plotly.graph_objects as go
-import json
+import pandas as pd
 import traceback
-import httpx
-import re
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from admission import get_default_admission, run_in_session, session
+from cache import get_default_cache, normalize
+from canonical import COURSE_INDEX, UNIVERSITY_INDEX
+from comparison import comparison_table
+from metrics import get_default_metrics, profiled
+from records import field_record, profile_record, record_fields
+from singleflight import get_default_flights
+from render import PAGE_HEADER, STYLESHEET, render_stats, section_html
+from search_index import get_default_index
+from prefetch import get_default_prefetcher
+from refresh import get_default_refresher
+from profiles import (
+    REFRESHING,
+    ProfileFetchError,
+    canonical_names,
+    client_stats,
+    get_course_information,
+    get_university_info,
+    stream_course_information,
+    stream_university_info,
+    validation_stats,
+)
 
-# Load environment variables
-load_dotenv()
+# Number of profile requests that may be in flight at once across all sessions
+FETCH_WORKERS = int(os.getenv("UNIADVISOR_FETCH_WORKERS", "8"))
 
-# Configure OpenAI client for Groq API
-api_key = os.getenv("GROQ_API_KEY")
-if not api_key:
-    raise ValueError("GROQ_API_KEY environment variable is not set")
+# Stream completions and render each field as soon as it is complete
+STREAMING = os.getenv("UNIADVISOR_STREAMING", "1") == "1"
 
-# Create a custom httpx client without proxies
-http_client = httpx.Client()
+# Directory for cProfile captures of single searches; empty disables the switch
+PROFILE_DIR = os.getenv("UNIADVISOR_PROFILE_DIR", "")
 
-# Initialize OpenAI client with custom settings
-client = OpenAI(
-    api_key=api_key,
-    base_url="https://api.groq.com/openai/v1",
-    http_client=http_client
-)
+# Searches kept per session, so reruns and switching between them need no requests
+HISTORY_SIZE = int(os.getenv("UNIADVISOR_HISTORY_SIZE", "8"))
 
-def clean_json_string(json_str):
-    """Clean JSON string by removing invalid escape characters and fixing common JSON issues"""
-    # Remove escaped underscores
-    json_str = json_str.replace('\\_', '_')
-    
-    # Remove trailing commas in objects and arrays
-    json_str = re.sub(r',(\s*})', r'\1', json_str)
-    json_str = re.sub(r',(\s*])', r'\1', json_str)
-    
-    # Normalize line endings
-    json_str = json_str.replace('\r\n', '\n').replace('\r', '\n')
-    
-    return json_str
+# Markers sent after the last field of a profile, or instead of it on failure
+FETCH_DONE = object()
+FETCH_FAILED = object()
 
-def get_course_information(university, course):
-    """
-    Get detailed course information using OpenAI API
-    """
-    system_message = """You are a comprehensive course information bot. Return a detailed JSON object.
-    Focus on providing extensive, well-researched information about the university course.
-    Include specific details about curriculum, learning outcomes, and career opportunities.
-    Important formatting rules:
-    1. Do not escape underscores in JSON keys
-    2. Do not use trailing commas
-    3. Keep JSON format consistent
-    4. Use double quotes for all strings"""
-    
-    prompt = f"""Generate a detailed JSON object about the {course} at {university}. 
-    Provide comprehensive information including curriculum details, career paths, and student experiences.
-    Return ONLY a JSON object with this exact structure:
-    {{
-        "course_overview": "Detailed 3-4 paragraph overview including: course structure, 
-        learning objectives, unique features, accreditation, and industry partnerships",
-        "tuition": {{
-            "per_semester": "amount in AUD with breakdown",
-            "full_course": "total amount in AUD with additional costs"
-        }},
-        "faculty_reviews": [
-            "detailed review 1 with specific feedback about teaching quality",
-            "detailed review 2 with specific feedback about support",
-            "detailed review 3 with specific feedback about expertise",
-            "detailed review 4 with specific feedback about industry connection"
-        ],
-        "alumni_reviews": [
-            "detailed review 1 with career outcome",
-            "detailed review 2 with specific skills gained",
-            "detailed review 3 with industry placement",
-            "detailed review 4 with international opportunities"
-        ],
-        "career_prospects": [
-            "detailed career path 1 with average time to position",
-            "detailed career path 2 with industry demand",
-            "detailed career path 3 with specific companies",
-            "detailed career path 4 with advancement opportunities",
-            "detailed career path 5 with global opportunities"
-        ],
-        "skills_taught": [
-            "detailed skill 1 with industry application",
-            "detailed skill 2 with practical examples",
-            "detailed skill 3 with certification options",
-            "detailed skill 4 with project work",
-            "detailed skill 5 with industry relevance",
-            "detailed skill 6 with future trends"
-        ],
-        "average_earnings": {{
-            "starting": "detailed starting salary range in AUD with industry comparison",
-            "mid_career": "detailed mid-career salary range in AUD with progression timeline"
-        }}
-    }}"""
+def format_salary_range(salary):
+    """Label for a salary bar: the range when there is one, otherwise the amount"""
+    if salary.minimum == salary.maximum:
+        return f'${salary.median:,.0f}'
+    return f'${salary.minimum:,.0f} - ${salary.maximum:,.0f}'
 
-    try:
-        chat_completion = client.chat.completions.create(
-            model="mixtral-8x7b-32768",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            max_tokens=4096
-        )
-        
-        response_content = chat_completion.choices[0].message.content.strip()
-        cleaned_content = clean_json_string(response_content)
-        
-        try:
-            return json.loads(cleaned_content)
-        except json.JSONDecodeError as e:
-            st.error(f"Error parsing course information JSON: {str(e)}")
-            st.error("Full response content:")
-            st.code(cleaned_content, language="json")
-            return None
-            
-    except Exception as e:
-        st.error(f"Error fetching course information: {str(e)}")
-        return None
-
-def get_university_info(university):
+@st.cache_resource
+def load_plotly():
     """
-    Get detailed information about the university using OpenAI API
+    Import Plotly on the first chart rather than at startup. Cached, so
+    concurrent sessions do not race on the import; an empty figure is
+    serialized too, which loads the JSON encoder Plotly imports lazily.
     """
-    system_message = """You are a comprehensive university information bot. Return a detailed JSON object.
-    Focus on providing extensive, well-researched information about the university.
-    Include historical context, notable achievements, and specific details about facilities and programs."""
-    
-    prompt = f"""Generate a detailed JSON object about {university} in Australia.
-    Provide comprehensive information including history, achievements, and specific details.
-    Return a JSON object with this exact structure:
-    {{
-        "overview": "Provide a detailed 4-5 paragraph overview including: history and establishment, notable achievements, 
-        international recognition, research impact, and current standing in the academic community",
-        "location": {{
-            "city": "city name",
-            "state": "state name",
-            "campus_description": "Detailed 2-3 paragraph description of the campus, including architecture, 
-            layout, notable buildings, and surrounding area"
-        }},
-        "rankings": {{
-            "world_rank": "current world ranking with source",
-            "national_rank": "current national ranking with source",
-            "subject_strengths": [
-                "detailed strength 1 with ranking",
-                "detailed strength 2 with ranking",
-                "detailed strength 3 with ranking",
-                "detailed strength 4 with ranking"
-            ]
-        }},
-        "facilities": [
-            "detailed facility 1 with specific features",
-            "detailed facility 2 with specific features",
-            "detailed facility 3 with specific features",
-            "detailed facility 4 with specific features",
-            "detailed facility 5 with specific features"
-        ],
-        "research": {{
-            "focus_areas": [
-                "detailed research area 1 with achievements",
-                "detailed research area 2 with achievements",
-                "detailed research area 3 with achievements",
-                "detailed research area 4 with achievements"
-            ],
-            "achievements": [
-                "major achievement 1 with year and impact",
-                "major achievement 2 with year and impact",
-                "major achievement 3 with year and impact"
-            ]
-        }},
-        "student_life": {{
-            "total_students": "exact number with breakdown",
-            "international_students": "percentage with top 3 countries",
-            "clubs_societies": "number with description of notable ones",
-            "accommodation": "detailed description of housing options and facilities"
-        }}
-    }}"""
-
-    try:
-        chat_completion = client.chat.completions.create(
-            model="mixtral-8x7b-32768",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            max_tokens=4096
-        )
-        
-        response_content = chat_completion.choices[0].message.content.strip()
-        
-        try:
-            return json.loads(response_content)
-        except json.JSONDecodeError as e:
-            st.error(f"Error parsing university information JSON: {str(e)}")
-            st.error("Full response content:")
-            st.code(response_content, language="json")
-            return None
-            
-    except Exception as e:
-        st.error(f"Error fetching university information: {str(e)}")
-        return None
+    import plotly.graph_objects as go
+    go.Figure().to_json()
+    return go
 
-def process_salary(salary):
+def display_earnings_chart(earnings):
     """
-    Process salary value to extract numeric values from various formats:
-    - Pure numbers: 60000
-    - Formatted numbers: "$60,000 AUD"
-    - Ranges: "60000 - 80000"
-    - Descriptive text: "The starting salary range is 60000 to 80000 AUD"
-    Returns the average if a range is provided
-    """
-    if isinstance(salary, (int, float)):
-        return float(salary)
-    elif isinstance(salary, str):
-        try:
-            # Remove currency symbols and 'AUD'
-            cleaned = salary.replace('$', '').replace('AUD', '').replace(',', '').strip()
-            
-            # Extract all numbers from the string
-            import re
-            numbers = re.findall(r'\d+', cleaned)
-            
-            if numbers:
-                # If we have multiple numbers (likely a range), take the average
-                numbers = [float(num) for num in numbers]
-                return sum(numbers) / len(numbers)
-            else:
-                raise ValueError(f"No numeric values found in salary: {salary}")
-        except Exception as e:
-            st.error(f"Error processing salary '{salary}': {str(e)}")
-            return 0
-    else:
-        st.error(f"Unexpected salary format: {salary}")
-        return 0
-
-def display_earnings_chart(earnings_data):
-    """
-    Display earnings chart using Plotly
+    Display earnings chart using Plotly, from the salaries parsed into the
+    Earnings record when it was built
     """
+    go = load_plotly()
     try:
-        starting_salary = process_salary(earnings_data['starting'])
-        mid_career_salary = process_salary(earnings_data['mid_career'])
+        starting, mid_career = earnings.starting_aud, earnings.mid_career_aud
 
         # Only create chart if we have valid salary data
-        if starting_salary > 0 and mid_career_salary > 0:
+        if starting is not None and mid_career is not None:
             fig = go.Figure(data=[
                 go.Bar(
                     x=['Starting Salary', 'Mid-Career Salary'],
-                    y=[starting_salary, mid_career_salary],
+                    y=[starting.median, mid_career.median],
                     marker_color=['#1e3c72', '#2a5298'],
-                    text=[f'${starting_salary:,.0f}', f'${mid_career_salary:,.0f}'],
+                    text=[format_salary_range(starting), format_salary_range(mid_career)],
                     textposition='auto',
                 )
             ])
@@ -274,424 +100,669 @@ def display_earnings_chart(earnings_data):
             # Display the original salary descriptions
             with st.expander("📊 Detailed Salary Information"):
                 st.write("**Starting Salary:**")
-                st.write(earnings_data['starting'])
+                st.write(earnings.starting)
                 st.write("**Mid-Career Salary:**")
-                st.write(earnings_data['mid_career'])
+                st.write(earnings.mid_career)
         else:
             st.warning("Unable to display salary chart due to invalid salary data")
             st.write("**Original Salary Information:**")
-            st.write(earnings_data)
+            st.write({"starting": earnings.starting, "mid_career": earnings.mid_career})
             
     except Exception as e:
         st.error(f"Error displaying earnings chart: {str(e)}")
         st.write("**Original Salary Data:**")
-        st.write(earnings_data)
+        st.write({"starting": earnings.starting, "mid_career": earnings.mid_career})
 
-def main():
-    st.set_page_config(page_title="Australian Universities Information", layout="wide")
-    
-    # Custom CSS with enhanced styling
-    st.markdown("""
-        <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=Poppins:wght@400;500;600;700&display=swap');
-        
-        :root {
-            --primary-color: #1e3c72;
-            --secondary-color: #2a5298;
-            --accent-color: #4CAF50;
-            --background-color: #f8f9fa;
-            --card-background: #ffffff;
-            --text-color: #2c3e50;
-            --border-radius: 12px;
-            --box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }
-        
-        * {
-            font-family: 'Inter', sans-serif;
-            color: var(--text-color);
-        }
-        
-        h1, h2, h3, .section-header {
-            font-family: 'Poppins', sans-serif !important;
-        }
-        
-        /* Main header styling */
-        .main-header {
-            text-align: center;
-            padding: 3rem 2rem;
-            background: linear-gradient(135deg, var(--primary-color) 0%, var(--secondary-color) 100%);
-            border-radius: var(--border-radius);
-            margin-bottom: 2rem;
-            box-shadow: var(--box-shadow);
-            position: relative;
-            overflow: hidden;
-        }
-        
-        .main-header::before {
-            content: "";
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: linear-gradient(45deg, rgba(255,255,255,0.1) 0%, rgba(255,255,255,0) 100%);
-            pointer-events: none;
-        }
-        
-        .main-header h1 {
-            font-size: 3.5rem !important;
-            font-weight: 700 !important;
-            margin-bottom: 1rem !important;
-            color: white !important;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.2);
-        }
-        
-        .main-header p {
-            font-size: 1.4rem !important;
-            color: rgba(255, 255, 255, 0.9) !important;
-            max-width: 800px;
-            margin: 0 auto !important;
-        }
-        
-        /* Card styling */
-        .card {
-            background: var(--card-background);
-            padding: 1.8rem;
-            border-radius: var(--border-radius);
-            box-shadow: var(--box-shadow);
-            margin-bottom: 1.5rem;
-            border: 1px solid rgba(0,0,0,0.05);
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-        }
-        
-        .card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-        }
-        
-        /* Metric card styling */
-        .metric-card {
-            background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
-            padding: 1.8rem;
-            border-radius: var(--border-radius);
-            box-shadow: var(--box-shadow);
-            transition: all 0.3s ease;
-            border: 1px solid rgba(0,0,0,0.05);
-        }
-        
-        .metric-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-        }
-        
-        /* Section headers */
-        .section-header {
-            color: var(--primary-color);
-            padding: 1rem 0;
-            border-bottom: 2px solid rgba(30, 60, 114, 0.1);
-            margin: 2rem 0 1.5rem 0;
-            font-size: 2rem !important;
-            font-weight: 600 !important;
-            display: flex;
-            align-items: center;
-            gap: 0.5rem;
-        }
-        
-        /* Form styling */
-        .stTextInput input {
-            font-size: 1.1rem !important;
-            padding: 0.8rem 1rem !important;
-            border-radius: var(--border-radius) !important;
-            border: 1px solid rgba(0,0,0,0.1) !important;
-            transition: all 0.3s ease;
-        }
-        
-        .stTextInput input:focus {
-            border-color: var(--primary-color) !important;
-            box-shadow: 0 0 0 2px rgba(30, 60, 114, 0.1) !important;
-        }
-        
-        .stButton button {
-            font-size: 1.2rem !important;
-            padding: 0.8rem 1.5rem !important;
-            font-weight: 600 !important;
-            border-radius: var(--border-radius) !important;
-            background: linear-gradient(135deg, var(--primary-color) 0%, var(--secondary-color) 100%) !important;
-            transition: all 0.3s ease !important;
-            border: none !important;
-        }
-        
-        .stButton button:hover {
-            transform: translateY(-2px) !important;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.2) !important;
-        }
-        
-        /* Overview text styling */
-        .overview-text {
-            font-size: 1.2rem !important;
-            line-height: 1.8 !important;
-            padding: 2rem;
-            background: linear-gradient(135deg, #f8f9fa 0%, #ffffff 100%);
-            border-radius: var(--border-radius);
-            margin-bottom: 2rem;
-            border-left: 4px solid var(--primary-color);
-            box-shadow: var(--box-shadow);
-        }
-        
-        /* Alert styling */
-        .stAlert {
-            font-size: 1.1rem !important;
-            padding: 1rem !important;
-            margin-bottom: 1rem !important;
-            border-radius: var(--border-radius) !important;
-            animation: slideIn 0.5s ease-out;
-        }
-        
-        /* Statistics cards */
-        .stat-card {
-            text-align: center;
-            padding: 1.5rem;
-            background: white;
-            border-radius: var(--border-radius);
-            box-shadow: var(--box-shadow);
-            transition: all 0.3s ease;
-            border: 1px solid rgba(0,0,0,0.05);
-        }
-        
-        .stat-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-        }
-        
-        .stat-value {
-            font-size: 2rem !important;
-            font-weight: 700 !important;
-            color: var(--primary-color) !important;
-            margin-bottom: 0.5rem !important;
-        }
-        
-        .stat-label {
-            font-size: 1.1rem !important;
-            color: #666 !important;
-            font-weight: 500 !important;
-        }
-        
-        /* Bullet points */
-        .bullet-point {
-            font-size: 1.1rem !important;
-            line-height: 1.8 !important;
-            margin-bottom: 0.8rem !important;
-            padding-left: 1.5rem !important;
-            position: relative;
-        }
-        
-        .bullet-point::before {
-            content: "•";
-            color: var(--primary-color);
-            font-size: 1.5rem;
-            position: absolute;
-            left: 0;
-            top: -0.2rem;
-        }
-        
-        /* Animations */
-        @keyframes slideIn {
-            from {
-                transform: translateY(20px);
-                opacity: 0;
-            }
-            to {
-                transform: translateY(0);
-                opacity: 1;
-            }
-        }
-        
-        /* Expander styling */
-        .streamlit-expanderHeader {
-            font-size: 1.1rem !important;
-            font-weight: 600 !important;
-            color: var(--primary-color) !important;
-            background-color: rgba(30, 60, 114, 0.05) !important;
-            border-radius: var(--border-radius) !important;
-            transition: all 0.3s ease !important;
-        }
-        
-        .streamlit-expanderHeader:hover {
-            background-color: rgba(30, 60, 114, 0.1) !important;
-        }
-        
-        /* Custom scrollbar */
-        ::-webkit-scrollbar {
-            width: 10px;
-        }
-        
-        ::-webkit-scrollbar-track {
-            background: #f1f1f1;
-            border-radius: 5px;
-        }
-        
-        ::-webkit-scrollbar-thumb {
-            background: var(--primary-color);
-            border-radius: 5px;
-        }
-        
-        ::-webkit-scrollbar-thumb:hover {
-            background: var(--secondary-color);
+# Page layout of each profile: rows of fields, where a row with two fields is split into columns
+UNIVERSITY_LAYOUT = [
+    ["overview"],
+    ["location", "rankings"],
+    ["student_life"],
+    ["facilities", "research"],
+]
+
+COURSE_LAYOUT = [
+    ["course_overview"],
+    ["tuition"],
+    ["faculty_reviews", "alumni_reviews"],
+    ["career_prospects", "skills_taught"],
+    ["average_earnings"],
+]
+
+def layout_profile(layout):
+    """
+    Reserve an empty placeholder for every field of a profile, in page order,
+    so fields can be filled in whenever they arrive
+    """
+    slots = {}
+    for row in layout:
+        if len(row) == 1:
+            slots[row[0]] = st.container()
+        else:
+            for field, column in zip(row, st.columns(len(row))):
+                with column:
+                    slots[field] = st.container()
+    return slots
+
+def render_field(kind, slots, field, record):
+    """
+    Render one profile field's record into its placeholder as a single HTML
+    block; unknown fields are ignored
+    """
+    html = section_html(kind, field, record)
+    if html is not None:
+        with render_stats.section(field), slots[field]:
+            st.markdown(html, unsafe_allow_html=True)
+            if field == "average_earnings":
+                display_earnings_chart(record)
+
+def display_university_info(uni_info):
+    """
+    Display the sections of a UniversityProfile record
+    """
+    slots = layout_profile(UNIVERSITY_LAYOUT)
+    for field, record in record_fields(uni_info):
+        render_field("university", slots, field, record)
+
+def display_course_info(course_info):
+    """
+    Display the sections of a CourseProfile record
+    """
+    slots = layout_profile(COURSE_LAYOUT)
+    for field, record in record_fields(course_info):
+        render_field("course", slots, field, record)
+
+def pump_profile_fields(kind, fields, events, session_id):
+    """
+    Run on a worker thread: convert the (field, value) pairs returned by
+    fields() to records and forward them onto the page's event queue,
+    followed by an end marker. Fields the page does not show are dropped.
+    fields is called here rather than by the caller, so a fetch that raises
+    straight away is reported and still ends with the marker. Its API
+    requests queue for admission as the page's session.
+    """
+    try:
+        with session(session_id):
+            for field, value in fields():
+                if field != REFRESHING:
+                    value = field_record(kind, field, value)
+                    if value is None:
+                        continue
+                events.put((kind, field, value))
+    except ProfileFetchError as e:
+        events.put((kind, FETCH_FAILED, e))
+    except Exception as e:
+        events.put((kind, FETCH_FAILED, ProfileFetchError(f"Error fetching {kind} information: {str(e)}")))
+    finally:
+        events.put((kind, FETCH_DONE, None))
+
+def display_refreshing(kind, generated_at):
+    """Note that a profile is an expired copy being regenerated in the background"""
+    generated = time.strftime("%d %b %Y", time.localtime(generated_at))
+    st.caption(f"🔄 Showing the {kind} profile generated on {generated}; "
+               "an updated one is being prepared and will appear on your next search.")
+
+def new_snapshot(university, course):
+    """
+    What a search showed: the names it resolved to, its profile records and
+    when stale ones were generated
+    """
+    return {"query": canonical_names(university, course or None), "profiles": {}, "refreshing": {}}
+
+def session_id():
+    """Id of the browser session running this script"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+def fetch_status(session, fetching):
+    """Status line of a search: its place in the admission queue while it waits for a request slot"""
+    position = get_default_admission().position(session)
+    if position is None:
+        return fetching
+    place, waiting = position
+    return (f"⏳ The service is busy: your search is number {place} in line ({waiting} requests waiting). "
+            "It will start as soon as a slot frees up.")
+
+def display_profiles(university, course):
+    """
+    Fetch the university profile, and the course profile if a course is given,
+    concurrently, rendering every field as soon as it is complete. Returns a
+    snapshot of what was shown, or None if a profile failed to load.
+    """
+    executor = get_fetch_executor()
+    events = queue.Queue()
+    snapshot = new_snapshot(university, course)
+    failed = False
+
+    status = st.empty()
+    sections = {"university": st.container()}
+    slots = {}
+    notices = {}
+    with sections["university"]:
+        notices["university"] = st.empty()
+        slots["university"] = layout_profile(UNIVERSITY_LAYOUT)
+    if course:
+        sections["course"] = st.container()
+        with sections["course"]:
+            notices["course"] = st.empty()
+            slots["course"] = layout_profile(COURSE_LAYOUT)
+
+    if STREAMING:
+        fields = {
+            "university": lambda: stream_university_info(university, course),
+            "course": lambda: stream_course_information(university, course),
         }
-        
-        /* Loading spinner */
-        .stSpinner > div {
-            border-color: var(--primary-color) !important;
+    else:
+        fields = {
+            "university": lambda: get_university_info(university, course).items(),
+            "course": lambda: get_course_information(university, course).items(),
         }
-        </style>
-    """, unsafe_allow_html=True)
-    
-    # Header
-    st.markdown('<div class="main-header">', unsafe_allow_html=True)
-    st.title("🎓 Manish Paneru's AID to Australian Universities")
-    st.write("Comprehensive information about courses and universities in Australia")
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Input form
-    with st.form("search_form"):
+
+    session = session_id()
+    for kind in sections:
+        snapshot["profiles"][kind] = {}
+        executor.submit(pump_profile_fields, kind, fields[kind], events, session)
+
+    # Updated while waiting for the next field, to show the search's place in the admission queue
+    fetching = ("🔄 Fetching university and course information..." if course
+                else "🔄 Fetching university information...")
+    shown = None
+    pending = set(sections)
+    while pending:
+        text = fetch_status(session, fetching)
+        if text != shown:
+            status.info(text)
+            shown = text
+        try:
+            kind, field, value = events.get(timeout=0.25)
+        except queue.Empty:
+            continue
+        if field is FETCH_DONE:
+            pending.discard(kind)
+        elif field is FETCH_FAILED:
+            failed = True
+            with sections[kind]:
+                display_fetch_error(value)
+                if kind == "course":
+                    st.error("❌ Failed to fetch course information. Please try again.")
+        elif field == REFRESHING:
+            snapshot["refreshing"][kind] = value
+            with notices[kind].container():
+                display_refreshing(kind, value)
+        else:
+            snapshot["profiles"][kind][field] = value
+            render_field(kind, slots[kind], field, value)
+    status.empty()
+    snapshot["profiles"] = {kind: profile_record(kind, fields) for kind, fields in snapshot["profiles"].items()}
+    return None if failed else snapshot
+
+def display_snapshot(snapshot):
+    """Render a search again from its snapshot, without fetching anything"""
+    for kind, display in (("university", display_university_info), ("course", display_course_info)):
+        if kind in snapshot["profiles"]:
+            with st.container():
+                if kind in snapshot["refreshing"]:
+                    display_refreshing(kind, snapshot["refreshing"][kind])
+                display(snapshot["profiles"][kind])
+
+def remember_search(snapshot):
+    """
+    Keep a search's snapshot in this session's history, most recent last,
+    dropping the oldest beyond HISTORY_SIZE, and make it the one shown
+    """
+    university, course = snapshot["query"]
+    label = f"{course} at {university}" if course else university
+    history = st.session_state.setdefault("search_history", OrderedDict())
+    history[label] = snapshot
+    history.move_to_end(label)
+    while len(history) > HISTORY_SIZE:
+        history.popitem(last=False)
+    st.session_state.history_choice = label
+
+def show_history_entry():
+    """Put the names of the chosen recent search back into the search form"""
+    university, course = st.session_state.search_history[st.session_state.history_choice]["query"]
+    st.session_state.university_input = university
+    st.session_state.course_input = course or ""
+
+def display_history():
+    """List this session's recent searches in the sidebar; choosing one shows it again at once"""
+    history = st.session_state.get("search_history")
+    if history:
+        st.sidebar.radio("🕘 Recent searches", list(reversed(history)), key="history_choice",
+                         on_change=show_history_entry)
+
+def use_suggestion(key, name):
+    """Put a suggested name into the search form and search again"""
+    st.session_state[key] = name
+    st.session_state.search_requested = True
+
+def display_search_terms(university, course):
+    """
+    Say which university and course a search resolved to when it differs from
+    what was typed, and offer close matches for names that were not recognised
+    """
+    for key, typed, index in (("university_input", university, UNIVERSITY_INDEX),
+                              ("course_input", course, COURSE_INDEX)):
+        if not typed:
+            continue
+        resolved = index.canonical(typed)
+        if resolved is None:
+            suggestions = index.suggest(typed)
+            if suggestions:
+                columns = st.columns(len(suggestions) + 1)
+                columns[0].caption("Did you mean:")
+                for column, name in zip(columns[1:], suggestions):
+                    column.button(name, key=f"suggest_{key}_{name}", on_click=use_suggestion, args=(key, name))
+        elif normalize(resolved) != normalize(typed):
+            st.caption(f"Showing results for **{resolved}** (searched for \"{typed}\")")
+
+def display_fetch_error(error):
+    """
+    Display a ProfileFetchError, including the raw model output when available
+    """
+    st.error(str(error))
+    if error.raw_content is not None:
+        st.error("Full response content:")
+        st.code(error.raw_content, language="json")
+
+@st.cache_resource
+def get_fetch_executor():
+    """
+    Thread pool shared by all sessions for issuing profile requests concurrently.
+    The API client is thread-safe, so its connection pool is shared by the workers.
+    """
+    return ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="profile-fetch")
+
+def display_comparison(pairs):
+    """
+    Fetch the course profiles of several university/course pairs concurrently
+    and compare their tuition and salaries in one chart and one table
+    """
+    requested = []
+    for university, course in pairs:
+        pair = canonical_names(university, course)
+        if pair not in requested:
+            requested.append(pair)
+
+    executor = get_fetch_executor()
+    session = session_id()
+    futures = {executor.submit(run_in_session, session, get_course_information, university, course):
+               (university, course) for university, course in requested}
+
+    profiles = {}
+    progress = st.progress(0.0, text="🔄 Fetching course information...")
+    for done, future in enumerate(as_completed(futures), 1):
+        university, course = futures[future]
+        try:
+            profiles[university, course] = future.result()
+        except ProfileFetchError as e:
+            st.error(f"❌ Failed to fetch {course} at {university}: {str(e)}")
+        progress.progress(done / len(futures), text=f"🔄 Fetched {done} of {len(futures)} courses...")
+    progress.empty()
+
+    results = [(university, course, profiles[university, course])
+               for university, course in requested if (university, course) in profiles]
+    if not results:
+        return
+
+    table = comparison_table(results)
+    display_comparison_chart(table)
+
+    st.markdown('<h2 class="section-header">📋 Tuition and Salary Comparison</h2>', unsafe_allow_html=True)
+    st.dataframe(
+        table[["University", "Course", "Tuition per semester (AUD)", "Full course tuition (AUD)",
+               "Starting salary (AUD)", "Mid-career salary (AUD)"]],
+        column_config={
+            column: st.column_config.NumberColumn(format="$%d")
+            for column in ["Tuition per semester (AUD)", "Full course tuition (AUD)",
+                           "Starting salary (AUD)", "Mid-career salary (AUD)"]
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+    with st.expander("📊 Detailed Tuition and Salary Information"):
+        st.dataframe(table[["University", "Course", "Tuition per semester", "Full course tuition",
+                            "Starting salary", "Mid-career salary"]],
+                     hide_index=True, use_container_width=True)
+
+def display_comparison_chart(table):
+    """
+    Display the starting and mid-career salaries of every compared course
+    side by side in one Plotly chart
+    """
+    charted = table.dropna(subset=["Starting salary (AUD)", "Mid-career salary (AUD)"], how="all")
+    if charted.empty:
+        st.warning("Unable to display salary chart due to invalid salary data")
+        return
+
+    go = load_plotly()
+    labels = charted["Course"] + " — " + charted["University"]
+    fig = go.Figure(data=[
+        go.Bar(
+            name='Starting Salary',
+            x=labels,
+            y=charted["Starting salary (AUD)"],
+            marker_color='#1e3c72',
+            texttemplate='$%{y:,.0f}',
+            textposition='auto',
+        ),
+        go.Bar(
+            name='Mid-Career Salary',
+            x=labels,
+            y=charted["Mid-career salary (AUD)"],
+            marker_color='#2a5298',
+            texttemplate='$%{y:,.0f}',
+            textposition='auto',
+        ),
+    ])
+
+    fig.update_layout(
+        title='Salary Comparison',
+        barmode='group',
+        yaxis_title='Salary (AUD)',
+        yaxis=dict(tickformat='$,.0f'),
+        height=450,
+        margin=dict(t=50, b=50),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+
+    st.markdown('<h2 class="section-header">💸 Salary Comparison</h2>', unsafe_allow_html=True)
+    st.plotly_chart(fig, use_container_width=True)
+
+def display_comparison_form():
+    """
+    Form for entering the university/course pairs to compare
+    """
+    with st.form("compare_form"):
+        pairs = st.data_editor(
+            pd.DataFrame({"University": ["", ""], "Course": ["", ""]}),
+            column_config={
+                "University": st.column_config.TextColumn("🏛️ University Name"),
+                "Course": st.column_config.TextColumn("📚 Course Name"),
+            },
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            key="compare_pairs",
+        )
+        compare_button = st.form_submit_button("⚖️ Compare Courses", use_container_width=True)
+
+    if compare_button:
+        pairs = [(str(university).strip(), str(course).strip())
+                 for university, course in zip(pairs["University"].fillna(""), pairs["Course"].fillna(""))
+                 if str(university).strip() and str(course).strip()]
+        if pairs:
+            display_comparison(pairs)
+        else:
+            st.warning("Enter at least one university and course to compare")
+
+def format_aud(amount):
+    return f"${amount:,.0f}" if amount is not None and not pd.isna(amount) else ""
+
+def display_explore():
+    """
+    Search every profile generated so far by keyword, state, salary and
+    tuition, from the local index without any API call
+    """
+    index = get_default_index()
+    if not index.stats()["documents"]:
+        st.info("Profiles appear here once they have been generated by a search or a comparison.")
+        return
+
+    with st.form("explore_form"):
+        text = st.text_input("🔎 Keywords", placeholder="e.g., machine learning", key="explore_text")
         col1, col2 = st.columns(2)
-        
         with col1:
-            university = st.text_input("🏛️ University Name", placeholder="e.g., University of Sydney")
-        
+            kind = st.radio("Find", ["Courses", "Universities"], horizontal=True, key="explore_kind")
         with col2:
-            course = st.text_input("📚 Course Name", placeholder="e.g., Bachelor of Computer Science")
-        
-        submit_button = st.form_submit_button("🔍 Get Information", use_container_width=True)
-    
-    if submit_button and university:
-        # Fetch university information
-        with st.spinner("🔄 Fetching university information..."):
-            uni_info = get_university_info(university)
+            states = st.multiselect("States", sorted(index.search()[1]["state"]), key="explore_states")
+        col3, col4 = st.columns(2)
+        with col3:
+            min_starting = st.number_input("Minimum starting salary (AUD)", min_value=0, step=5000,
+                                           key="explore_min_starting")
+        with col4:
+            max_tuition = st.number_input("Maximum tuition per semester (AUD, 0 for any)", min_value=0, step=1000,
+                                          key="explore_max_tuition")
+        st.form_submit_button("🔎 Search Profiles", use_container_width=True)
+
+    ranges = {}
+    if min_starting:
+        ranges["starting_salary"] = (min_starting, None)
+    if max_tuition:
+        ranges["tuition_per_semester"] = (None, max_tuition)
+    started = time.perf_counter()
+    results, facets = index.search(text, kind="course" if kind == "Courses" else "university", states=states,
+                                   ranges=ranges)
+    elapsed = time.perf_counter() - started
+
+    st.caption(f"{sum(facets['kind'].values())} matches in {elapsed * 1000:.1f} ms, from "
+               f"{index.stats()['documents']} generated profiles")
+    if facets["state"]:
+        st.caption("By state: " + " · ".join(f"{state} ({count})" for state, count in facets["state"].most_common()))
+    if not results:
+        return
+
+    table = pd.DataFrame(results)
+    table["matches"] = table["matches"].map(lambda matches: "; ".join(matches[:2]))
+    if kind == "Courses":
+        for column in ("starting_salary", "mid_career_salary", "tuition_per_semester"):
+            table[column] = table[column].map(format_aud)
+        columns = {"university": "University", "course": "Course", "starting_salary": "Starting salary",
+                   "mid_career_salary": "Mid-career salary", "tuition_per_semester": "Tuition per semester",
+                   "matches": "Matching skills and careers"}
+    else:
+        columns = {"university": "University", "state": "State", "matches": "Matching research and strengths"}
+    st.dataframe(table[list(columns)].rename(columns=columns), hide_index=True, use_container_width=True)
+
+def write_lines(lines):
+    """Write several markdown lines as one element"""
+    st.markdown("  \n".join(lines))
+
+def display_cache_stats():
+    """
+    Display profile cache counters in the sidebar so the cache can be sized
+    """
+    stats = get_default_cache().stats()
+    flights = get_default_flights().stats()
+    with st.sidebar.expander("🗄️ Cache Statistics"):
+        st.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+        write_lines([
+            f"**Memory hits:** {stats['memory_hits']}",
+            f"**Disk hits:** {stats['disk_hits']}",
+            f"**Bundle hits:** {stats['bundle_hits']} ({stats['bundle_entries']} bundled profiles)",
+            f"**Misses:** {stats['misses']}",
+            f"**Expired:** {stats['expired']}",
+            f"**Evictions:** {stats['evictions']}",
+            f"**Memory usage:** {stats['memory_bytes']:,} / {stats['max_bytes']:,} bytes "
+            f"({stats['memory_entries']} entries)",
+            f"**Coalesced requests:** {flights['followers']} shared / {flights['leaders']} issued "
+            f"({flights['in_flight']} in flight)",
+            f"**Stale fallbacks:** {stats['stale_hits']}",
+        ])
+
+    refresh = get_default_refresher().stats()
+    with st.sidebar.expander("🔄 Background Refresh"):
+        write_lines([
+            f"**Served stale while refreshing:** {stats['stale_served']}",
+            f"**Refreshes:** {refresh['refreshed']} done, {refresh['failed']} failed, "
+            f"{refresh['pending']} pending",
+            f"**Refreshed ahead of expiry:** {refresh['scheduled']}",
+            f"**Dropped (queue full):** {refresh['dropped']}",
+            f"**Popular profiles tracked:** {refresh['tracked']}",
+        ])
+
+    upstream = client_stats()
+    admission = get_default_admission().stats()
+    with st.sidebar.expander("🌐 Upstream API"):
+        write_lines([
+            f"**Admission:** {admission['active']} / {admission['slots']} slots in use, "
+            f"{admission['waiting']} waiting from {admission['sessions_waiting']} sessions",
+            f"**Queued:** {admission['queued']} of {admission['admitted']} admitted "
+            f"(deepest queue {admission['max_depth']})",
+            f"**Shed:** {admission['shed']} when the queue was full, {admission['timed_out']} after waiting too long",
+        ])
+        if upstream is None:
+            st.write("**Circuit:** no requests made yet")
+        else:
+            write_lines([
+                f"**Circuit:** {upstream['circuit']}",
+                f"**Requests:** {upstream['requests']}",
+                f"**Retries:** {upstream['retries']} ({upstream['rate_limited']} rate limited)",
+                f"**Hedged:** {upstream['hedged']} ({upstream['hedge_wins']} won by the hedge)",
+                f"**Rejected while open:** {upstream['rejected']}",
+            ])
+
+    prefetch = get_default_prefetcher().stats()
+    with st.sidebar.expander("🔮 Prefetch"):
+        st.metric("Prefetch Hit Rate", f"{prefetch['hit_rate']:.0%}")
+        write_lines([
+            f"**Prefetched:** {prefetch['prefetched']} courses ({prefetch['failed']} failed, "
+            f"{prefetch['pending']} pending)",
+            f"**Searched afterwards:** {prefetch['hits']} ({prefetch['in_flight_hits']} more while still running)",
+            f"**Tokens spent:** {prefetch['tokens']:,}"
+            + (f" ({prefetch['tokens_per_hit']:,.0f} per hit)" if prefetch["tokens_per_hit"] else ""),
+            f"**Skipped:** {prefetch['skipped_busy']} while busy, {prefetch['dropped']} with the queue full",
+        ])
+
+    validation = validation_stats.stats()
+    with st.sidebar.expander("🧩 Output Validation"):
+        st.metric("Parse Failure Rate", f"{validation['parse_failure_rate']:.0%}")
+        write_lines([
+            f"**Documents parsed:** {validation['documents']} ({validation['repaired_documents']} repaired, "
+            f"{validation['parse_failures']} unreadable)",
+            f"**Schema violations:** {validation['invalid_documents']}",
+            f"**Repaired fields:** {validation['repaired_fields']} ({validation['repair_failures']} repairs failed)",
+            f"**Tokens spent on repairs:** {validation['repair_tokens']:,}",
+        ])
+
+# Latency metrics shown in the sidebar, in pipeline order
+LATENCY_METRICS = {
+    "llm_ttft_seconds": "Time to first token",
+    "llm_request_seconds": "LLM request",
+    "json_repair_seconds": "JSON repair",
+    "json_decode_seconds": "JSON decode",
+    "salary_parse_seconds": "Salary parsing",
+    "render_section_seconds": "Section rendering",
+}
+
+def format_seconds(seconds):
+    return f"{seconds:.2f} s" if seconds >= 1 else f"{seconds * 1000:.1f} ms"
+
+def display_latency_stats():
+    """
+    Display the p50 and p95 of each stage and the tokens per completion, so a
+    slow page can be traced to the API, parsing or rendering
+    """
+    metrics = get_default_metrics()
+    lines = []
+    for name, title in LATENCY_METRICS.items():
+        summary = metrics.summary(name)
+        if summary["count"]:
+            lines.append(f"**{title}:** p50 {format_seconds(summary['p50'])}, "
+                         f"p95 {format_seconds(summary['p95'])} ({summary['count']})")
+    prompt, completion = metrics.summary("llm_prompt_tokens"), metrics.summary("llm_completion_tokens")
+    if completion["count"]:
+        lines.append(f"**Tokens per completion:** {prompt['mean']:,.0f} prompt, {completion['mean']:,.0f} completion")
+    with st.sidebar.expander("⏱️ Latency"):
+        write_lines(lines or ["No requests timed yet"])
+
+def display_render_stats():
+    """
+    Display how many deltas pages sent to the browser and how long sections
+    took to render; shown after the page so its own output is not counted
+    """
+    stats = render_stats.stats()
+    with st.sidebar.expander("🖼️ Rendering"):
+        st.metric("Deltas per Page", f"{stats['deltas_per_page']:.0f}")
+        write_lines([
+            f"**Pages rendered:** {stats['pages']} (last sent {stats['last_page_deltas']} deltas)",
+            f"**Bytes per page:** {stats['bytes_per_page']:,.0f}",
+            f"**Section render time:** {stats['ms_per_section']:.2f} ms over {stats['sections']} sections",
+        ])
+
+def arm_profiler():
+    """Capture a cProfile of this session's next search"""
+    st.session_state.profile_next_search = True
+
+def display_profiled_search(university, course):
+    """
+    Run one search under cProfile, save the stats to PROFILE_DIR and show the
+    functions with the most cumulative time
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"search-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+    with profiled(path) as result:
+        display_search_terms(university, course)
+        snapshot = display_profiles(university, course)
+    with st.expander("🔬 Profile of this search"):
+        st.caption(f"Saved to `{path}`. Only the page's own thread is profiled; API requests run on "
+                   "worker threads and are covered by the latency metrics in the sidebar.")
+        st.code(result["report"], language="text")
+    return snapshot
+
+def display_page():
+    """
+    Display the styled header and the search and comparison tabs
+    """
+    st.markdown(STYLESHEET, unsafe_allow_html=True)
+    st.markdown(PAGE_HEADER, unsafe_allow_html=True)
+    if PROFILE_DIR:
+        st.sidebar.button("🔬 Profile next search", on_click=arm_profiler, use_container_width=True)
+
+    search_tab, compare_tab, explore_tab = st.tabs(["🔍 Search", "⚖️ Compare Courses", "🔎 Explore Profiles"])
+
+    with search_tab:
+        # Input form
+        with st.form("search_form"):
+            col1, col2 = st.columns(2)
             
-            if uni_info:
-                # University Overview Section
-                st.markdown('<h2 class="section-header">🏛️ University Overview</h2>', unsafe_allow_html=True)
-                st.markdown(f'<div class="overview-text">{uni_info["overview"]}</div>', unsafe_allow_html=True)
-                
-                # Location and Rankings
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown('<div class="card">', unsafe_allow_html=True)
-                    st.markdown('<h3 style="color: #1e3c72;">📍 Location</h3>', unsafe_allow_html=True)
-                    st.write(f"**City:** {uni_info['location']['city']}")
-                    st.write(f"**State:** {uni_info['location']['state']}")
-                    st.write(f"**Campus:** {uni_info['location']['campus_description']}")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with col2:
-                    st.markdown('<div class="card">', unsafe_allow_html=True)
-                    st.markdown('<h3 style="color: #1e3c72;">🏆 Rankings</h3>', unsafe_allow_html=True)
-                    st.write(f"**World Rank:** {uni_info['rankings']['world_rank']}")
-                    st.write(f"**National Rank:** {uni_info['rankings']['national_rank']}")
-                    st.write("**Subject Strengths:**")
-                    for subject in uni_info['rankings']['subject_strengths']:
-                        st.write(f"• {subject}")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Student Life Statistics
-                st.markdown('<h2 class="section-header">👥 Student Life</h2>', unsafe_allow_html=True)
-                stats_cols = st.columns(4)
-                
-                with stats_cols[0]:
-                    st.markdown('<div class="stat-card">', unsafe_allow_html=True)
-                    st.markdown(f'<div class="stat-value">{uni_info["student_life"]["total_students"]}</div>', unsafe_allow_html=True)
-                    st.markdown('<div class="stat-label">Total Students</div>', unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with stats_cols[1]:
-                    st.markdown('<div class="stat-card">', unsafe_allow_html=True)
-                    st.markdown(f'<div class="stat-value">{uni_info["student_life"]["international_students"]}</div>', unsafe_allow_html=True)
-                    st.markdown('<div class="stat-label">International Students</div>', unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with stats_cols[2]:
-                    st.markdown('<div class="stat-card">', unsafe_allow_html=True)
-                    st.markdown(f'<div class="stat-value">{uni_info["student_life"]["clubs_societies"]}</div>', unsafe_allow_html=True)
-                    st.markdown('<div class="stat-label">Clubs & Societies</div>', unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with stats_cols[3]:
-                    st.markdown('<div class="stat-card">', unsafe_allow_html=True)
-                    st.markdown('<div class="stat-value">24/7</div>', unsafe_allow_html=True)
-                    st.markdown('<div class="stat-label">Campus Support</div>', unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Facilities and Research
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown('<div class="card">', unsafe_allow_html=True)
-                    st.markdown('<h3 style="color: #1e3c72;">🏢 Facilities</h3>', unsafe_allow_html=True)
-                    for facility in uni_info['facilities']:
-                        st.write(f" {facility}")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with col2:
-                    st.markdown('<div class="card">', unsafe_allow_html=True)
-                    st.markdown('<h3 style="color: #1e3c72;">🔬 Research Focus</h3>', unsafe_allow_html=True)
-                    for area in uni_info['research']['focus_areas']:
-                        st.write(f"• {area}")
-                    st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Fetch course information if course is specified
-        if course:
-            with st.spinner("🔄 Fetching course information..."):
-                course_info = get_course_information(university, course)
-                
-                if course_info:
-                    st.markdown('<h2 class="section-header">📋 Course Details</h2>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="overview-text">{course_info["course_overview"]}</div>', unsafe_allow_html=True)
-                    
-                    # Tuition Costs
-                    st.markdown('<h2 class="section-header">💰 Tuition Costs</h2>', unsafe_allow_html=True)
-                    cost_col1, cost_col2 = st.columns(2)
-                    with cost_col1:
-                        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                        st.metric("Per Semester", course_info['tuition']['per_semester'])
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    with cost_col2:
-                        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                        st.metric("Full Course", course_info['tuition']['full_course'])
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    # Reviews
-                    rev_col1, rev_col2 = st.columns(2)
-                    
-                    with rev_col1:
-                        st.markdown('<h2 class="section-header">👨‍🏫 Faculty Reviews</h2>', unsafe_allow_html=True)
-                        for review in course_info['faculty_reviews']:
-                            st.info(f"💬 {review}")
-                    
-                    with rev_col2:
-                        st.markdown('<h2 class="section-header">👨‍🎓 Alumni Reviews</h2>', unsafe_allow_html=True)
-                        for review in course_info['alumni_reviews']:
-                            st.success(f"💬 {review}")
-                    
-                    # Career and Skills
-                    career_col1, career_col2 = st.columns(2)
-                    
-                    with career_col1:
-                        st.markdown('<h2 class="section-header">🎯 Career Prospects</h2>', unsafe_allow_html=True)
-                        for prospect in course_info['career_prospects']:
-                            st.markdown(f'<div class="bullet-point">• {prospect}</div>', unsafe_allow_html=True)
-                    
-                    with career_col2:
-                        st.markdown('<h2 class="section-header">🔧 Skills Taught</h2>', unsafe_allow_html=True)
-                        for skill in course_info['skills_taught']:
-                            st.markdown(f'<div class="bullet-point">• {skill}</div>', unsafe_allow_html=True)
-                    
-                    # Earnings
-                    st.markdown('<h2 class="section-header">💸 Average Earnings</h2>', unsafe_allow_html=True)
-                    display_earnings_chart(course_info['average_earnings'])
-                else:
-                    st.error("❌ Failed to fetch course information. Please try again.")
+            with col1:
+                university = st.text_input("🏛️ University Name", placeholder="e.g., University of Sydney",
+                                           key="university_input")
+            
+            with col2:
+                course = st.text_input("📚 Course Name", placeholder="e.g., Bachelor of Computer Science",
+                                       key="course_input")
+            
+            submit_button = st.form_submit_button("🔍 Get Information", use_container_width=True)
+        
+        # A clicked suggestion searches again without the form being submitted
+        search_requested = st.session_state.pop("search_requested", False)
+        if (submit_button or search_requested) and university:
+            prefetcher = get_default_prefetcher()
+            prefetcher.record(university, course or None, session_id())
+            if st.session_state.pop("profile_next_search", False):
+                snapshot = display_profiled_search(university, course)
+            else:
+                display_search_terms(university, course)
+                snapshot = display_profiles(university, course)
+            if snapshot is not None:
+                remember_search(snapshot)
+                if not course:
+                    # Generate the courses likely to be searched next while this page is read
+                    prefetcher.prefetch(university)
+        elif "history_choice" in st.session_state:
+            # Any other rerun shows the last search again from its snapshot
+            display_snapshot(st.session_state.search_history[st.session_state.history_choice])
+
+    with compare_tab:
+        display_comparison_form()
+
+    with explore_tab:
+        display_explore()
+
+    display_history()
+    display_cache_stats()
+
+def main():
+    st.set_page_config(page_title="Australian Universities Information", layout="wide")
+    
+    with render_stats.page():
+        display_page()
+    display_render_stats()
+    display_latency_stats()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Compare warm starts from a memory-mapped bundle and from a JSON snapshot.
+
+    python benchmarks/bench_bundle.py --profiles 5000 --workers 4
+
+Fills a cache with generated profiles and exports it both as a bundle and
+as one JSON file of every entry. Then starts the given number of worker
+processes per format, all at once, as replicas on one host would. Each
+worker opens its snapshot and looks up random profiles. Reported per
+worker: the time until the snapshot is ready, the time per lookup, and
+its memory from /proc/self/smaps_rollup, measured while all the workers
+are alive. RSS counts the bundle's shared pages in every worker that
+touched them; PSS splits them between the workers, and private memory
+is what each worker holds alone.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MEMORY_FIELDS = ("Rss", "Pss", "Private_Clean", "Private_Dirty")
+
+
+def memory():
+    """Memory of this process in kB, from /proc/self/smaps_rollup"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in MEMORY_FIELDS:
+                values[name] = int(rest.split()[0])
+    values["Private"] = values.pop("Private_Clean") + values.pop("Private_Dirty")
+    return values
+
+
+def worker(mode, path, keys_path, lookups):
+    """
+    Open the snapshot, look up profiles and print the timings; then print
+    its memory when asked, and wait to be released
+    """
+    with open(keys_path) as f:
+        keys = json.load(f)
+    from bundle import ProfileBundle
+
+    baseline = memory()
+    started = time.perf_counter()
+    if mode == "bundle":
+        snapshot = ProfileBundle(path)
+        get = snapshot.get
+    else:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        get = snapshot.get
+    ready = time.perf_counter() - started
+
+    rng = random.Random(os.getpid())
+    started = time.perf_counter()
+    for key in rng.choices(keys, k=lookups):
+        entry = get(key)
+        json.loads(entry[0]) if mode == "bundle" else json.loads(entry[1])
+    lookup = (time.perf_counter() - started) / lookups
+
+    print(json.dumps({"ready": ready, "lookup": lookup}), flush=True)
+    sys.stdin.readline()
+    print(json.dumps({"baseline": baseline, "memory": memory()}), flush=True)
+    sys.stdin.read()
+
+
+def fill(cache_path, count):
+    """Write count generated profiles into a fresh cache; returns their keys"""
+    from bench_records import make_profiles
+    from cache import ProfileCache
+    from profiles import profile_key
+
+    cache = ProfileCache(path=cache_path)
+    keys = []
+    for i, (kind, value) in enumerate(make_profiles(count)):
+        key = profile_key(kind, f"University {i}", "Bachelor of Science" if kind == "course" else None)
+        cache.set(key, kind, json.loads(value))
+        keys.append(key)
+    return keys
+
+
+def run_workers(mode, path, keys_path, workers, lookups):
+    processes = [subprocess.Popen([sys.executable, __file__, "--worker", mode, path, keys_path, str(lookups)],
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=ROOT)
+                 for _ in range(workers)]
+    results = [json.loads(process.stdout.readline()) for process in processes]
+    # Memory is measured once every worker is up, so shared pages are split between them all
+    for process, result in zip(processes, results):
+        process.stdin.write("measure\n")
+        process.stdin.flush()
+        result.update(json.loads(process.stdout.readline()))
+    for process in processes:
+        process.stdin.close()
+        process.wait()
+    return results
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        worker(sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5]))
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark warm starts from a bundle against a JSON snapshot")
+    parser.add_argument("--profiles", type=int, default=5000, help="profiles in the snapshot")
+    parser.add_argument("--workers", type=int, default=4, help="worker processes per format")
+    parser.add_argument("--lookups", type=int, default=2000, help="profile lookups per worker")
+    args = parser.parse_args()
+
+    import bundle
+    from cache import ProfileCache
+
+    directory = tempfile.mkdtemp()
+    cache_path = os.path.join(directory, "cache.sqlite3")
+    keys = fill(cache_path, args.profiles)
+    keys_path = os.path.join(directory, "keys.json")
+    with open(keys_path, "w") as f:
+        json.dump(keys, f)
+
+    bundle_path = os.path.join(directory, "profiles.bin")
+    started = time.perf_counter()
+    bundle.export(bundle_path, cache_path, os.path.join(directory, "missing.bin"))
+    exported = time.perf_counter() - started
+    json_path = os.path.join(directory, "profiles.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({key: [section, value, created_at, expires_at]
+                   for key, section, value, created_at, expires_at in ProfileCache(path=cache_path).rows()},
+                  f, ensure_ascii=False)
+
+    print(f"{args.profiles} profiles: bundle {os.path.getsize(bundle_path):,} bytes (exported in {exported:.2f}s), "
+          f"JSON {os.path.getsize(json_path):,} bytes; {args.workers} workers each")
+    print(f"{'format':<8} {'ready':>9} {'lookup':>9} {'RSS':>10} {'PSS':>10} {'private':>10}   (memory above the "
+          "interpreter's own)")
+    for mode, path in (("json", json_path), ("bundle", bundle_path)):
+        results = run_workers(mode, path, keys_path, args.workers, args.lookups)
+        grown = {name: statistics.mean(r["memory"][name] - r["baseline"][name] for r in results)
+                 for name in ("Rss", "Pss", "Private")}
+        print(f"{mode:<8} {statistics.median(r['ready'] for r in results) * 1000:7.1f}ms "
+              f"{statistics.median(r['lookup'] for r in results) * 1e6:7.1f}us "
+              f"{grown['Rss']:8,.0f}kB {grown['Pss']:8,.0f}kB {grown['Private']:8,.0f}kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compare tokens and latency per search of the two-call and fused modes.
+
+    python benchmarks/bench_fused.py --searches 8
+    python benchmarks/bench_fused.py --searches 3 --live
+
+Each search streams the university and course profiles concurrently, as the
+page does, into an empty cache, once with two requests and once with the
+fused single request. Reported per search: requests, prompt and completion
+tokens, the time to the first field and to the complete page. By default
+the requests go to the local fake API, which sizes completions by the fields
+asked for; with --live they go to GROQ_BASE_URL with the configured key and
+spend real quota.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroq, serve  # noqa: E402
+from load_test import PAIRS  # noqa: E402
+
+METRICS = ("llm_request_seconds", "llm_prompt_tokens", "llm_completion_tokens")
+
+
+def totals(metrics):
+    """Requests made and tokens used so far, from the metrics registry"""
+    summaries = {name: metrics.summary(name) for name in METRICS}
+    return {
+        "requests": summaries["llm_request_seconds"]["count"],
+        "prompt_tokens": summaries["llm_prompt_tokens"]["mean"] * summaries["llm_prompt_tokens"]["count"],
+        "completion_tokens": summaries["llm_completion_tokens"]["mean"] * summaries["llm_completion_tokens"]["count"],
+    }
+
+
+def search(pool, university, course):
+    """Stream both profiles of one search; returns (seconds to first field, seconds to the whole page)"""
+    import profiles
+
+    started = time.perf_counter()
+    first = []
+
+    def drain(fields):
+        for _ in fields:
+            if not first:
+                first.append(time.perf_counter() - started)
+
+    futures = [pool.submit(lambda: drain(profiles.stream_university_info(university, course))),
+               pool.submit(lambda: drain(profiles.stream_course_information(university, course)))]
+    for future in futures:
+        future.result()
+    return first[0], time.perf_counter() - started
+
+
+def run(mode, pairs, pool):
+    """Run the searches on an empty cache with fused mode on or off and return per-search averages"""
+    import cache
+    import profiles
+    from metrics import get_default_metrics
+
+    cache._default_cache = cache.ProfileCache(path=os.path.join(tempfile.mkdtemp(), "cache.sqlite3"))
+    profiles.FUSED = mode == "fused"
+    metrics = get_default_metrics()
+
+    before = totals(metrics)
+    firsts, pages = [], []
+    for university, course in pairs:
+        first, page = search(pool, university, course)
+        firsts.append(first)
+        pages.append(page)
+    after = totals(metrics)
+
+    result = {name: (after[name] - before[name]) / len(pairs) for name in after}
+    result["first_field"] = statistics.median(firsts)
+    result["page"] = statistics.median(pages)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fused against two-call profile generation")
+    parser.add_argument("--searches", type=int, default=8, help="distinct university/course pairs")
+    parser.add_argument("--live", action="store_true", help="use the configured API instead of the fake")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake API seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=500.0, help="fake API completion tokens per second")
+    args = parser.parse_args()
+
+    if not args.live:
+        server = serve(FakeGroq(latency=args.latency, token_rate=args.token_rate), port=0)
+        os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+        os.environ["GROQ_API_KEY"] = "fake"
+    os.environ["UNIADVISOR_SECTIONED"] = "0"
+
+    pairs = PAIRS[:args.searches]
+    pool = ThreadPoolExecutor(max_workers=2)
+    results = {mode: run(mode, pairs, pool) for mode in ("two-call", "fused")}
+
+    print(f"{len(pairs)} searches per mode, per-search averages ({'live API' if args.live else 'fake API'})")
+    print(f"{'mode':<10} {'requests':>9} {'prompt tok':>11} {'completion tok':>15} {'first field':>12} {'page':>8}")
+    for mode, result in results.items():
+        print(f"{mode:<10} {result['requests']:9.1f} {result['prompt_tokens']:11.0f} "
+              f"{result['completion_tokens']:15.0f} {result['first_field']:11.2f}s {result['page']:7.2f}s")
+    two, fused = results["two-call"], results["fused"]
+    saved = 1 - (fused["prompt_tokens"] + fused["completion_tokens"]) / (two["prompt_tokens"] + two["completion_tokens"])
+    print(f"\nfused mode uses {saved:.0%} fewer tokens per search")
+
+
+if __name__ == "__main__":
+    main()
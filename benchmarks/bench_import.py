@@ -0,0 +1,76 @@
+"""
+Measure how long a fresh process takes to import the app.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --module prewarm --runs 5 --max-ms 150
+
+Runs `python -X importtime -c "import streamlit; import app"` in fresh
+interpreters and reports the median time spent importing the app's own
+modules. Streamlit is imported first and counted separately, because the
+Streamlit server has already loaded it before the script runs. The slowest
+imports of the last run are listed. GROQ_API_KEY is removed from the
+environment so the import is also checked to work without it. With --max-ms
+the exit status is 1 if the median is over budget.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time: self [us] | cumulative | imported package", indented by depth
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_times(module):
+    """Import module after streamlit in a fresh interpreter and return its top-level (name, cumulative us) pairs"""
+    env = {key: value for key, value in os.environ.items() if key != "GROQ_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import streamlit; import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    times = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            times.append((match.group(4), len(match.group(3)) // 2, int(match.group(2))))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app import time")
+    parser.add_argument("--module", default="app", help="module to import (default app)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--max-ms", type=float, help="fail if the median is above this")
+    args = parser.parse_args()
+
+    totals, streamlit_totals = [], []
+    for _ in range(args.runs):
+        times = import_times(args.module)
+        top_level = {name: cumulative for name, depth, cumulative in times if depth == 0}
+        streamlit_totals.append(top_level.get("streamlit", 0) / 1000)
+        # Everything imported after streamlit up to and including the module itself
+        start = next(i for i, (name, depth, _) in enumerate(times) if name == "streamlit" and depth == 0)
+        totals.append(sum(cumulative for _, depth, cumulative in times[start + 1:] if depth == 0) / 1000)
+
+    print(f"streamlit          {statistics.median(streamlit_totals):8.1f} ms (already loaded by the server)")
+    print(f"import {args.module:<11} {statistics.median(totals):8.1f} ms median over {args.runs} runs")
+    print(f"\nslowest imports below {args.module}:")
+    below = [(cumulative, name) for name, depth, cumulative in times[start + 1:] if depth == 1]
+    for cumulative, name in sorted(below, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if args.max_ms is not None and statistics.median(totals) > args.max_ms:
+        print(f"\nover budget: {statistics.median(totals):.1f} ms > {args.max_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
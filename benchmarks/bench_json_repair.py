@@ -0,0 +1,71 @@
+"""
+Micro-benchmark of the JSON repairer against the previous regex clean-up.
+
+    python benchmarks/bench_json_repair.py --repeat 2000
+
+Times parsing a well-formed profile and a malformed one (code fence, trailing
+comma, raw newlines) both ways, plus the repairer fed in 16-character chunks
+as a stream arrives. The previous clean-up only fixed escaped underscores and
+trailing commas, so it fails on the malformed document.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_groq import COURSE_PROFILE, UNIVERSITY_PROFILE  # noqa: E402
+from json_repair import JSONRepairer, repair_json  # noqa: E402
+
+
+def clean_json_string(json_str):
+    """The regex clean-up the repairer replaced, kept here as the baseline"""
+    json_str = json_str.replace('\\_', '_')
+    json_str = re.sub(r',(\s*})', r'\1', json_str)
+    json_str = re.sub(r',(\s*])', r'\1', json_str)
+    json_str = json_str.replace('\r\n', '\n').replace('\r', '\n')
+    return json_str
+
+
+def parse_with_cleanup(text):
+    try:
+        return json.loads(clean_json_string(text))
+    except ValueError:
+        return None
+
+
+def parse_with_repair(text):
+    return json.loads(repair_json(text))
+
+
+def parse_streamed(text, step=16):
+    repairer = JSONRepairer()
+    parts = [repairer.feed(text[pos:pos + step]) for pos in range(0, len(text), step)]
+    parts.append(repairer.close())
+    return json.loads("".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON repair")
+    parser.add_argument("--repeat", type=int, default=2000, help="parses per measurement")
+    args = parser.parse_args()
+
+    profile = dict(UNIVERSITY_PROFILE, **COURSE_PROFILE)
+    valid = json.dumps(profile, indent=4)
+    malformed = "```json\n" + valid.replace(". ", ".\n").replace('"\n    }', '",\n    }') + "\n```"
+    documents = {"valid": valid, "malformed": malformed}
+
+    print(f"{'document':<10} {'parser':<18} {'us/parse':>9} {'MB/s':>7}  result")
+    for name, text in documents.items():
+        for label, parse in (("regex clean-up", parse_with_cleanup), ("repair", parse_with_repair),
+                             ("repair, streamed", parse_streamed)):
+            seconds = min(timeit.repeat(lambda: parse(text), number=args.repeat, repeat=3)) / args.repeat
+            result = "ok" if parse(text) is not None else "failed"
+            print(f"{name:<10} {label:<18} {seconds * 1e6:9.1f} {len(text) / seconds / 1e6:7.1f}  {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Compare the memory and rerun cost of profiles kept as dicts and as records.
+
+    python benchmarks/bench_records.py --profiles 200
+
+Builds course and university profiles shaped like the fake API's, with
+prose that differs per profile and short values (states, ranks, skills)
+drawn from small pools, as real profiles repeat them. Reported per profile:
+the memory held, measured with tracemalloc, when kept as the dicts decoded
+from the cache and as records, the time to build the records, and the time
+a rerun spends on each profile before rendering: memoization keys and
+salary parsing for dicts, nothing for records.
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import COURSE_PROFILE, UNIVERSITY_PROFILE  # noqa: E402
+from load_test import COURSES, UNIVERSITIES  # noqa: E402
+
+from records import to_record  # noqa: E402
+from render import _section_html, section_html  # noqa: E402
+from salary import parse_salary  # noqa: E402
+
+STATES = ["New South Wales", "Victoria", "Queensland", "Western Australia", "South Australia"]
+SKILLS = ["Python and Java programming", "Machine learning fundamentals", "Clinical practice", "Contract law",
+          "Financial accounting", "Cloud computing", "Statistics and data analysis", "Research methods"]
+
+
+def make_profiles(count, seed=1):
+    """count (kind, JSON) pairs, alternating courses and universities, as stored in the cache"""
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(count):
+        university = UNIVERSITIES[i % len(UNIVERSITIES)]
+        if i % 2:
+            profile = copy.deepcopy(UNIVERSITY_PROFILE)
+            profile["overview"] = f"{university} ({i}): {profile['overview']}"
+            profile["location"]["state"] = rng.choice(STATES)
+            profile["rankings"]["world_rank"] = f"{rng.randrange(1, 300)}th (QS World University Rankings 2024)"
+            profiles.append(("university", json.dumps(profile)))
+        else:
+            profile = copy.deepcopy(COURSE_PROFILE)
+            profile["course_overview"] = f"{COURSES[i % len(COURSES)]} at {university} ({i}). " \
+                                         f"{profile['course_overview']}"
+            profile["skills_taught"] = rng.sample(SKILLS, 5)
+            low = rng.randrange(50, 90) * 1000
+            profile["average_earnings"]["starting"] = f"${low:,} - ${low + 15000:,} AUD"
+            profiles.append(("course", json.dumps(profile)))
+    return profiles
+
+
+def held(build):
+    """Bytes still allocated by build() once it returns, and its result"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def rerun_dicts(dicts):
+    """What a rerun spent per dict profile before rendering: the section cache key and the salary chart"""
+    for kind, profile in dicts:
+        for value in profile.values():
+            json.dumps(value, sort_keys=True)
+        if kind == "course":
+            earnings = profile["average_earnings"]
+            parse_salary(earnings["starting"]), parse_salary(earnings["mid_career"])
+
+
+def rerun_records(records):
+    for kind, record in records:
+        for field, value in zip(record._fields, record):
+            section_html(kind, field, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark profile records against dicts")
+    parser.add_argument("--profiles", type=int, default=200, help="profiles to keep")
+    parser.add_argument("--reruns", type=int, default=20, help="reruns to time")
+    args = parser.parse_args()
+
+    stored = make_profiles(args.profiles)
+    dict_bytes, dicts = held(lambda: [(kind, json.loads(value)) for kind, value in stored])
+    started = time.perf_counter()
+    record_bytes, records = held(lambda: [(kind, to_record(kind, json.loads(value))) for kind, value in stored])
+    build = (time.perf_counter() - started) / len(stored)
+
+    # Warm the section cache, as the first render of each profile does
+    _section_html.cache_clear()
+    rerun_records(records)
+    timings = {}
+    for name, rerun, profiles in (("dicts", rerun_dicts, dicts), ("records", rerun_records, records)):
+        started = time.perf_counter()
+        for _ in range(args.reruns):
+            rerun(profiles)
+        timings[name] = (time.perf_counter() - started) / (args.reruns * len(profiles))
+
+    print(f"{len(stored)} profiles, per profile")
+    print(f"{'':<8} {'memory':>9} {'rerun':>10}")
+    print(f"{'dicts':<8} {dict_bytes / len(stored):8,.0f}B {timings['dicts'] * 1e6:8.1f}us")
+    print(f"{'records':<8} {record_bytes / len(stored):8,.0f}B {timings['records'] * 1e6:8.1f}us")
+    print(f"\nrecords hold {1 - record_bytes / dict_bytes:.0%} less memory and take {build * 1e6:.0f}us "
+          "each to build, once")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure what a page costs to render: deltas sent to the browser, their
+size and the script run time.
+
+    python benchmarks/bench_render.py --runs 20
+
+Drives app.py with Streamlit's AppTest against an in-process fake API and
+counts the delta messages of a blank page, a search answered by the API and
+the same search answered from the cache. Deltas are counted outside the app,
+so the script can be run on older revisions to compare before and after.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroq, serve  # noqa: E402
+from streamlit.runtime.scriptrunner.script_run_context import ScriptRunContext  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+counted = {"deltas": 0, "bytes": 0}
+
+
+def count_deltas():
+    """Count every delta any script run enqueues"""
+    enqueue = ScriptRunContext.enqueue
+
+    def counting_enqueue(self, msg):
+        if msg.WhichOneof("type") == "delta":
+            counted["deltas"] += 1
+            counted["bytes"] += msg.ByteSize()
+        return enqueue(self, msg)
+
+    ScriptRunContext.enqueue = counting_enqueue
+
+
+def measure(run):
+    """Run one script run and return (deltas, bytes, seconds)"""
+    counted["deltas"] = counted["bytes"] = 0
+    started = time.perf_counter()
+    at = run()
+    elapsed = time.perf_counter() - started
+    if at.exception:
+        raise SystemExit(f"app raised: {at.exception[0].message}")
+    return counted["deltas"], counted["bytes"], elapsed
+
+
+def report(label, samples):
+    deltas, size, _ = samples[-1]
+    times = sorted(seconds for _, _, seconds in samples)
+    print(f"{label:<24} {deltas:6d} deltas {size:10,d} bytes "
+          f"{statistics.median(times) * 1000:9.1f} ms median over {len(samples)} runs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page rendering")
+    parser.add_argument("--runs", type=int, default=10, help="cached searches to time")
+    parser.add_argument("--university", default="University of Sydney")
+    parser.add_argument("--course", default="Bachelor of Computer Science")
+    args = parser.parse_args()
+
+    server = serve(FakeGroq(latency=0.05, token_rate=100000), port=0)
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["UNIADVISOR_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    count_deltas()
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    report("blank page", [measure(at.run)])
+
+    at.text_input[0].input(args.university)
+    at.text_input[1].input(args.course)
+    report("search, from the API", [measure(at.button[0].click().run)])
+    report("search, from the cache", [measure(at.button[0].click().run) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
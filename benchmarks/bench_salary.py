@@ -0,0 +1,114 @@
+"""
+Benchmark the salary engine on tens of thousands of descriptions.
+
+    python benchmarks/bench_salary.py --count 50000
+    python benchmarks/bench_salary.py --cache-path uniadvisor_cache.sqlite3
+
+Generates salary descriptions in the formats models write and times the
+previous process_salary rules, the scalar parse_salary loop and the batch
+parse_salaries call, checking that the scalar and batch results agree.
+With --cache-path the descriptions are instead read from every cached
+course profile.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from salary import parse_salaries, parse_salary  # noqa: E402
+
+TEMPLATES = [
+    "${low:,} - ${high:,} AUD",
+    "${low:,} - ${high:,} AUD after {years} years",
+    "${low_k}-{high_k}k",
+    "${low_k}k to ${high_k}k per annum",
+    "Between ${low:,} and ${high:,} with industry comparison",
+    "${hourly} per hour",
+    "${weekly:,} per week",
+    "{low}",
+    "Approximately {low_k}K AUD p.a., top 10% earn over ${high:,}",
+    "Graduate roles start at ${low:,}; after {years}-{years2} years ${high:,}",
+    "detailed starting salary range in AUD with industry comparison",
+]
+
+
+def process_salary(salary):
+    """The previous averaging rules, kept here as the baseline"""
+    if isinstance(salary, (int, float)):
+        return float(salary)
+    cleaned = salary.replace('$', '').replace('AUD', '').replace(',', '').strip()
+    numbers = re.findall(r'\d+', cleaned)
+    if numbers:
+        numbers = [float(num) for num in numbers]
+        return sum(numbers) / len(numbers)
+    return 0
+
+
+def generate(count, seed):
+    rng = random.Random(seed)
+    descriptions = []
+    for _ in range(count):
+        low = rng.randrange(45, 120) * 1000
+        high = low + rng.randrange(5, 60) * 1000
+        years = rng.randrange(2, 8)
+        descriptions.append(rng.choice(TEMPLATES).format(
+            low=low, high=high, low_k=low // 1000, high_k=high // 1000, years=years, years2=years + 3,
+            hourly=rng.randrange(28, 70), weekly=rng.randrange(900, 2500),
+        ))
+    return descriptions
+
+
+def read_cached(path):
+    """Starting and mid-career salary descriptions of every cached course profile"""
+    conn = sqlite3.connect(path)
+    descriptions = []
+    for (value,) in conn.execute("SELECT value FROM profiles WHERE section LIKE 'course%'"):
+        earnings = json.loads(value).get("average_earnings") or {}
+        descriptions.extend(str(text) for text in earnings.values())
+    return descriptions
+
+
+def timed(label, count, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {count / elapsed:12,.0f} per second")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark salary normalization")
+    parser.add_argument("--count", type=int, default=50000, help="descriptions to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-path", help="read descriptions from this profile cache instead")
+    args = parser.parse_args()
+
+    descriptions = read_cached(args.cache_path) if args.cache_path else generate(args.count, args.seed)
+    series = pd.Series(descriptions)
+    print(f"{len(descriptions)} salary descriptions, {series.nunique()} distinct")
+
+    timed("process_salary (previous)", len(descriptions), lambda: [process_salary(d) for d in descriptions])
+    scalar = timed("parse_salary loop", len(descriptions), lambda: [parse_salary(d) for d in descriptions])
+    batch = timed("parse_salaries batch", len(descriptions), lambda: parse_salaries(series))
+
+    mismatches = 0
+    for single, median in zip(scalar, batch["median"]):
+        if (single is None) != math.isnan(median) or (single is not None and abs(single.median - median) > 1e-6):
+            mismatches += 1
+    parsed = batch["median"].notna().sum()
+    print(f"{parsed} with an amount, {len(descriptions) - parsed} without; "
+          f"{mismatches} scalar/batch mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Local stand-in for the Groq OpenAI-compatible chat completions API.
+
+Serves canned university and course profiles with configurable latency and
+failure behaviour, so the client wrapper and the app can be exercised
+without spending real quota:
+
+    python benchmarks/fake_groq.py --port 8765 --latency 1.5 --error-rate 0.1
+    GROQ_BASE_URL=http://127.0.0.1:8765/v1 GROQ_API_KEY=fake streamlit run app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UNIVERSITY_PROFILE = {
+    "overview": "A long-established public research university with a strong international reputation.",
+    "location": {
+        "city": "Sydney",
+        "state": "New South Wales",
+        "campus_description": "A sandstone main campus close to the city centre with modern research precincts.",
+    },
+    "rankings": {
+        "world_rank": "19th (QS World University Rankings 2024)",
+        "national_rank": "2nd (QS 2024)",
+        "subject_strengths": ["Law - 11th (QS)", "Medicine - 18th (QS)", "Education - 20th (QS)", "Nursing - 9th (QS)"],
+    },
+    "facilities": ["Central library with 24/7 study spaces", "Sports and aquatic centre", "Nanoscience hub",
+                   "Teaching hospital network", "Student innovation hub"],
+    "research": {
+        "focus_areas": ["Machine learning and artificial intelligence", "Infectious diseases",
+                        "Climate and sustainability", "Quantum technology"],
+        "achievements": ["First Australian cochlear implant trial (1978)", "Quantum computing milestone (2019)",
+                         "Global health partnership (2021)"],
+    },
+    "student_life": {
+        "total_students": "73,000 (48,000 undergraduate, 25,000 postgraduate)",
+        "international_students": "40% (China, India, Indonesia)",
+        "clubs_societies": "Over 200 clubs and societies",
+        "accommodation": "Residential colleges, university apartments and homestay options",
+    },
+}
+
+COURSE_PROFILE = {
+    "course_overview": "A three-year degree covering software development, algorithms and data science.",
+    "tuition": {"per_semester": "$25,500 AUD", "full_course": "$153,000 AUD plus materials"},
+    "faculty_reviews": ["Lecturers are approachable", "Strong tutorial support", "Research-active staff",
+                        "Good industry guest lectures"],
+    "alumni_reviews": ["Landed a graduate role within three months", "Learned practical machine learning skills",
+                       "Internship led to a full-time offer", "Exchange semester in Europe"],
+    "career_prospects": ["Software engineer within 6 months", "Data scientist with high demand",
+                         "Cloud engineer at major tech companies", "Technical lead after 5 years",
+                         "Roles with global firms"],
+    "skills_taught": ["Python and Java programming", "Machine learning fundamentals", "Cloud certification pathway",
+                      "Capstone industry project", "Cyber security", "Emerging AI trends"],
+    "average_earnings": {"starting": "$65,000 - $80,000 AUD", "mid_career": "$120,000 - $150,000 AUD after 10 years"},
+}
+
+
+class FakeGroq:
+    """Behaviour settings and request counters shared by all handler threads"""
+
+    def __init__(self, latency=1.0, token_rate=500.0, error_rate=0.0, rate_limit_rate=0.0,
+                 malformed_rate=0.0, requests_per_minute=1000, seed=None):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.requests_per_minute = requests_per_minute
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.counters = {"requests": 0, "errors": 0, "rate_limited": 0, "malformed": 0,
+                         "prompt_tokens": 0, "completion_tokens": 0}
+
+    def admit(self):
+        """Record a request and return how many remain in the current one-minute window"""
+        with self.lock:
+            now = time.monotonic()
+            self.recent.append(now)
+            while self.recent and self.recent[0] <= now - 60:
+                self.recent.popleft()
+            self.counters["requests"] += 1
+            return max(0, self.requests_per_minute - len(self.recent))
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            # Counters, so load tests can report upstream calls per page view
+            with fake.lock:
+                self._send_json(200, dict(fake.counters))
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            self.remaining = fake.admit()
+
+            if self.remaining == 0 or fake.roll(fake.rate_limit_rate):
+                fake.count("rate_limited")
+                self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                                {"retry-after": "1"})
+                return
+            if fake.roll(fake.error_rate):
+                fake.count("errors")
+                self._send_json(503, {"error": {"message": "Service unavailable", "type": "server_error"}})
+                return
+
+            content = self._profile_for(body)
+            prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+            completion_tokens = max(1, len(content) // 4)
+            fake.count("prompt_tokens", prompt_tokens)
+            fake.count("completion_tokens", completion_tokens)
+
+            time.sleep(fake.latency)
+            if body.get("stream"):
+                self._stream(body, content, prompt_tokens, completion_tokens)
+            else:
+                generation_time = completion_tokens / fake.token_rate if fake.token_rate else 0
+                time.sleep(generation_time)
+                self._send_json(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                })
+
+        def _profile_for(self, body):
+            prompt = " ".join(m.get("content") or "" for m in body.get("messages", []))
+            profile = COURSE_PROFILE if "course information bot" in prompt else UNIVERSITY_PROFILE
+            # Answer only the fields the prompt asks for, so per-field and fused requests work too
+            requested = {key: value for key, value in {**UNIVERSITY_PROFILE, **COURSE_PROFILE}.items()
+                         if f'"{key}":' in prompt}
+            content = json.dumps(requested or profile, indent=2)
+            if fake.roll(fake.malformed_rate):
+                fake.count("malformed")
+                # Typical model defects: a code fence, a trailing comma and a truncated tail
+                content = "```json\n" + content.replace('"\n  }', '",\n  }', 1)[: int(len(content) * 0.9)]
+            return content
+
+        def _stream(self, body, content, prompt_tokens, completion_tokens):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self._rate_limit_headers()
+            self.end_headers()
+            step = 16
+            delay = step / 4 / fake.token_rate if fake.token_rate else 0
+            for start in range(0, len(content), step):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": content[start:start + step]},
+                                 "finish_reason": None}],
+                }
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                time.sleep(delay)
+            # Groq reports the usage of a stream in an extension field of the last chunk
+            final = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                     "total_tokens": prompt_tokens + completion_tokens}},
+            }
+            self._write_chunk(f"data: {json.dumps(final)}\n\n".encode())
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _rate_limit_headers(self):
+            if not hasattr(self, "remaining"):
+                return
+            self.send_header("x-ratelimit-limit-requests", str(fake.requests_per_minute))
+            self.send_header("x-ratelimit-remaining-requests", str(self.remaining))
+            self.send_header("x-ratelimit-reset-requests", "60s")
+
+        def _send_json(self, status, payload, headers=None):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self._rate_limit_headers()
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def serve(fake, host="127.0.0.1", port=8765):
+    """Start the fake server on a background thread and return it"""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Groq chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=500.0, help="completion tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction answered with 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction returning malformed JSON")
+    parser.add_argument("--requests-per-minute", type=int, default=1000, help="advertised request rate limit")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    fake = FakeGroq(latency=args.latency, token_rate=args.token_rate, error_rate=args.error_rate,
+                    rate_limit_rate=args.rate_limit_rate, malformed_rate=args.malformed_rate,
+                    requests_per_minute=args.requests_per_minute, seed=args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake))
+    print(f"Fake Groq API listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
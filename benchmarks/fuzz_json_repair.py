@@ -0,0 +1,126 @@
+"""
+Fuzz the JSON repairer with the corpus of malformed model responses and
+with random damage applied to well-formed profiles.
+
+    python benchmarks/fuzz_json_repair.py --iterations 5000 --seed 1
+
+Checks that every corpus entry repairs to its expected value, that valid
+documents pass through unchanged, that feeding the text in chunks gives the
+same result as feeding it whole, and that damaged documents always repair
+to an object whose complete fields are left intact.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_groq import COURSE_PROFILE, UNIVERSITY_PROFILE  # noqa: E402
+from json_repair import JSONRepairer, repair_json  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "malformed_responses.jsonl")
+
+PREFIXES = ["", "```json\n", "```\n", "Here is the JSON you asked for:\n", "Sure!\n\n```json\n"]
+SUFFIXES = ["", "\n```", "\n```\nLet me know if you need more detail.", "\n\nNote: figures are estimates."]
+
+
+def repair_in_chunks(text, rng):
+    repairer = JSONRepairer()
+    parts = []
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, 64)
+        parts.append(repairer.feed(text[pos:pos + size]))
+        pos += size
+    parts.append(repairer.close())
+    return "".join(parts)
+
+
+def damage(text, rng):
+    """Apply a random mix of the defects models produce to a JSON document"""
+    if rng.random() < 0.3:
+        text = text.replace('"\n', '",\n', 1)
+    if rng.random() < 0.3:
+        text = text.replace("]", ",]", 1)
+    if rng.random() < 0.3:
+        text = text.replace("_", "\\_")
+    if rng.random() < 0.3:
+        # Raw newlines inside strings
+        text = text.replace(". ", ".\n", 3)
+    if rng.random() < 0.5:
+        text = text[: rng.randint(1, len(text))]
+    return rng.choice(PREFIXES) + text + rng.choice(SUFFIXES)
+
+
+def normalized(value):
+    # Damage turns some spaces into raw newlines, which repair keeps as newlines
+    return json.dumps(value).replace("\\n", " ")
+
+
+def check_corpus():
+    failures = 0
+    with open(CORPUS, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    for entry in entries:
+        try:
+            result = json.loads(repair_json(entry["raw"]))
+        except ValueError as e:
+            result = f"unparseable: {e}"
+        if result != entry["expected"]:
+            failures += 1
+            print(f"FAIL corpus [{entry['defect']}]: {result!r}")
+    print(f"corpus: {len(entries) - failures}/{len(entries)} repaired as expected")
+    return failures
+
+
+def check_random(iterations, rng):
+    failures = 0
+    profiles = [UNIVERSITY_PROFILE, COURSE_PROFILE]
+    for i in range(iterations):
+        profile = rng.choice(profiles)
+        valid = json.dumps(profile, indent=rng.choice([None, 2, 4]))
+
+        if repair_json(valid) != valid or repair_in_chunks(valid, rng) != valid:
+            failures += 1
+            print(f"FAIL #{i}: a valid document was changed")
+            continue
+
+        damaged = damage(valid, rng)
+        whole = repair_json(damaged)
+        if repair_in_chunks(damaged, rng) != whole:
+            failures += 1
+            print(f"FAIL #{i}: chunked repair differs from whole repair for {damaged!r}")
+            continue
+        try:
+            result = json.loads(whole)
+        except ValueError as e:
+            failures += 1
+            print(f"FAIL #{i}: {e} in {whole!r}")
+            continue
+
+        # Damage only adds defects or cuts the tail, so every field but the last
+        # one recovered must be as generated
+        fields = list(result)
+        for field in fields[:-1]:
+            if normalized(result[field]) != normalized(profile[field]):
+                failures += 1
+                print(f"FAIL #{i}: field {field!r} altered: {result[field]!r}")
+                break
+    print(f"random: {iterations - failures}/{iterations} damaged documents repaired")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz the JSON repairer")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = check_corpus() + check_random(args.iterations, random.Random(args.seed))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
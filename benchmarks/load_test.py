@@ -0,0 +1,290 @@
+"""
+Load test the app against the local fake Groq API.
+
+    python benchmarks/load_test.py api --users 50 --views 4
+    python benchmarks/load_test.py page --users 20 --views 3 --latency 1.5 --malformed-rate 0.1
+
+"api" mode calls get_university_info and get_course_information from
+simulated users in this process, concurrently on a shared pool the way the
+search page does. "page" mode starts `streamlit run app.py` and drives real
+sessions over Streamlit's websocket protocol: every session loads the page,
+then fills in and submits the search form once per page view, and a page
+view lasts until its script run finishes.
+
+Each run starts the fake API (benchmarks/fake_groq.py) with the given
+latency, token rate, error rate and malformed-JSON rate, and uses a fresh
+profile cache. Searches are drawn from a fixed list of university/course
+pairs with a skewed popularity under a fixed seed, so runs are comparable.
+The run reports p50/p95/p99 page view latency, throughput, errors and
+upstream calls per page view, and appends the result, tagged with the
+current git commit, to --results so runs can be compared across commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroq, serve  # noqa: E402
+
+UNIVERSITIES = [
+    "The University of Sydney", "University of New South Wales", "The University of Melbourne", "Monash University",
+    "The University of Queensland", "RMIT University", "University of Technology Sydney", "Deakin University",
+    "Macquarie University", "Griffith University", "Curtin University", "The University of Adelaide",
+]
+COURSES = [
+    "Bachelor of Computer Science", "Bachelor of Information Technology", "Bachelor of Nursing",
+    "Bachelor of Commerce", "Bachelor of Laws", "Bachelor of Engineering (Honours)", "Master of Data Science",
+    "Bachelor of Psychology",
+]
+# Every pair, most popular first
+PAIRS = [(university, course) for course in COURSES for university in UNIVERSITIES]
+
+
+def choose_queries(rng, count, skew):
+    """Draw count searches, the pair at popularity rank r with weight 1 / r ** skew"""
+    weights = [1.0 / (rank ** skew) for rank in range(1, len(PAIRS) + 1)]
+    return rng.choices(PAIRS, weights=weights, k=count)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def git_commit():
+    def git(*args):
+        result = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else ""
+    commit = git("rev-parse", "--short", "HEAD")
+    return commit + ("-dirty" if commit and git("status", "--porcelain", "--untracked-files=no") else "")
+
+
+def run_api(args, queries_for):
+    """Simulated users calling the profile functions; returns (latencies, errors, seconds)"""
+    from profiles import get_course_information, get_university_info, ProfileFetchError
+
+    pool = ThreadPoolExecutor(max_workers=int(os.getenv("UNIADVISOR_FETCH_WORKERS", "8")))
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def user(index):
+        rng = random.Random(args.seed + index)
+        for university, course in queries_for(index):
+            started = time.perf_counter()
+            futures = [pool.submit(get_university_info, university, course),
+                       pool.submit(get_course_information, university, course)]
+            wait(futures)
+            failed = [f.exception() for f in futures if f.exception() is not None]
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                errors.extend(failed)
+            for error in failed:
+                if not isinstance(error, ProfileFetchError):
+                    raise error
+            time.sleep(rng.expovariate(1 / args.think) if args.think else 0)
+
+    started = time.perf_counter()
+    users = [threading.Thread(target=user, args=(i,)) for i in range(args.users)]
+    for thread in users:
+        thread.start()
+    for thread in users:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+class PageSession:
+    """One browser session of the Streamlit app, speaking its websocket protocol"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.widget_ids = {}
+
+    async def run(self, widget_states=()):
+        """Request a script run and wait for it to finish; returns the error messages it showed"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.widget_states.widgets.extend(widget_states)
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+
+        errors = []
+        while True:
+            data = await self.connection.read_message()
+            if data is None:
+                raise ConnectionError("the app closed the session")
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self._inspect(forward.delta.new_element, errors)
+            elif kind == "script_finished":
+                if forward.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    return errors
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("app.py failed to compile")
+
+    def _inspect(self, element, errors):
+        kind = element.WhichOneof("type")
+        if kind == "text_input" and element.text_input.form_id == "search_form":
+            self.widget_ids["course" if "Course" in element.text_input.label else "university"] = \
+                element.text_input.id
+        elif kind == "button" and element.button.is_form_submitter and element.button.form_id == "search_form":
+            self.widget_ids["submit"] = element.button.id
+        elif kind == "exception":
+            errors.append(element.exception.message)
+        elif kind == "alert" and element.alert.format == element.alert.ERROR:
+            errors.append(element.alert.body)
+
+    async def search(self, university, course):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        states = [
+            WidgetState(id=self.widget_ids["university"], string_value=university),
+            WidgetState(id=self.widget_ids["course"], string_value=course),
+            WidgetState(id=self.widget_ids["submit"], trigger_value=True),
+        ]
+        return await self.run(states)
+
+
+def start_app(port, env):
+    """Start `streamlit run app.py` and wait until it answers its health check"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "app.py"),
+         "--server.headless", "true", "--server.port", str(port), "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit("streamlit did not start within 60 seconds")
+
+
+def run_page(args, queries_for):
+    """Simulated browser sessions against a real Streamlit server; returns (latencies, errors, seconds)"""
+    from tornado.websocket import websocket_connect
+
+    process = start_app(args.app_port, dict(os.environ))
+    latencies, errors = [], []
+
+    async def user(index):
+        rng = random.Random(args.seed + index)
+        connection = await websocket_connect(f"ws://127.0.0.1:{args.app_port}/_stcore/stream",
+                                             max_message_size=64 * 1024 * 1024)
+        session = PageSession(connection)
+        try:
+            await session.run()
+            for university, course in queries_for(index):
+                started = time.perf_counter()
+                shown = await session.search(university, course)
+                latencies.append(time.perf_counter() - started)
+                errors.extend(shown)
+                await asyncio.sleep(rng.expovariate(1 / args.think) if args.think else 0)
+        finally:
+            connection.close()
+
+    async def users():
+        await asyncio.gather(*(user(i) for i in range(args.users)))
+
+    try:
+        started = time.perf_counter()
+        asyncio.run(users())
+        return latencies, errors, time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def load_history(path, result):
+    """Earlier results of the same mode and parameters, oldest first"""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        history = [json.loads(line) for line in f if line.strip()]
+    return [past for past in history if past["mode"] == result["mode"] and past["params"] == result["params"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the app against a fake Groq API")
+    parser.add_argument("mode", choices=["api", "page"])
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--views", type=int, default=3, help="page views per user")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds between a user's page views")
+    parser.add_argument("--skew", type=float, default=1.1, help="popularity skew of the searched pairs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=1.0, help="fake API seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=500.0, help="fake API completion tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--app-port", type=int, default=8599, help="port of the Streamlit server in page mode")
+    parser.add_argument("--results", default=os.path.join(ROOT, "benchmarks", "load_results.jsonl"))
+    args = parser.parse_args()
+
+    fake = FakeGroq(latency=args.latency, token_rate=args.token_rate, error_rate=args.error_rate,
+                    malformed_rate=args.malformed_rate, seed=args.seed)
+    server = serve(fake, port=0)
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ["GROQ_API_KEY"] = "fake"
+    os.environ["UNIADVISOR_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+
+    def queries_for(index):
+        return choose_queries(random.Random(f"{args.seed}-{index}"), args.views, args.skew)
+
+    run = run_api if args.mode == "api" else run_page
+    latencies, errors, seconds = run(args, queries_for)
+
+    views = len(latencies)
+    with fake.lock:
+        upstream = dict(fake.counters)
+    result = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": args.mode,
+        "params": {name: getattr(args, name) for name in ("users", "views", "think", "skew", "seed", "latency",
+                                                          "token_rate", "error_rate", "malformed_rate")},
+        "page_views": views,
+        "errors": len(errors),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "throughput": views / seconds,
+        "upstream_requests": upstream["requests"],
+        "upstream_per_view": upstream["requests"] / views,
+        "completion_tokens": upstream["completion_tokens"],
+    }
+
+    history = load_history(args.results, result)
+    with open(args.results, "a") as f:
+        f.write(json.dumps(result) + "\n")
+
+    print(f"{views} page views by {args.users} users in {seconds:.1f}s, {len(errors)} errors")
+    print(f"{'commit':<14} {'p50':>8} {'p95':>8} {'p99':>8} {'views/s':>8} {'upstream/view':>14}")
+    for row in history[-5:] + [result]:
+        print(f"{row['commit']:<14} {row['p50']:8.2f} {row['p95']:8.2f} {row['p99']:8.2f} "
+              f"{row['throughput']:8.2f} {row['upstream_per_view']:14.2f}")
+    if errors:
+        print(f"first error: {str(errors[0])[:200]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Read-only snapshot bundles of the profile cache, for warm starts.
+
+A new replica starts with an empty cache, so its first hour of traffic
+goes to the API. A bundle packs every cached profile and the search index
+into one file that ships with the deployment:
+
+    python bundle.py export uniadvisor_bundle.bin
+    python bundle.py verify uniadvisor_bundle.bin
+
+The cache memory-maps the bundle at UNIADVISOR_BUNDLE_PATH on startup and
+reads profiles straight from the mapping. Nothing is loaded up front, and
+every worker process on a host shares the same page-cache pages. Opening a
+bundle only reads its header and checks that its sections fit the file;
+the checksum, which reads every page, is checked by "verify". Profiles
+generated later go to the SQLite tier, which overlays the bundle and takes
+precedence over it. Bundled profiles expire on their original schedule and
+are refreshed like any other.
+
+Layout, little-endian:
+
+    header   magic, format version, entry count, table and index offsets,
+             export and newest-entry times, BLAKE2b checksum of the rest
+    data     per entry: key, section and JSON value, as UTF-8
+    index    the search index's saved documents as JSON, or nothing
+    table    fixed-size entries sorted by key hash: hash, data offset,
+             key/section/value lengths, created_at, expires_at
+
+Lookups binary-search the table for the key's hash and compare the stored
+key, so a lookup reads a few table entries and copies out one value.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"UNIADVB\x00"
+# Bump whenever the layout changes; bundles of other versions are ignored
+BUNDLE_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQQQdd32s")
+ENTRY = struct.Struct("<QQIHIdd")
+HASH = struct.Struct("<Q")
+
+logger = logging.getLogger(__name__)
+
+
+class BundleError(Exception):
+    """Raised for a file that is not a readable bundle of this version"""
+
+
+def key_hash(encoded):
+    return HASH.unpack(hashlib.blake2b(encoded, digest_size=8).digest())[0]
+
+
+class ProfileBundle:
+    """
+    A bundle file mapped into memory. Lookups are safe from any thread;
+    the mapping is read-only.
+    """
+
+    def __init__(self, path, verify=False):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BundleError(f"{path} is empty")
+        try:
+            self._read_header(verify)
+        except BundleError:
+            self._map.close()
+            raise
+
+    def _read_header(self, verify):
+        # Checking the checksum reads every page of the file, so it is left to verify and export
+        if len(self._map) < HEADER.size:
+            raise BundleError(f"{self.path} is too short to be a bundle")
+        (magic, version, _, self.count, self._table_offset, self._index_offset, self._index_length,
+         self.exported_at, self.newest, checksum) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise BundleError(f"{self.path} is not a profile bundle")
+        if version != BUNDLE_VERSION:
+            raise BundleError(f"{self.path} has format version {version}, expected {BUNDLE_VERSION}")
+        if (self._index_offset + self._index_length > self._table_offset
+                or self._table_offset + self.count * ENTRY.size != len(self._map)):
+            raise BundleError(f"{self.path} is truncated or corrupt: its sections do not fit the file")
+        if verify and self.checksum() != checksum:
+            raise BundleError(f"{self.path} is corrupt: checksum mismatch")
+
+    def checksum(self):
+        """BLAKE2b digest of everything after the header"""
+        with memoryview(self._map) as view:
+            return hashlib.blake2b(view[HEADER.size:], digest_size=32).digest()
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(self._map, self._table_offset + i * ENTRY.size)
+
+    def _find(self, key):
+        # Leftmost table entry with the key's hash, then the one whose stored key matches
+        encoded = key.encode("utf-8")
+        target = key_hash(encoded)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if HASH.unpack_from(self._map, self._table_offset + middle * ENTRY.size)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        for i in range(low, self.count):
+            entry = self._entry(i)
+            if entry[0] != target:
+                break
+            if self._map[entry[1]:entry[1] + entry[2]] == encoded:
+                return entry
+        return None
+
+    def get(self, key):
+        """
+        Return (encoded value, created_at, expires_at) for key, or None if it
+        is not bundled. The value is copied out of the mapping as bytes.
+        """
+        entry = self._find(key)
+        if entry is None:
+            return None
+        _, offset, key_length, section_length, value_length, created_at, expires_at = entry
+        start = offset + key_length + section_length
+        return self._map[start:start + value_length], created_at, expires_at
+
+    def expiry(self, key):
+        """Return (created_at, expires_at) of the entry for key, or None"""
+        entry = self._find(key)
+        return entry[5:] if entry is not None else None
+
+    def rows(self, since=None):
+        """
+        Yield (key, section, encoded value, created_at, expires_at) for every
+        entry, or only those created after since, in table order. Values are
+        copied out of the mapping as bytes.
+        """
+        if since is not None and since >= self.newest:
+            return
+        for i in range(self.count):
+            _, offset, key_length, section_length, value_length, created_at, expires_at = self._entry(i)
+            if since is not None and created_at <= since:
+                continue
+            section_start = offset + key_length
+            value_start = section_start + section_length
+            yield (self._map[offset:section_start].decode("utf-8"),
+                   self._map[section_start:value_start].decode("utf-8"),
+                   self._map[value_start:value_start + value_length], created_at, expires_at)
+
+    def index(self):
+        """The search index's saved documents, or None if the bundle has none"""
+        if not self._index_length:
+            return None
+        return json.loads(self._map[self._index_offset:self._index_offset + self._index_length])
+
+    def stats(self):
+        return {"entries": self.count, "bytes": len(self._map), "exported_at": self.exported_at}
+
+    def close(self):
+        self._map.close()
+
+
+def open_bundle(path):
+    """Map the bundle at path, or return None if there is none or it cannot be used"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return ProfileBundle(path)
+    except (OSError, BundleError) as e:
+        logger.warning("Ignoring profile bundle %s: %s", path, e)
+        return None
+
+
+def write_bundle(path, rows, index=None):
+    """
+    Write rows of (key, section, encoded value, created_at, expires_at) and
+    the saved search index, if given, to a bundle at path, atomically.
+    Returns the number of entries written.
+    """
+    hasher = hashlib.blake2b(digest_size=32)
+    table = []
+    newest = 0.0
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        def write(data):
+            f.write(data)
+            hasher.update(data)
+
+        f.write(b"\0" * HEADER.size)
+        offset = HEADER.size
+        for key, section, value, created_at, expires_at in rows:
+            key, section = key.encode("utf-8"), section.encode("utf-8")
+            value = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+            table.append((key_hash(key), key, offset, len(key), len(section), len(value), created_at, expires_at))
+            write(key + section + value)
+            offset += len(key) + len(section) + len(value)
+            newest = max(newest, created_at)
+
+        encoded_index = json.dumps(index, separators=(",", ":"), ensure_ascii=False).encode("utf-8") if index else b""
+        index_offset = offset
+        write(encoded_index)
+        table_offset = index_offset + len(encoded_index)
+
+        table.sort(key=lambda entry: (entry[0], entry[1]))
+        for entry_hash, _, *fields in table:
+            write(ENTRY.pack(entry_hash, *fields))
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, BUNDLE_VERSION, 0, len(table), table_offset, index_offset, len(encoded_index),
+                            time.time(), newest, hasher.digest()))
+    os.replace(temporary, path)
+    return len(table)
+
+
+def export(path, cache_path, bundle_path=None):
+    """
+    Pack the cache at cache_path, overlaid on the bundle at bundle_path if
+    there is one, and a search index built from it into a bundle at path
+    """
+    from cache import BUNDLE_PATH, ProfileCache
+    from search_index import ProfileIndex
+
+    cache = ProfileCache(path=cache_path, bundle=open_bundle(bundle_path or BUNDLE_PATH))
+    index = ProfileIndex(path=os.devnull)
+    index.sync(cache, force=True)
+    return write_bundle(path, cache.rows(), index.dump())
+
+
+def main(argv=None):
+    from cache import BUNDLE_PATH, CACHE_PATH
+
+    parser = argparse.ArgumentParser(description="Export or check a read-only snapshot of the profile cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_command = commands.add_parser("export", help="pack the cache into a bundle")
+    export_command.add_argument("bundle", nargs="?", default=BUNDLE_PATH, help=f"output file (default {BUNDLE_PATH})")
+    export_command.add_argument("--cache-path", default=CACHE_PATH, help=f"cache to export (default {CACHE_PATH})")
+    export_command.add_argument("--base", default=BUNDLE_PATH,
+                                help=f"bundle the cache overlays, exported with it if it exists (default {BUNDLE_PATH})")
+    verify_command = commands.add_parser("verify", help="check a bundle's header and checksum")
+    verify_command.add_argument("bundle", nargs="?", default=BUNDLE_PATH)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.command == "export":
+        count = export(args.bundle, args.cache_path, args.base)
+        print(f"Exported {count} profiles to {args.bundle} ({os.path.getsize(args.bundle):,} bytes) "
+              f"in {time.perf_counter() - started:.2f}s")
+        return 0
+
+    try:
+        bundle = ProfileBundle(args.bundle, verify=True)
+    except (OSError, BundleError) as e:
+        print(f"Invalid bundle: {e}", file=sys.stderr)
+        return 1
+    stats = bundle.stats()
+    print(f"{args.bundle}: {stats['entries']} profiles, {stats['bytes']:,} bytes, exported "
+          f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(stats['exported_at']))}, checksum OK "
+          f"({time.perf_counter() - started:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from bundle import open_bundle
+
+# Default cache location and size, overridable through the environment
+CACHE_PATH = os.getenv("UNIADVISOR_CACHE_PATH", "uniadvisor_cache.sqlite3")
+CACHE_MAX_BYTES = int(os.getenv("UNIADVISOR_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Read-only snapshot of profiles, written by "python bundle.py export", mapped under the SQLite tier if present
+BUNDLE_PATH = os.getenv("UNIADVISOR_BUNDLE_PATH", "uniadvisor_bundle.bin")
+
+DAY = 24 * 3600
+
+# How long past its TTL a profile may still be served while a fresh copy is
+# generated in the background. Older entries are treated as missing.
+STALE_WINDOW = float(os.getenv("UNIADVISOR_STALE_WINDOW", str(30 * DAY)))
+
+# Rows past the stale window are deleted from the disk tier when the cache
+# opens and then at most this often (seconds), on a write
+PURGE_INTERVAL = 3600
+
+# How long a generated profile stays valid, per section (seconds). Profiles
+# generated field by field use "<section>.<field>" entries, falling back to
+# the section's TTL for fields not listed.
+DEFAULT_TTLS = {
+    "university": 30 * DAY,
+    "course": 7 * DAY,
+    "university.overview": 180 * DAY,
+    "university.location": 365 * DAY,
+    "university.rankings": 30 * DAY,
+    "university.facilities": 180 * DAY,
+    "university.research": 90 * DAY,
+    "university.student_life": 90 * DAY,
+    "course.course_overview": 90 * DAY,
+    "course.tuition": 30 * DAY,
+    "course.average_earnings": 30 * DAY,
+}
+
+# Extra TTLs as a JSON object, e.g. {"university.rankings": 604800}. Besides
+# sections, keys may name one profile as "<section>|<university>[|<course>]"
+# to give it its own freshness budget.
+TTL_OVERRIDES = os.getenv("UNIADVISOR_TTLS", "")
+
+
+def normalize(text):
+    """Normalize free-text input so trivially different queries share a cache key"""
+    if not text:
+        return ""
+    return " ".join(text.casefold().split())
+
+
+def make_key(section, university, course=None, model="", prompt_version=""):
+    """
+    Build the cache key for a profile lookup.
+    The model and prompt version are part of the key so that changing either
+    never serves a profile generated under the old settings.
+    """
+    parts = [section, model, str(prompt_version), normalize(university)]
+    if course is not None:
+        parts.append(normalize(course))
+    return "|".join(parts)
+
+
+def ttl_key(key):
+    """The part of a cache key a per-profile TTL is configured under: the section and names"""
+    parts = key.split("|")
+    return "|".join(parts[:1] + parts[3:])
+
+
+def load_ttl_overrides(text):
+    """Parse UNIADVISOR_TTLS, normalizing the names of per-profile entries"""
+    if not text:
+        return {}
+    ttls = {}
+    for name, seconds in json.loads(text).items():
+        section, *names = name.split("|")
+        ttls["|".join([section] + [normalize(part) for part in names])] = float(seconds)
+    return ttls
+
+
+class ProfileCache:
+    """
+    Two-tier cache for generated profiles.
+
+    The first tier is an in-process LRU bounded by the encoded size of its
+    entries. The second tier is a SQLite database on disk, shared by every
+    Streamlit worker process pointed at the same file. Below it, an optional
+    read-only bundle answers what the database does not have. It is
+    memory-mapped and its entries are not kept in the first tier: each
+    lookup copies the one value it reads out of the mapping and decodes it.
+    Entries expire after the TTL configured for the profile or its section,
+    and remain available as stale copies for stale_window seconds after that.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES, ttls=None, stale_window=STALE_WINDOW,
+                 bundle=None):
+        self.path = path
+        self.bundle = bundle
+        self.max_bytes = max_bytes
+        self.stale_window = stale_window
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(load_ttl_overrides(TTL_OVERRIDES))
+        if ttls:
+            self.ttls.update(ttls)
+
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+        self._memory = OrderedDict()  # key -> (value, size, created_at, expires_at)
+        self._memory_bytes = 0
+        self._local = threading.local()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "writes": 0,
+            "stale_hits": 0,
+            "stale_served": 0,
+            "bundle_hits": 0,
+            "purged": 0,
+        }
+
+        self._connect().execute(
+            """CREATE TABLE IF NOT EXISTS profiles (
+                key TEXT PRIMARY KEY,
+                section TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS profiles_created_at ON profiles (created_at)")
+        self.purge_expired()
+
+    def _connect(self):
+        """Return this thread's SQLite connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ttl_for(self, section, key=None):
+        """TTL of the profile under key if it has its own, else of its section"""
+        if key is not None and ttl_key(key) in self.ttls:
+            return self.ttls[ttl_key(key)]
+        if section in self.ttls:
+            return self.ttls[section]
+        return self.ttls.get(section.split(".", 1)[0], DEFAULT_TTLS["course"])
+
+    def get(self, key):
+        """Return the cached value for key, or None if it is missing or expired"""
+        entry = self.lookup(key, stale=False)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, key, stale=True):
+        """
+        Return (value, created_at, fresh) for key, or None if it is missing.
+        Expired entries are returned with fresh=False while they are within
+        the stale window, so they can be served while being regenerated.
+        """
+        now = time.time()
+        oldest = now - self.stale_window if stale else now
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, size, created_at, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return json.loads(value), created_at, True
+                if expires_at > oldest:
+                    self._memory.move_to_end(key)
+                    self._counters["stale_served"] += 1
+                    return json.loads(value), created_at, False
+                self._drop(key)
+                self._counters["expired"] += 1
+
+        row = self._connect().execute(
+            "SELECT value, created_at, expires_at FROM profiles WHERE key = ?", (key,)
+        ).fetchone()
+        bundled = row is None and self.bundle is not None
+        if bundled:
+            row = self.bundle.get(key)
+
+        with self._lock:
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+            value, created_at, expires_at = row
+            if expires_at <= oldest:
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+            fresh = expires_at > now
+            if not fresh:
+                self._counters["stale_served"] += 1
+            else:
+                self._counters["bundle_hits" if bundled else "disk_hits"] += 1
+            if not bundled:
+                self._remember(key, value, created_at, expires_at)
+
+        return json.loads(value), created_at, fresh
+
+    def expiry(self, key):
+        """Return (created_at, expires_at) of the entry stored for key, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                return entry[2], entry[3]
+        row = self._connect().execute(
+            "SELECT created_at, expires_at FROM profiles WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None and self.bundle is not None:
+            return self.bundle.expiry(key)
+        return row
+
+    def get_stale(self, key):
+        """
+        Return the value stored on disk for key even if it has expired, or None.
+        Used as a fallback when a fresh profile cannot be generated.
+        """
+        row = self._connect().execute(
+            "SELECT value FROM profiles WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None and self.bundle is not None:
+            row = self.bundle.get(key)
+        if row is None:
+            return None
+        with self._lock:
+            self._counters["stale_hits"] += 1
+        return json.loads(row[0])
+
+    def set(self, key, section, value):
+        """Store value under key in both tiers using the profile's or the section's TTL"""
+        now = time.time()
+        expires_at = now + self.ttl_for(section, key)
+        encoded = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+        self._connect().execute(
+            "INSERT OR REPLACE INTO profiles (key, section, value, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, section, encoded, now, expires_at),
+        )
+
+        with self._lock:
+            self._counters["writes"] += 1
+            self._remember(key, encoded, now, expires_at)
+            purge = now - self._purged_at >= PURGE_INTERVAL
+        if purge:
+            self.purge_expired()
+
+    def changed_since(self, since, bundle_since=None):
+        """
+        Return (key, section, value, created_at) for every row written after
+        since, oldest first. Bundled rows created after bundle_since, by
+        default since, are included; where the database has a newer copy of
+        one, it comes later.
+        """
+        rows = self._connect().execute(
+            "SELECT key, section, value, created_at FROM profiles WHERE created_at > ? ORDER BY created_at",
+            (since,)
+        ).fetchall()
+        if self.bundle is not None:
+            bundled = [(key, section, value, created_at)
+                       for key, section, value, created_at, _ in
+                       self.bundle.rows(since if bundle_since is None else bundle_since)]
+            if bundled:
+                rows = sorted(bundled + rows, key=lambda row: row[3])
+        return [(key, section, json.loads(value), created_at) for key, section, value, created_at in rows]
+
+    def rows(self):
+        """
+        Yield (key, section, encoded value, created_at, expires_at) for every
+        entry still within its stale window, database rows over bundled ones
+        """
+        oldest = time.time() - self.stale_window
+        stored = set()
+        for row in self._connect().execute(
+                "SELECT key, section, value, created_at, expires_at FROM profiles WHERE expires_at > ?", (oldest,)):
+            stored.add(row[0])
+            yield row
+        if self.bundle is not None:
+            for row in self.bundle.rows():
+                if row[0] not in stored and row[4] > oldest:
+                    yield row
+
+    def purge_expired(self):
+        """Delete rows past the stale window from the disk tier and return how many were removed"""
+        now = time.time()
+        cursor = self._connect().execute(
+            "DELETE FROM profiles WHERE expires_at <= ?", (now - self.stale_window,)
+        )
+        with self._lock:
+            self._purged_at = now
+            self._counters["purged"] += cursor.rowcount
+        return cursor.rowcount
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current memory tier usage"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+        stats["max_bytes"] = self.max_bytes
+        stats["bundle_entries"] = self.bundle.count if self.bundle is not None else 0
+        hits = stats["memory_hits"] + stats["disk_hits"] + stats["bundle_hits"] + stats["stale_served"]
+        stats["hit_rate"] = hits / (hits + stats["misses"]) if hits + stats["misses"] else 0.0
+        return stats
+
+    def _remember(self, key, encoded, created_at, expires_at):
+        # Caller must hold self._lock
+        size = len(encoded.encode("utf-8"))
+        if size > self.max_bytes:
+            # Too large for the memory tier; it still lives on disk
+            self._drop(key)
+            return
+        self._drop(key)
+        self._memory[key] = (encoded, size, created_at, expires_at)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_bytes:
+            _, (_, evicted_size, _, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._counters["evictions"] += 1
+
+    def _drop(self, key):
+        # Caller must hold self._lock
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Return the process-wide cache.
+    Streamlit re-executes app.py on every rerun, so the shared instance lives
+    here rather than in the script to keep the memory tier warm across reruns.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ProfileCache(bundle=open_bundle(BUNDLE_PATH))
+        return _default_cache
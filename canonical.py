@@ -0,0 +1,246 @@
+"""
+Canonical names of Australian universities and common courses.
+
+Users refer to the same institution in many ways ("USyd", "uni of sydney",
+"The University of Sydney", "Sydney Uni"). Mapping every input onto one
+canonical name before the cache lookup and the prompt means they all share
+one cached profile. Lookups first try an exact match on the set of
+significant words, then fall back to trigram similarity for typos.
+"""
+import re
+from collections import defaultdict
+
+# Canonical name -> aliases. Variants that only differ in "the", "uni" vs
+# "university", word order or punctuation are matched without listing them.
+UNIVERSITIES = {
+    "Australian Catholic University": ["ACU"],
+    "The Australian National University": ["ANU"],
+    "Avondale University": ["Avondale"],
+    "Bond University": ["Bond"],
+    "Central Queensland University": ["CQU", "CQUniversity", "CQ University"],
+    "Charles Darwin University": ["CDU"],
+    "Charles Sturt University": ["CSU"],
+    "Curtin University": ["Curtin"],
+    "Deakin University": ["Deakin"],
+    "Edith Cowan University": ["ECU"],
+    "Federation University Australia": ["FedUni", "Federation University"],
+    "Flinders University": ["Flinders"],
+    "Griffith University": ["Griffith"],
+    "James Cook University": ["JCU"],
+    "La Trobe University": ["La Trobe", "LTU"],
+    "Macquarie University": ["Macquarie", "MQ"],
+    "Monash University": ["Monash"],
+    "Murdoch University": ["Murdoch"],
+    "Queensland University of Technology": ["QUT"],
+    "RMIT University": ["RMIT", "Royal Melbourne Institute of Technology"],
+    "Southern Cross University": ["SCU"],
+    "Swinburne University of Technology": ["Swinburne", "Swin"],
+    "Torrens University Australia": ["Torrens", "Torrens University"],
+    "The University of Adelaide": ["Adelaide Uni", "UofA", "UoA"],
+    "University of Canberra": ["UC", "UniCanberra"],
+    "University of Divinity": [],
+    "The University of Melbourne": ["UniMelb", "UoM", "Melbourne Uni"],
+    "The University of Newcastle": ["UON", "Newcastle Uni"],
+    "University of New England": ["UNE"],
+    "University of New South Wales": ["UNSW", "UNSW Sydney"],
+    "The University of Notre Dame Australia": ["Notre Dame", "UNDA"],
+    "The University of Queensland": ["UQ"],
+    "University of South Australia": ["UniSA"],
+    "University of Southern Queensland": ["UniSQ", "USQ"],
+    "University of the Sunshine Coast": ["UniSC", "USC", "Sunshine Coast Uni"],
+    "University of Tasmania": ["UTAS"],
+    "University of Technology Sydney": ["UTS"],
+    "The University of Sydney": ["USyd", "Sydney Uni"],
+    "The University of Western Australia": ["UWA"],
+    "University of Wollongong": ["UOW", "Wollongong Uni"],
+    "Victoria University": ["VU", "Vic Uni"],
+    "Western Sydney University": ["WSU", "UWS", "University of Western Sydney"],
+}
+
+COURSES = {
+    "Bachelor of Computer Science": ["Computer Science", "Comp Sci", "CompSci", "BCompSc", "BCS", "CS"],
+    "Bachelor of Information Technology": ["Information Technology", "BIT", "IT"],
+    "Bachelor of Software Engineering": ["Software Engineering", "BSE"],
+    "Bachelor of Cyber Security": ["Cyber Security", "Cybersecurity"],
+    "Bachelor of Data Science": ["Data Science"],
+    "Bachelor of Engineering (Honours)": ["Bachelor of Engineering", "Engineering", "BE", "BEng", "BE (Hons)"],
+    "Bachelor of Science": ["Science", "BSc"],
+    "Bachelor of Advanced Science": ["Advanced Science"],
+    "Bachelor of Arts": ["Arts", "BA"],
+    "Bachelor of Commerce": ["Commerce", "BCom"],
+    "Bachelor of Business": ["Business", "BBus"],
+    "Bachelor of Economics": ["Economics", "BEc"],
+    "Bachelor of Accounting": ["Accounting"],
+    "Bachelor of Laws": ["Law", "Laws", "LLB"],
+    "Juris Doctor": ["JD"],
+    "Doctor of Medicine": ["Medicine", "MD", "MBBS", "Bachelor of Medicine"],
+    "Bachelor of Nursing": ["Nursing", "BN"],
+    "Bachelor of Pharmacy": ["Pharmacy", "BPharm"],
+    "Bachelor of Psychology": ["Psychology", "BPsych"],
+    "Bachelor of Education": ["Education", "BEd", "Teaching"],
+    "Bachelor of Architecture": ["Architecture", "BArch"],
+    "Bachelor of Design": ["Design", "BDes"],
+    "Bachelor of Fine Arts": ["Fine Arts", "BFA"],
+    "Bachelor of Music": ["Music", "BMus"],
+    "Bachelor of Media and Communication": ["Media and Communication", "Communication", "Media"],
+    "Bachelor of Biomedical Science": ["Biomedical Science", "BBiomedSc"],
+    "Bachelor of Physiotherapy": ["Physiotherapy", "Physio"],
+    "Bachelor of Social Work": ["Social Work", "BSW"],
+    "Bachelor of Veterinary Science": ["Veterinary Science", "Vet Science", "BVSc"],
+    "Doctor of Dental Medicine": ["Dentistry", "DMD", "Bachelor of Dental Surgery", "BDS"],
+    "Master of Business Administration": ["MBA", "Business Administration"],
+    "Master of Information Technology": ["MIT", "Masters of IT", "Master of IT"],
+    "Master of Computer Science": ["MCS", "Masters of Computer Science"],
+    "Master of Data Science": ["MDS", "Masters of Data Science"],
+    "Master of Professional Accounting": ["MPA", "Professional Accounting"],
+    "Master of Engineering": ["MEng", "Masters of Engineering"],
+    "Master of Public Health": ["MPH", "Public Health"],
+    "Master of Teaching": ["MTeach"],
+    "Master of Laws": ["LLM"],
+    "Doctor of Philosophy": ["PhD"],
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Spelling variants folded onto one word before matching
+_SYNONYMS = {
+    "uni": "university",
+    "univ": "university",
+    "tech": "technology",
+    "bachelors": "bachelor",
+    "masters": "master",
+    "hons": "honours",
+    "honors": "honours",
+}
+
+UNIVERSITY_STOPWORDS = frozenset({"the", "of", "and", "university", "australia"})
+COURSE_STOPWORDS = frozenset({"the", "of", "in", "and", "degree", "course"})
+
+
+def words(text):
+    """Lower-case words of text with apostrophes dropped and spelling variants folded"""
+    return [_SYNONYMS.get(word, word) for word in _WORD.findall(text.casefold().replace("'", ""))]
+
+
+def trigrams(phrase):
+    padded = f"  {phrase} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(grams, other):
+    return 2.0 * len(grams & other) / (len(grams) + len(other))
+
+
+class NameIndex:
+    """
+    Index of canonical names and their aliases.
+
+    Exact matches compare the set of significant words, so word order and
+    filler words do not matter. Otherwise candidates are scored by the Dice
+    coefficient of their character trigrams, found through an inverted index
+    so only aliases sharing at least one trigram with the query are scored.
+    A fuzzy match is only used as the canonical name if every significant
+    word of the query is in the matched alias, allowing for typos, so
+    "Commerce and Law" is not rewritten to "Commerce".
+    """
+
+    def __init__(self, names, stopwords, threshold):
+        self.names = list(names)
+        self.stopwords = stopwords
+        self.threshold = threshold
+        self._long_stopwords = [stopword for stopword in stopwords if len(stopword) >= 6]
+        self._stopword_grams = {stopword: trigrams(stopword) for stopword in self._long_stopwords}
+        self._exact = {}
+        self._aliases = []  # (canonical name, trigram count, significant words)
+        self._postings = defaultdict(list)
+
+        for name, aliases in names.items():
+            for alias in [name] + list(aliases):
+                self._exact.setdefault(self._key(alias), name)
+                significant = self._significant(alias)
+                grams = trigrams(" ".join(significant))
+                for gram in grams:
+                    self._postings[gram].append(len(self._aliases))
+                self._aliases.append((name, len(grams), significant))
+
+    def _significant(self, text):
+        # Filler words, including misspelt ones such as "univeristy", carry no signal
+        return [word for word in words(text) if word not in self.stopwords and not self._misspelt_stopword(word)]
+
+    def _misspelt_stopword(self, word):
+        if len(word) < 6:
+            return False
+        grams = trigrams(word)
+        return any(dice(grams, self._stopword_grams[stopword]) >= 0.5 for stopword in self._long_stopwords)
+
+    def _key(self, text):
+        return " ".join(sorted(set(self._significant(text))))
+
+    def _phrase(self, text):
+        return " ".join(self._significant(text))
+
+    def _matches(self, text):
+        # (canonical name, score, best alias id) triples, best first; an exact match has no alias id
+        key = self._key(text)
+        if not key:
+            return []
+        if key in self._exact:
+            return [(self._exact[key], 1.0, None)]
+
+        grams = trigrams(self._phrase(text))
+        shared = defaultdict(int)
+        for gram in grams:
+            for alias_id in self._postings.get(gram, ()):
+                shared[alias_id] += 1
+
+        best = {}
+        for alias_id, count in shared.items():
+            name, alias_grams, _ = self._aliases[alias_id]
+            score = 2.0 * count / (len(grams) + alias_grams)
+            if score > best.get(name, (0.0, None))[0]:
+                best[name] = (score, alias_id)
+        return sorted(((name, score, alias_id) for name, (score, alias_id) in best.items()),
+                      key=lambda item: item[1], reverse=True)
+
+    def lookup(self, text):
+        """
+        Return (canonical name, score) pairs for text, best first.
+        An exact match scores 1.0 and is the only result.
+        """
+        return [(name, score) for name, score, _ in self._matches(text)]
+
+    def _covers(self, alias_id, text):
+        # Every significant word of text is in the alias, or a misspelling of one of its words
+        alias_grams = [trigrams(word) for word in self._aliases[alias_id][2]]
+        return all(any(dice(trigrams(word), grams) >= 0.5 for grams in alias_grams)
+                   for word in self._significant(text))
+
+    def canonical(self, text):
+        """Return the canonical name text refers to, or None if no match is confident enough"""
+        matches = self._matches(text)
+        if not matches:
+            return None
+        name, score, alias_id = matches[0]
+        if alias_id is None or (score >= self.threshold and self._covers(alias_id, text)):
+            return name
+        return None
+
+    def suggest(self, text, limit=3, min_score=0.4):
+        """Return up to `limit` canonical names that text may refer to"""
+        return [name for name, score in self.lookup(text)[:limit] if score >= min_score]
+
+
+UNIVERSITY_INDEX = NameIndex(UNIVERSITIES, UNIVERSITY_STOPWORDS, threshold=0.7)
+# Course titles differ subtly between degrees ("Advanced", double degrees), so
+# only near-exact matches are rewritten; the rest become suggestions
+COURSE_INDEX = NameIndex(COURSES, COURSE_STOPWORDS, threshold=0.9)
+
+
+def canonical_university(text):
+    """Canonical name of the university text refers to, or the text itself if it is not recognised"""
+    return UNIVERSITY_INDEX.canonical(text) or " ".join(text.split())
+
+
+def canonical_course(text):
+    """Canonical title of the course text refers to, or the text itself if it is not recognised"""
+    return COURSE_INDEX.canonical(text) or " ".join(text.split())
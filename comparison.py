@@ -0,0 +1,45 @@
+import pandas as pd
+
+from metrics import span
+from salary import parse_salaries, parse_tuitions
+
+# Flattened profile fields shown in the comparison, and their column names
+COLUMNS = {
+    "tuition.per_semester": "Tuition per semester",
+    "tuition.full_course": "Full course tuition",
+    "average_earnings.starting": "Starting salary",
+    "average_earnings.mid_career": "Mid-career salary",
+}
+
+# Numeric tuition columns derived from the descriptions above, and the basis of each
+TUITION = {
+    "Tuition per semester": ("Tuition per semester (AUD)", "semester"),
+    "Full course tuition": ("Full course tuition (AUD)", "total"),
+}
+
+# Numeric salary columns derived from the descriptions above, the median of each range
+SALARIES = {
+    "Starting salary": "Starting salary (AUD)",
+    "Mid-career salary": "Mid-career salary (AUD)",
+}
+
+def comparison_table(results):
+    """
+    Build the comparison table for a list of (university, course, profile)
+    tuples, extracting every tuition and salary figure in one pass per column
+    """
+    profiles = pd.json_normalize([profile for _, _, profile in results])
+    table = pd.DataFrame({
+        "University": [university for university, _, _ in results],
+        "Course": [course for _, course, _ in results],
+    })
+    for field, column in COLUMNS.items():
+        table[column] = profiles[field] if field in profiles else None
+    with span("salary_parse", mode="batch"):
+        # Tuition descriptions mix bases ("$45,000 per year, $135,000 total"), so
+        # the amount on the column's basis is taken rather than a median of them
+        for column, (amount_column, basis) in TUITION.items():
+            table[amount_column] = parse_tuitions(table[column], basis)
+        for column, amount_column in SALARIES.items():
+            table[amount_column] = parse_salaries(table[column])["median"]
+    return table
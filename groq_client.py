@@ -0,0 +1,293 @@
+"""
+Resilient wrapper around the OpenAI-compatible Groq client.
+
+Requests pass through a token-bucket limiter that follows the rate-limit
+headers Groq returns, transient failures are retried with jittered
+exponential backoff, slow requests can be hedged with a duplicate, and a
+circuit breaker fails fast while the upstream is unhealthy.
+"""
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import openai
+
+# Failures worth retrying: rate limiting, timeouts, connection problems and 5xx responses
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+# Failures that indicate the upstream itself is unhealthy and count towards opening the circuit
+UPSTREAM_ERRORS = (openai.APIConnectionError, openai.InternalServerError)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value):
+    """
+    Parse a rate-limit reset duration such as "7.66s", "2m59.56s" or "120ms"
+    into seconds. Plain numbers are taken as seconds. Returns None if unparseable.
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit breaker is open"""
+
+
+class TokenBucket:
+    """
+    Token bucket whose capacity and refill rate are learned from the
+    x-ratelimit-* response headers. Until the first observation it admits
+    everything.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.capacity = None
+        self.refill_rate = None
+        self.tokens = 0.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now):
+        if self.capacity is not None and self.refill_rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def acquire(self, amount=1.0):
+        """Block until `amount` tokens are available, then take them"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                    continue
+                if self.capacity is None:
+                    return
+                amount = min(amount, self.capacity)
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                if not self.refill_rate:
+                    # Nothing to wait for; let the upstream decide
+                    return
+                self._cond.wait((amount - self.tokens) / self.refill_rate)
+
+    def observe(self, limit, remaining, reset_seconds):
+        """Re-synchronize with the limit, remaining budget and reset time reported upstream"""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            self.capacity = float(limit)
+            self.tokens = min(self.tokens, float(remaining)) if self.refill_rate else float(remaining)
+            if reset_seconds and reset_seconds > 0:
+                self.refill_rate = max(limit - remaining, 1) / reset_seconds
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Admit nothing for the next `seconds`, e.g. after a 429 with Retry-After"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures. While open,
+    calls are rejected; after `reset_timeout` seconds a single probe call is
+    let through and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class ResilientClient:
+    """
+    Chat completion client with rate limiting, retries, hedging and a
+    circuit breaker. The wrapped OpenAI client should be built with
+    max_retries=0 so that retries are only scheduled here.
+    """
+
+    def __init__(self, client, max_attempts=4, base_delay=0.5, max_delay=20.0,
+                 hedge_after=0.0, breaker=None):
+        self.client = client
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.request_bucket = TokenBucket()
+        self.token_bucket = TokenBucket()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+        self._counters = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "rejected": 0,
+        }
+
+    def create(self, **kwargs):
+        """
+        Create a chat completion, retrying transient failures.
+        Streamed requests are not hedged since their output is consumed as it arrives.
+        """
+        if kwargs.get("stream") or not self.hedge_after:
+            return self._create_with_retries(kwargs)
+        return self._create_hedged(kwargs)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats["circuit"] = self.breaker.state
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _create_hedged(self, kwargs):
+        primary = self._hedge_pool.submit(self._create_with_retries, kwargs)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        self._count("hedged")
+        hedge = self._hedge_pool.submit(self._create_with_retries, kwargs)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _create_with_retries(self, kwargs):
+        for attempt in range(self.max_attempts):
+            try:
+                return self._create_once(kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_attempts - 1:
+                    raise
+                self._count("retries")
+                time.sleep(self._retry_delay(e, attempt))
+
+    def _create_once(self, kwargs):
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError("Upstream API is unavailable; failing fast while the circuit is open")
+
+        try:
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(self._estimate_tokens(kwargs))
+            self._count("requests")
+            response = self.client.chat.completions.with_raw_response.create(**kwargs)
+        except openai.RateLimitError as e:
+            self._count("rate_limited")
+            self._observe(e.response.headers)
+            retry_after = parse_duration(e.response.headers.get("retry-after"))
+            if retry_after:
+                self.request_bucket.pause(retry_after)
+            # Being throttled says nothing about upstream health
+            self.breaker.record_success()
+            raise
+        except UPSTREAM_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except openai.APIStatusError:
+            # Client errors (4xx) mean the upstream answered; it is healthy
+            self.breaker.record_success()
+            raise
+        except BaseException:
+            # Anything else, from a raw transport error to an interrupt, still has
+            # to settle the call, or a half-open probe would never end
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        self._observe(response.headers)
+        return response.parse()
+
+    def _observe(self, headers):
+        for kind, bucket in (("requests", self.request_bucket), ("tokens", self.token_bucket)):
+            try:
+                limit = float(headers[f"x-ratelimit-limit-{kind}"])
+                remaining = float(headers[f"x-ratelimit-remaining-{kind}"])
+            except (KeyError, ValueError):
+                continue
+            bucket.observe(limit, remaining, parse_duration(headers.get(f"x-ratelimit-reset-{kind}")))
+
+    def _retry_delay(self, error, attempt):
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = parse_duration(response.headers.get("retry-after"))
+            if retry_after:
+                return min(retry_after, self.max_delay)
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @staticmethod
+    def _estimate_tokens(kwargs):
+        # Roughly four characters per token, plus the completion budget
+        prompt_chars = sum(len(message.get("content") or "") for message in kwargs.get("messages", []))
+        return prompt_chars / 4 + kwargs.get("max_tokens", 0)
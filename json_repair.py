@@ -0,0 +1,321 @@
+"""
+Single-pass repair of the JSON objects language models write.
+
+The repairer scans the text once, left to right, and fixes the defects
+models commonly produce while it goes: prose or a markdown code fence
+around the object, raw newlines and other control characters inside
+strings, invalid escapes such as "\\_", unescaped quotes inside strings,
+missing or trailing commas, Python literals, bare words where a value is
+expected, and output cut off part way through.
+
+Text can be fed in chunks as it streams in. feed() returns the repaired
+text up to the last complete value, so a truncated tail is never emitted
+and close() can always finish the document by closing what is still open.
+"""
+import json
+import re
+
+# Runs of characters that need no attention, consumed in one step
+_PLAIN_STRING = re.compile(r'[^"\\\x00-\x1f]+')
+# Whole strings with nothing to repair; a value must be followed by something that can follow it
+_SIMPLE_KEY = re.compile(r'"[^"\\\x00-\x1f]*"')
+_SIMPLE_VALUE = re.compile(r'"[^"\\\x00-\x1f]*"(?=[ \t\r\n]*[,}\]"])')
+_WHITESPACE = re.compile(r"[ \t\r\n]+")
+_SCALAR = re.compile(r'[^,}\]"\s]+')
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?\Z")
+
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_ESCAPES = frozenset('"\\/bfnrt')
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+_CONTROL_ESCAPES = {"\n": "\\n", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _escape_whitespace(text):
+    return text.replace("\r\n", "\n").replace("\r", "\n").replace("\n", "\\n").replace("\t", "\\t")
+
+
+class JSONRepairer:
+    """
+    Streaming repairer for a JSON object. The document starts at the first
+    opening brace; everything after the matching closing brace is dropped.
+    `repairs` counts the defects fixed so far.
+    """
+
+    # Scanner states
+    _SEEK, _KEY, _COLON, _VALUE, _AFTER_VALUE, _STRING, _SCALAR, _DONE = range(8)
+
+    def __init__(self):
+        self.repairs = 0
+        self._state = self._SEEK
+        self._stack = []
+        self._committed = []
+        self._pending = []
+        self._scalar = []
+        self._is_key = False
+        self._escape = False
+        self._unicode = None  # hex digits read after "\u"
+        self._quote_space = None  # whitespace read after a quote that may or may not end the string
+        self._after_cr = False
+
+    @property
+    def done(self):
+        """True once the root object has been closed"""
+        return self._state == self._DONE
+
+    def feed(self, chunk):
+        """Consume the next chunk of raw text and return the repaired text that is now final"""
+        pos, end = 0, len(chunk)
+        while pos < end:
+            pos = self._step(chunk, pos)
+        return self._flush()
+
+    def close(self):
+        """Finish the document, closing whatever truncation left open, and return the remaining text"""
+        if self._state == self._STRING and self._quote_space is not None:
+            # The quote was the last character, so it did end the string
+            self._end_string()
+        elif self._state == self._SCALAR:
+            text = "".join(self._scalar)
+            if text in _LITERALS or _NUMBER.match(text):
+                self._end_scalar()
+
+        if self._stack:
+            # Truncated: drop the incomplete tail and close the open containers
+            self._fix()
+            self._pending = []
+            while self._stack:
+                self._committed.append(_CLOSERS[self._stack.pop()])
+            self._state = self._DONE
+        return self._flush()
+
+    def _step(self, chunk, pos):
+        """Process the text at pos and return the position to continue from"""
+        state = self._state
+        if state == self._STRING:
+            return self._string_step(chunk, pos)
+
+        if state == self._SEEK:
+            start = chunk.find("{", pos)
+            if chunk[pos:start if start >= 0 else None].strip():
+                self._fix()
+            if start < 0:
+                return len(chunk)
+            self._open("{")
+            return start + 1
+
+        if state == self._DONE:
+            if chunk[pos:].strip():
+                self._fix()
+            return len(chunk)
+
+        char = chunk[pos]
+        if state == self._SCALAR:
+            match = _SCALAR.match(chunk, pos)
+            if match is None:
+                self._end_scalar()
+                return pos
+            self._scalar.append(match.group())
+            return match.end()
+
+        if char in " \t\r\n":
+            end = _WHITESPACE.match(chunk, pos).end()
+            self._pending.append(chunk[pos:end])
+            return end
+
+        if state == self._KEY:
+            if char == '"':
+                match = _SIMPLE_KEY.match(chunk, pos)
+                if match is not None:
+                    self._pending.append(match.group())
+                    self._state = self._COLON
+                    return match.end()
+                self._start_string(is_key=True)
+            elif char in "}]":
+                self._close(char)
+            else:
+                self._fix()
+        elif state == self._COLON:
+            if char == ":":
+                self._pending.append(":")
+                self._state = self._VALUE
+            elif char in "}]":
+                self._close(char)
+            else:
+                self._fix()
+        elif state == self._VALUE:
+            if char == '"':
+                match = _SIMPLE_VALUE.match(chunk, pos)
+                if match is not None:
+                    self._pending.append(match.group())
+                    self._end_value()
+                    return match.end()
+                self._start_string(is_key=False)
+            elif char in "{[":
+                self._open(char)
+            elif char in "}]":
+                self._close(char)
+            elif char == ",":
+                self._fix()
+            else:
+                self._scalar = []
+                self._state = self._SCALAR
+                return pos
+        elif state == self._AFTER_VALUE:
+            if char == ",":
+                self._pending.append(",")
+                self._state = self._KEY if self._stack[-1] == "{" else self._VALUE
+            elif char in "}]":
+                self._close(char)
+            elif char in '"{[':
+                # Missing comma between two values
+                self._fix()
+                self._pending.append(",")
+                self._state = self._KEY if self._stack[-1] == "{" else self._VALUE
+                return pos
+            else:
+                self._fix()
+        return pos + 1
+
+    def _string_step(self, chunk, pos):
+        char = chunk[pos]
+        pending = self._pending
+        after_cr, self._after_cr = self._after_cr, False
+
+        if self._quote_space is not None:
+            # A quote inside a value closes it only if what follows can follow a value
+            if char in " \t\r\n":
+                end = _WHITESPACE.match(chunk, pos).end()
+                self._quote_space.append(chunk[pos:end])
+                return end
+            space = "".join(self._quote_space)
+            self._quote_space = None
+            if char in ',}]"':
+                self._end_string()
+                if space:
+                    self._pending.append(space)
+                return pos
+            self._fix()
+            pending.append('\\"' + _escape_whitespace(space))
+            return pos
+
+        if self._unicode is not None:
+            if char in _HEX_DIGITS:
+                self._unicode += char
+                if len(self._unicode) == 4:
+                    pending.append("\\u" + self._unicode)
+                    self._unicode = None
+                return pos + 1
+            # Not a unicode escape after all; keep the backslash as text
+            self._fix()
+            pending.append("\\\\u" + self._unicode)
+            self._unicode = None
+            return pos
+
+        if self._escape:
+            self._escape = False
+            if char == "u":
+                self._unicode = ""
+                return pos + 1
+            if char in _ESCAPES:
+                pending.append("\\" + char)
+                return pos + 1
+            # An invalid escape such as "\_": drop the backslash, keep the character
+            self._fix()
+            return pos
+
+        if char == '"':
+            if self._is_key:
+                self._end_string()
+            else:
+                self._quote_space = []
+            return pos + 1
+        if char == "\\":
+            self._escape = True
+            return pos + 1
+        if char < " ":
+            if char == "\n" and after_cr:
+                return pos + 1
+            self._fix()
+            if char == "\r":
+                pending.append("\\n")
+                self._after_cr = True
+            else:
+                pending.append(_CONTROL_ESCAPES.get(char) or "\\u%04x" % ord(char))
+            return pos + 1
+
+        match = _PLAIN_STRING.match(chunk, pos)
+        pending.append(match.group())
+        return match.end()
+
+    def _start_string(self, is_key):
+        self._pending.append('"')
+        self._state = self._STRING
+        self._is_key = is_key
+        self._escape = False
+        self._unicode = None
+        self._quote_space = None
+        self._after_cr = False
+
+    def _end_string(self):
+        self._pending.append('"')
+        self._quote_space = None
+        if self._is_key:
+            self._state = self._COLON
+        else:
+            self._end_value()
+
+    def _end_scalar(self):
+        text = "".join(self._scalar)
+        self._scalar = []
+        if text in _LITERALS:
+            value = _LITERALS[text]
+        elif _NUMBER.match(text):
+            value = text
+        else:
+            # A bare word where a value belongs; keep it as a string
+            value = json.dumps(text)
+        if value != text:
+            self._fix()
+        self._pending.append(value)
+        self._end_value()
+
+    def _end_value(self):
+        self._commit()
+        self._state = self._AFTER_VALUE
+
+    def _open(self, char):
+        self._pending.append(char)
+        self._stack.append(char)
+        self._commit()
+        self._state = self._KEY if char == "{" else self._VALUE
+
+    def _close(self, char):
+        # Anything pending is a trailing comma or a key without a value
+        if any(part.strip() for part in self._pending):
+            self._fix()
+        self._committed.extend(part for part in self._pending if not part.strip())
+        self._pending = []
+        closer = _CLOSERS[self._stack.pop()]
+        if char != closer:
+            self._fix()
+        self._committed.append(closer)
+        self._state = self._AFTER_VALUE if self._stack else self._DONE
+
+    def _commit(self):
+        self._committed.extend(self._pending)
+        self._pending = []
+
+    def _flush(self):
+        text = "".join(self._committed)
+        self._committed = []
+        return text
+
+    def _fix(self):
+        self.repairs += 1
+
+
+def repair_json(text):
+    """Return text repaired into a JSON object, or "" if it contains no object at all"""
+    repairer = JSONRepairer()
+    return repairer.feed(text) + repairer.close()
@@ -0,0 +1,131 @@
+import json
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a streamed JSON object.
+
+    Text is fed in arbitrary chunks as it arrives from the model. Whenever a
+    top-level field of the root object is complete, its key and parsed value
+    are returned from feed(), so the page can render that field without
+    waiting for the rest of the document. Anything before the opening brace
+    (leading prose, a markdown code fence) is skipped.
+    """
+
+    # Scanner states for the root object
+    _SEEK, _KEY, _COLON, _VALUE_START, _VALUE, _AFTER_VALUE, _DONE = range(7)
+
+    def __init__(self, loads=json.loads):
+        self.loads = loads
+        self.buffer = ""
+        self._pos = 0
+        self._state = self._SEEK
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+        self._value_kind = None
+
+    @property
+    def done(self):
+        """True once the root object has been closed"""
+        return self._state == self._DONE
+
+    def feed(self, chunk):
+        """Consume the next chunk of text and return a list of completed (key, value) pairs"""
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+            state = self._state
+
+            if state == self._DONE:
+                break
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if state == self._KEY:
+                        self._key = self._decode_key(buffer[self._key_start:pos + 1])
+                        self._state = self._COLON
+                    elif state == self._VALUE and self._depth == 1:
+                        self._emit(buffer[self._value_start:pos + 1], completed)
+                continue
+
+            if state == self._SEEK:
+                if char == "{":
+                    self._depth = 1
+                    self._state = self._KEY
+            elif state == self._KEY:
+                if char == '"':
+                    self._in_string = True
+                    self._key_start = pos
+                elif char == "}":
+                    self._close_root()
+            elif state == self._COLON:
+                if char == ":":
+                    self._state = self._VALUE_START
+            elif state == self._VALUE_START:
+                if char.isspace():
+                    continue
+                self._value_start = pos
+                self._state = self._VALUE
+                if char == '"':
+                    self._value_kind = "string"
+                    self._in_string = True
+                elif char in "{[":
+                    self._value_kind = "container"
+                    self._depth += 1
+                else:
+                    self._value_kind = "scalar"
+            elif state == self._VALUE:
+                if char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._depth += 1
+                elif char in "}]":
+                    self._depth -= 1
+                    if self._depth == 1 and self._value_kind == "container":
+                        self._emit(buffer[self._value_start:pos + 1], completed)
+                    elif self._depth == 0:
+                        # A scalar value terminated by the closing brace of the root
+                        self._emit(buffer[self._value_start:pos], completed)
+                        self._close_root()
+                elif char == "," and self._depth == 1 and self._value_kind == "scalar":
+                    self._emit(buffer[self._value_start:pos], completed)
+                    self._state = self._KEY
+            elif state == self._AFTER_VALUE:
+                if char == ",":
+                    self._state = self._KEY
+                elif char == "}":
+                    self._close_root()
+
+        self._pos = len(buffer)
+        return completed
+
+    def _emit(self, text, completed):
+        self._state = self._AFTER_VALUE
+        try:
+            value = self.loads(text.strip())
+        except ValueError:
+            # Leave malformed fields to the full-document parse at the end
+            return
+        completed.append((self._key, value))
+
+    def _close_root(self):
+        self._depth = 0
+        self._state = self._DONE
+
+    def _decode_key(self, text):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text[1:-1]
@@ -0,0 +1,234 @@
+"""
+Latency and token usage metrics for the hot path.
+
+Spans time a stage (an LLM request, JSON repair, salary parsing, rendering a
+section) and record the duration in a histogram named after the stage, with
+a small set of labels. Token counts are recorded the same way. The
+process-wide registry renders the Prometheus text format, served on
+UNIADVISOR_METRICS_PORT when it is set, and every observation can also be
+appended to a size-rotated JSONL file at UNIADVISOR_METRICS_LOG.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+
+METRICS_PORT = int(os.getenv("UNIADVISOR_METRICS_PORT", "0"))
+METRICS_LOG = os.getenv("UNIADVISOR_METRICS_LOG", "")
+METRICS_LOG_BYTES = int(os.getenv("UNIADVISOR_METRICS_LOG_BYTES", str(16 * 1024 * 1024)))
+METRICS_LOG_BACKUPS = 5
+
+# Upper bounds of the histogram buckets, from sub-millisecond parsing to minute-long generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75,
+                   1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Counts of observations per bucket, with their sum, in the Prometheus layout"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside the bucket it falls in"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class Metrics:
+    """
+    Histograms keyed by metric name and labels. Safe to record into from any
+    thread. If log_path is given, each observation is also written there as
+    one JSON line, rotating the file once it reaches log_bytes.
+    """
+
+    def __init__(self, log_path=None, log_bytes=METRICS_LOG_BYTES):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._log = None
+        if log_path:
+            self._log = logging.getLogger(f"{__name__}.jsonl.{log_path}")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            handler = RotatingFileHandler(log_path, maxBytes=log_bytes, backupCount=METRICS_LOG_BACKUPS)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._log.addHandler(handler)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+        if self._log is not None:
+            self._log.info(json.dumps({"time": time.time(), "metric": name, "value": value, **labels}))
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Record the duration of the block in seconds as `<name>_seconds`, even if it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - started, **labels)
+
+    def summary(self, name):
+        """Observations of a metric across all its labels: count, mean and p50/p95/p99"""
+        merged = None
+        with self._lock:
+            for (metric, _), histogram in self._histograms.items():
+                if metric == name:
+                    if merged is None:
+                        merged = Histogram(histogram.buckets)
+                    merged.merge(histogram)
+        if merged is None:
+            return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+        return {
+            "count": merged.count,
+            "mean": merged.sum / merged.count,
+            "p50": merged.quantile(0.5),
+            "p95": merged.quantile(0.95),
+            "p99": merged.quantile(0.99),
+        }
+
+    def prometheus(self):
+        """All histograms in the Prometheus text exposition format"""
+        with self._lock:
+            snapshot = [(name, labels, list(h.buckets), list(h.counts), h.count, h.sum)
+                        for (name, labels), h in sorted(self._histograms.items())]
+        lines = []
+        typed = set()
+        for name, labels, buckets, counts, count, total in snapshot:
+            metric = f"uniadvisor_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + [(key, value) for key, value in extra.items()]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def serve_metrics(metrics, port, host="0.0.0.0"):
+    """Serve metrics.prometheus() at /metrics on a background thread and return the server"""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = metrics.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_default_metrics():
+    """
+    Return the process-wide metrics registry, starting the Prometheus
+    endpoint on first use if UNIADVISOR_METRICS_PORT is set
+    """
+    global _default_metrics
+    if _default_metrics is not None:
+        return _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            metrics = Metrics(log_path=METRICS_LOG or None)
+            if METRICS_PORT:
+                try:
+                    serve_metrics(metrics, METRICS_PORT)
+                except OSError as e:
+                    # Another worker process already serves this port
+                    logger.warning("Metrics endpoint not started on port %s: %s", METRICS_PORT, e)
+            _default_metrics = metrics
+        return _default_metrics
+
+
+def span(name, **labels):
+    """Time a block into the process-wide registry"""
+    return get_default_metrics().span(name, **labels)
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    """Record one observation into the process-wide registry"""
+    get_default_metrics().observe(name, value, buckets, **labels)
+
+
+@contextmanager
+def profiled(path, limit=25):
+    """
+    Run the block under cProfile, save the raw stats to path and yield a dict
+    whose "report" is filled with the top `limit` functions by cumulative time.
+    Only the calling thread is profiled.
+    """
+    result = {"path": path, "report": ""}
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield result
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(limit)
+        result["report"] = report.getvalue()
@@ -0,0 +1,233 @@
+"""
+Predictive prefetch of the course profiles likely to follow a university search.
+
+Most sessions search a university and then one of a handful of its
+courses. A course search following a search for its university alone in
+the same session is recorded as a university -> course transition, in a
+small SQLite file shared by the worker processes. After a search for a
+university alone, its most common follow-up courses that are not cached yet
+are generated in the background while the user reads the university page,
+so the follow-up search is answered from the cache.
+
+Prefetching is speculative and runs at low priority. It has one worker by
+default, and its requests carry no session, so admission control sheds
+them first. Nothing is prefetched while requests are queueing for
+admission, and prefetches do not count towards the popularity that gets
+profiles refreshed ahead of expiry. The tokens prefetches spend and how
+many of them were used are counted, so the budget can be tuned.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import get_default_admission
+from cache import get_default_cache
+from profiles import (
+    COURSE_FIELDS,
+    SECTIONED,
+    canonical_names,
+    counted_usage,
+    profile_key,
+    speculative,
+    stream_course_information,
+)
+
+TRANSITIONS_PATH = os.getenv("UNIADVISOR_PREFETCH_PATH", "uniadvisor_prefetch.sqlite3")
+# Courses prefetched after a university search; 0 disables prefetching
+PREFETCH_TOP_K = int(os.getenv("UNIADVISOR_PREFETCH_TOP_K", "3"))
+# Transitions from a university to a course before the course is worth prefetching
+PREFETCH_MIN_HITS = int(os.getenv("UNIADVISOR_PREFETCH_MIN_HITS", "2"))
+PREFETCH_WORKERS = int(os.getenv("UNIADVISOR_PREFETCH_WORKERS", "1"))
+
+# Prefetches waiting or running at once; further ones are dropped
+PREFETCH_QUEUE = 16
+# Prefetched profiles remembered until searched for, to count hits
+MAX_UNUSED = 1000
+# Sessions whose last university search is remembered, to follow it to a course
+MAX_SESSIONS = 10000
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """
+    Learns university -> course transitions and generates the likely next
+    course profiles on a small background pool, at most once at a time per
+    course.
+    """
+
+    def __init__(self, path=TRANSITIONS_PATH, top_k=PREFETCH_TOP_K, min_hits=PREFETCH_MIN_HITS,
+                 workers=PREFETCH_WORKERS, max_pending=PREFETCH_QUEUE):
+        self.path = path
+        self.top_k = top_k
+        self.min_hits = min_hits
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="profile-prefetch")
+        self._pending = set()
+        self._unused = OrderedDict()  # (university, course) prefetched and not searched for yet
+        self._sessions = OrderedDict()  # session -> (university searched alone, courses searched after it)
+        self._counters = {"transitions": 0, "predictions": 0, "queued": 0, "prefetched": 0, "failed": 0, "skipped_busy": 0,
+                          "dropped": 0, "hits": 0, "in_flight_hits": 0, "prompt_tokens": 0,
+                          "completion_tokens": 0}
+
+        self._connect().execute(
+            """CREATE TABLE IF NOT EXISTS transitions (
+                university TEXT NOT NULL,
+                course TEXT NOT NULL,
+                hits INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (university, course)
+            )"""
+        )
+
+    def _connect(self):
+        """Return this thread's SQLite connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, university, course=None, session_id=None):
+        """
+        Note a search in session_id. A search for a university alone starts
+        a sequence, and each course at that university searched next in the
+        same session is counted once as a transition from it.
+        Returns True if the course profile was prefetched and this is the
+        first search for it since. A search arriving while the prefetch is
+        still running joins its request and is counted separately.
+        """
+        university, course = canonical_names(university, course)
+        with self._lock:
+            if not course:
+                if session_id is not None:
+                    self._sessions[session_id] = (university, set())
+                    self._sessions.move_to_end(session_id)
+                    while len(self._sessions) > MAX_SESSIONS:
+                        self._sessions.popitem(last=False)
+                return False
+            sequence = self._sessions.get(session_id) if session_id is not None else None
+            follows = sequence is not None and sequence[0] == university and course not in sequence[1]
+            if follows:
+                sequence[1].add(course)
+                self._counters["transitions"] += 1
+            hit = self._unused.pop((university, course), None) is not None
+            if hit:
+                self._counters["hits"] += 1
+            elif (university, course) in self._pending:
+                self._counters["in_flight_hits"] += 1
+
+        if follows:
+            self._connect().execute(
+                "INSERT INTO transitions (university, course, hits, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT (university, course) DO UPDATE SET hits = hits + 1, "
+                "updated_at = excluded.updated_at",
+                (university, course, time.time()),
+            )
+        return hit
+
+    def predict(self, university):
+        """The courses most often searched at university, most common first, up to top_k"""
+        university, _ = canonical_names(university)
+        rows = self._connect().execute(
+            "SELECT course FROM transitions WHERE university = ? AND hits >= ? "
+            "ORDER BY hits DESC, updated_at DESC LIMIT ?",
+            (university, self.min_hits, self.top_k),
+        ).fetchall()
+        return [course for course, in rows]
+
+    def prefetch(self, university):
+        """
+        Queue generation of the likely next courses at university that are
+        not cached yet. Returns the courses queued.
+        """
+        if self.top_k <= 0:
+            return []
+        university, _ = canonical_names(university)
+        if get_default_admission().stats()["waiting"]:
+            with self._lock:
+                self._counters["skipped_busy"] += 1
+            return []
+
+        queued = []
+        for course in self.predict(university):
+            if stored(university, course):
+                continue
+            with self._lock:
+                self._counters["predictions"] += 1
+                if (university, course) in self._pending:
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    self._counters["dropped"] += 1
+                    break
+                self._pending.add((university, course))
+                self._counters["queued"] += 1
+            self._executor.submit(self._run, university, course)
+            queued.append(course)
+        return queued
+
+    def _run(self, university, course):
+        try:
+            with counted_usage() as usage, speculative():
+                for _ in stream_course_information(university, course):
+                    pass
+        except Exception as e:
+            logger.warning("Prefetch of %s at %s failed: %s", course, university, e)
+            outcome = "failed"
+        else:
+            outcome = "prefetched"
+        with self._lock:
+            self._pending.discard((university, course))
+            self._counters[outcome] += 1
+            self._counters["prompt_tokens"] += usage["prompt_tokens"]
+            self._counters["completion_tokens"] += usage["completion_tokens"]
+            if outcome == "prefetched":
+                self._unused[university, course] = time.time()
+                while len(self._unused) > MAX_UNUSED:
+                    self._unused.popitem(last=False)
+
+    def stats(self):
+        """Return prefetch counters, the hit rate of completed prefetches and their tokens per hit"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._pending)
+            stats["unused"] = len(self._unused)
+        tokens = stats["prompt_tokens"] + stats["completion_tokens"]
+        stats["tokens"] = tokens
+        stats["hit_rate"] = stats["hits"] / stats["prefetched"] if stats["prefetched"] else 0.0
+        stats["tokens_per_hit"] = tokens / stats["hits"] if stats["hits"] else None
+        return stats
+
+
+def stored(university, course):
+    """True if the course profile is cached and fresh, as a whole or, in sectioned mode, field by field"""
+    cache = get_default_cache()
+    sections = [f"course.{field}" for field in COURSE_FIELDS] if SECTIONED else ["course"]
+    now = time.time()
+    for section in sections:
+        expiry = cache.expiry(profile_key(section, university, course))
+        if expiry is None or expiry[1] <= now:
+            return False
+    return True
+
+
+_default_prefetcher = None
+_default_prefetcher_lock = threading.Lock()
+
+
+def get_default_prefetcher():
+    """Return the process-wide prefetcher"""
+    global _default_prefetcher
+    with _default_prefetcher_lock:
+        if _default_prefetcher is None:
+            _default_prefetcher = Prefetcher()
+        return _default_prefetcher
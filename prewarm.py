@@ -0,0 +1,175 @@
+"""
+Pre-generate university and course profiles into the cache the app reads.
+
+Usage:
+    python prewarm.py pairs.csv --concurrency 4 --rate 0.5
+
+The input is a CSV file with "university" and "course" columns, or a JSONL
+file with one {"university": ..., "course": ...} object per line. The course
+may be left empty to warm only the university profile. Completed profiles are
+recorded in a checkpoint file so an interrupted run can be resumed.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cache import CACHE_PATH, ProfileCache
+from profiles import (
+    ProfileFetchError,
+    canonical_names,
+    course_messages,
+    generate_profile,
+    profile_key,
+    university_messages,
+)
+
+
+class RateLimiter:
+    """Space out requests so that at most `rate` start per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_start = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        time.sleep(max(0.0, start - now))
+
+
+def read_pairs(path):
+    """Read (university, course) pairs from a CSV or JSONL file"""
+    pairs = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            university = (row.get("university") or "").strip()
+            course = (row.get("course") or "").strip()
+            if university:
+                pairs.append((university, course or None))
+    return pairs
+
+
+def plan_jobs(pairs):
+    """
+    Expand pairs into one job per distinct profile.
+    A university shared by several courses, under any of its names, is only
+    generated once.
+    """
+    jobs = {}
+    for university, course in pairs:
+        university, course = canonical_names(university, course)
+        key = profile_key("university", university)
+        jobs.setdefault(key, ("university", university, None))
+        if course:
+            key = profile_key("course", university, course)
+            jobs.setdefault(key, ("course", university, course))
+    return jobs
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def warm_profile(cache, limiter, section, university, course, force):
+    """
+    Generate one profile unless it is already cached.
+    Returns the token usage of the request and any repair of malformed
+    fields, or None if it was a cache hit.
+    """
+    key = profile_key(section, university, course)
+    if not force and cache.get(key) is not None:
+        return None
+
+    if section == "university":
+        label = "university information"
+        messages_for = lambda fields: university_messages(university, fields)
+    else:
+        label = "course information"
+        messages_for = lambda fields: course_messages(university, course, fields)
+
+    limiter.wait()
+    usage = {}
+    profile = generate_profile(section, messages_for, label, usage=usage)
+    cache.set(key, section, profile)
+    return usage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate university and course profiles into the cache")
+    parser.add_argument("input", help="CSV or JSONL file of university/course pairs")
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum requests in flight (default 4)")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="maximum requests started per second, 0 for unlimited (default 1)")
+    parser.add_argument("--cache-path", default=CACHE_PATH, help=f"cache database to fill (default {CACHE_PATH})")
+    parser.add_argument("--checkpoint", help="progress file used to resume (default <input>.checkpoint)")
+    parser.add_argument("--force", action="store_true", help="regenerate profiles even if they are cached")
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.checkpoint or args.input + ".checkpoint"
+    completed = load_checkpoint(checkpoint_path)
+    jobs = plan_jobs(read_pairs(args.input))
+    pending = {key: job for key, job in jobs.items() if key not in completed}
+    print(f"{len(jobs)} profiles, {len(jobs) - len(pending)} already done, {len(pending)} to generate")
+
+    cache = ProfileCache(path=args.cache_path)
+    limiter = RateLimiter(args.rate)
+    totals = {"generated": 0, "cached": 0, "failed": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    started = time.monotonic()
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {
+            executor.submit(warm_profile, cache, limiter, section, university, course, args.force): key
+            for key, (section, university, course) in pending.items()
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            try:
+                usage = future.result()
+            except ProfileFetchError as e:
+                totals["failed"] += 1
+                print(f"[{done}/{len(futures)}] FAILED {key}: {e}", file=sys.stderr)
+                continue
+
+            if usage is None:
+                totals["cached"] += 1
+                status = "cached"
+            else:
+                totals["generated"] += 1
+                totals["prompt_tokens"] += usage.get("prompt_tokens", 0)
+                totals["completion_tokens"] += usage.get("completion_tokens", 0)
+                status = f"{usage.get('completion_tokens', 0)} tokens"
+
+            checkpoint.write(key + "\n")
+            checkpoint.flush()
+            print(f"[{done}/{len(futures)}] {key} ({status})")
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(
+        f"Generated {totals['generated']}, already cached {totals['cached']}, failed {totals['failed']} "
+        f"in {elapsed:.1f}s: {totals['generated'] * 60 / elapsed:.1f} profiles/min, "
+        f"{totals['completion_tokens'] / elapsed:.1f} completion tokens/sec "
+        f"({totals['prompt_tokens']} prompt tokens total)"
+    )
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,865 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from admission import Overloaded, get_default_admission
+from cache import get_default_cache, make_key
+from canonical import canonical_course, canonical_university
+from json_repair import JSONRepairer
+from json_stream import IncrementalJSONParser
+from metrics import TOKEN_BUCKETS, observe, span
+from refresh import get_default_refresher
+from schemas import ValidationStats, invalid_fields, matches, schema_for
+from singleflight import get_default_flights
+
+# Load environment variables
+load_dotenv()
+
+# The API client is built by get_client() on the first request, so importing
+# this module loads neither openai nor httpx and does not need the API key
+_client = None
+_client_lock = threading.Lock()
+
+MODEL = "mixtral-8x7b-32768"
+
+# Bump whenever a prompt changes so cached profiles from the old prompt are not reused
+PROMPT_VERSION = 1
+
+# Generate profiles one top-level field at a time, in parallel, caching each field separately
+SECTIONED = os.getenv("UNIADVISOR_SECTIONED", "0") == "1"
+SECTION_WORKERS = int(os.getenv("UNIADVISOR_SECTION_WORKERS", "12"))
+SECTION_MAX_TOKENS = 1024
+
+section_executor = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="profile-section")
+
+# Generate the university and course profiles of a search in one request when
+# neither is cached, instead of two requests that each re-establish the
+# university's context. Ignored in sectioned mode.
+FUSED = os.getenv("UNIADVISOR_FUSED", "0") == "1"
+FUSED_MAX_TOKENS = 8192
+
+# Ask for the API's JSON object response format. Switched off for the rest of
+# the process if the model rejects it. Streamed requests never use it.
+JSON_MODE = os.getenv("UNIADVISOR_JSON_MODE", "1") == "1"
+json_mode = JSON_MODE
+
+# Requests spent re-generating the invalid fields of one profile before giving up
+REPAIR_ATTEMPTS = int(os.getenv("UNIADVISOR_REPAIR_ATTEMPTS", "2"))
+
+# Parse failures, schema violations and the tokens spent repairing them
+validation_stats = ValidationStats()
+
+# Field added to a profile served stale while a fresh copy is generated in
+# the background; its value is the time the stale copy was generated
+REFRESHING = "_refreshing"
+
+# Token counts of the completions made in the current counted_usage() block, if any
+_counted_usage = contextvars.ContextVar("counted_usage", default=None)
+_counted_usage_lock = threading.Lock()
+# True in a speculative() block, whose lookups do not count towards profile popularity
+_speculative = contextvars.ContextVar("speculative", default=False)
+
+def get_client():
+    """
+    Return the process-wide API client, building it on first use. Retries are
+    scheduled by the resilient wrapper, which also rate-limits, hedges and
+    circuit-breaks requests. Raises ValueError if GROQ_API_KEY is not set.
+    """
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            api_key = os.getenv("GROQ_API_KEY")
+            if not api_key:
+                raise ValueError("GROQ_API_KEY environment variable is not set")
+
+            import httpx
+            from openai import OpenAI
+
+            from groq_client import CircuitBreaker, ResilientClient
+
+            _client = ResilientClient(
+                OpenAI(
+                    api_key=api_key,
+                    base_url=os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1"),
+                    # A custom httpx client without proxies
+                    http_client=httpx.Client(),
+                    timeout=float(os.getenv("UNIADVISOR_REQUEST_TIMEOUT", "60")),
+                    max_retries=0
+                ),
+                max_attempts=int(os.getenv("UNIADVISOR_MAX_ATTEMPTS", "4")),
+                hedge_after=float(os.getenv("UNIADVISOR_HEDGE_AFTER", "0")),
+                breaker=CircuitBreaker(
+                    failure_threshold=int(os.getenv("UNIADVISOR_BREAKER_THRESHOLD", "5")),
+                    reset_timeout=float(os.getenv("UNIADVISOR_BREAKER_RESET", "30"))
+                )
+            )
+        return _client
+
+def client_stats():
+    """
+    Counters of the API client, or None while no request has been made
+    """
+    client = _client
+    return client.stats() if client is not None else None
+
+class ProfileFetchError(Exception):
+    """
+    Raised when a profile cannot be fetched or parsed.
+    Carries the raw model output, if any, so the page can show it.
+    """
+
+    def __init__(self, message, raw_content=None):
+        super().__init__(message)
+        self.raw_content = raw_content
+
+class UpstreamError(ProfileFetchError):
+    """
+    Raised when the API request itself fails, before any of the profile was
+    received, so a previously cached copy can be served in its place
+    """
+
+def admit(label):
+    """
+    Take a request slot from the admission controller, raising UpstreamError
+    if the request is shed so a cached copy can be served instead
+    """
+    try:
+        get_default_admission().acquire()
+    except Overloaded as e:
+        raise UpstreamError(f"Error fetching {label}: {str(e)}") from e
+
+# JSON structure requested for each top-level field of a course profile, in prompt order
+COURSE_FIELDS = {
+    "course_overview": '''"course_overview": "Detailed 3-4 paragraph overview including: course structure, 
+        learning objectives, unique features, accreditation, and industry partnerships"''',
+    "tuition": '''"tuition": {
+            "per_semester": "amount in AUD with breakdown",
+            "full_course": "total amount in AUD with additional costs"
+        }''',
+    "faculty_reviews": '''"faculty_reviews": [
+            "detailed review 1 with specific feedback about teaching quality",
+            "detailed review 2 with specific feedback about support",
+            "detailed review 3 with specific feedback about expertise",
+            "detailed review 4 with specific feedback about industry connection"
+        ]''',
+    "alumni_reviews": '''"alumni_reviews": [
+            "detailed review 1 with career outcome",
+            "detailed review 2 with specific skills gained",
+            "detailed review 3 with industry placement",
+            "detailed review 4 with international opportunities"
+        ]''',
+    "career_prospects": '''"career_prospects": [
+            "detailed career path 1 with average time to position",
+            "detailed career path 2 with industry demand",
+            "detailed career path 3 with specific companies",
+            "detailed career path 4 with advancement opportunities",
+            "detailed career path 5 with global opportunities"
+        ]''',
+    "skills_taught": '''"skills_taught": [
+            "detailed skill 1 with industry application",
+            "detailed skill 2 with practical examples",
+            "detailed skill 3 with certification options",
+            "detailed skill 4 with project work",
+            "detailed skill 5 with industry relevance",
+            "detailed skill 6 with future trends"
+        ]''',
+    "average_earnings": '''"average_earnings": {
+            "starting": "detailed starting salary range in AUD with industry comparison",
+            "mid_career": "detailed mid-career salary range in AUD with progression timeline"
+        }''',
+}
+
+# JSON structure requested for each top-level field of a university profile, in prompt order
+UNIVERSITY_FIELDS = {
+    "overview": '''"overview": "Provide a detailed 4-5 paragraph overview including: history and establishment, notable achievements, 
+        international recognition, research impact, and current standing in the academic community"''',
+    "location": '''"location": {
+            "city": "city name",
+            "state": "state name",
+            "campus_description": "Detailed 2-3 paragraph description of the campus, including architecture, 
+            layout, notable buildings, and surrounding area"
+        }''',
+    "rankings": '''"rankings": {
+            "world_rank": "current world ranking with source",
+            "national_rank": "current national ranking with source",
+            "subject_strengths": [
+                "detailed strength 1 with ranking",
+                "detailed strength 2 with ranking",
+                "detailed strength 3 with ranking",
+                "detailed strength 4 with ranking"
+            ]
+        }''',
+    "facilities": '''"facilities": [
+            "detailed facility 1 with specific features",
+            "detailed facility 2 with specific features",
+            "detailed facility 3 with specific features",
+            "detailed facility 4 with specific features",
+            "detailed facility 5 with specific features"
+        ]''',
+    "research": '''"research": {
+            "focus_areas": [
+                "detailed research area 1 with achievements",
+                "detailed research area 2 with achievements",
+                "detailed research area 3 with achievements",
+                "detailed research area 4 with achievements"
+            ],
+            "achievements": [
+                "major achievement 1 with year and impact",
+                "major achievement 2 with year and impact",
+                "major achievement 3 with year and impact"
+            ]
+        }''',
+    "student_life": '''"student_life": {
+            "total_students": "exact number with breakdown",
+            "international_students": "percentage with top 3 countries",
+            "clubs_societies": "number with description of notable ones",
+            "accommodation": "detailed description of housing options and facilities"
+        }''',
+}
+
+def profile_structure(fields, names=None):
+    """
+    Render the JSON structure the model is asked to return, for every field
+    or only the named ones
+    """
+    names = names or list(fields)
+    return "{\n        " + ",\n        ".join(fields[name] for name in names) + "\n    }"
+
+def course_messages(university, course, fields=None):
+    """
+    Build the chat messages requesting a course profile, or only the given fields of it
+    """
+    system_message = """You are a comprehensive course information bot. Return a detailed JSON object.
+    Focus on providing extensive, well-researched information about the university course.
+    Include specific details about curriculum, learning outcomes, and career opportunities.
+    Important formatting rules:
+    1. Do not escape underscores in JSON keys
+    2. Do not use trailing commas
+    3. Keep JSON format consistent
+    4. Use double quotes for all strings"""
+    
+    prompt = f"""Generate a detailed JSON object about the {course} at {university}. 
+    Provide comprehensive information including curriculum details, career paths, and student experiences.
+    Return ONLY a JSON object with this exact structure:
+    {profile_structure(COURSE_FIELDS, fields)}"""
+
+    return [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": prompt}
+    ]
+
+def university_messages(university, fields=None):
+    """
+    Build the chat messages requesting a university profile, or only the given fields of it
+    """
+    system_message = """You are a comprehensive university information bot. Return a detailed JSON object.
+    Focus on providing extensive, well-researched information about the university.
+    Include historical context, notable achievements, and specific details about facilities and programs."""
+    
+    prompt = f"""Generate a detailed JSON object about {university} in Australia.
+    Provide comprehensive information including history, achievements, and specific details.
+    Return a JSON object with this exact structure:
+    {profile_structure(UNIVERSITY_FIELDS, fields)}"""
+
+    return [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": prompt}
+    ]
+
+def fused_messages(university, course):
+    """
+    Build the chat messages requesting the university and course profiles
+    as one JSON object; their top-level field names do not overlap
+    """
+    system_message = """You are a comprehensive university and course information bot. Return a detailed JSON object.
+    Focus on providing extensive, well-researched information about the university and one of its courses.
+    Include historical context, notable achievements, and specific details about facilities and programs,
+    then specific details about the course's curriculum, learning outcomes, and career opportunities.
+    Important formatting rules:
+    1. Do not escape underscores in JSON keys
+    2. Do not use trailing commas
+    3. Keep JSON format consistent
+    4. Use double quotes for all strings"""
+
+    prompt = f"""Generate a detailed JSON object about {university} in Australia and its {course}.
+    Provide comprehensive information including the university's history, achievements and facilities,
+    and the course's curriculum details, career paths, and student experiences.
+    Return ONLY a JSON object with this exact structure:
+    {profile_structure({**UNIVERSITY_FIELDS, **COURSE_FIELDS})}"""
+
+    return [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": prompt}
+    ]
+
+def request_profile(messages, label, usage=None, max_tokens=4096, section=None, stage="generate"):
+    """
+    Request a profile in a single blocking completion and parse it.
+    Raises ProfileFetchError on failure instead of writing to the page, so it
+    can safely run on a worker thread. If a usage dict is given, it is updated
+    with the token counts reported for the completion. Latency and token
+    counts are recorded under the section and stage (generate or repair).
+    """
+    global json_mode
+    import openai
+
+    labels = dict(section=section or "profile", stage=stage, mode="request")
+    request = dict(model=MODEL, messages=messages, temperature=0.5, max_tokens=max_tokens)
+    admit(label)
+    try:
+        with span("llm_request", **labels):
+            client = get_client()
+            if json_mode:
+                try:
+                    chat_completion = client.create(response_format={"type": "json_object"}, **request)
+                except openai.BadRequestError as e:
+                    # Either the output failed the API's own JSON validation or the
+                    # model does not support JSON mode; only the latter disables it
+                    if getattr(e, "code", None) != "json_validate_failed":
+                        json_mode = False
+                    chat_completion = client.create(**request)
+            else:
+                chat_completion = client.create(**request)
+
+        response_content = chat_completion.choices[0].message.content.strip()
+    except Exception as e:
+        raise UpstreamError(f"Error fetching {label}: {str(e)}") from e
+    finally:
+        get_default_admission().release()
+
+    if chat_completion.usage is not None:
+        record_usage(chat_completion.usage.prompt_tokens, chat_completion.usage.completion_tokens, labels)
+        if usage is not None:
+            usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + chat_completion.usage.prompt_tokens
+            usage["completion_tokens"] = usage.get("completion_tokens", 0) + chat_completion.usage.completion_tokens
+
+    return parse_profile(response_content, label)
+
+def record_usage(prompt_tokens, completion_tokens, labels):
+    """Record the token counts of one completion"""
+    observe("llm_prompt_tokens", prompt_tokens, TOKEN_BUCKETS, **labels)
+    observe("llm_completion_tokens", completion_tokens, TOKEN_BUCKETS, **labels)
+    usage = _counted_usage.get()
+    if usage is not None:
+        with _counted_usage_lock:
+            usage["prompt_tokens"] += prompt_tokens
+            usage["completion_tokens"] += completion_tokens
+
+@contextmanager
+def counted_usage():
+    """
+    Yield a dict adding up the tokens of every completion made in the block,
+    streamed or not, including section requests on other threads. Calls that
+    join another caller's request in flight cost nothing and add nothing.
+    """
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    token = _counted_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _counted_usage.reset(token)
+
+@contextmanager
+def speculative():
+    """
+    Mark the lookups made in the block, including section requests on other
+    threads, as speculative, such as prefetches. They are not counted as
+    requests for the profile, so they do not make it popular enough to be
+    refreshed ahead of expiry.
+    """
+    token = _speculative.set(True)
+    try:
+        yield
+    finally:
+        _speculative.reset(token)
+
+def record_request(cache_key, regenerate):
+    """Count a request for cache_key towards its popularity, unless it is speculative"""
+    if not _speculative.get():
+        get_default_refresher().record(cache_key, regenerate)
+
+def stream_usage(chunk):
+    """
+    Token counts reported by a stream chunk as (prompt, completion), or None.
+    Groq reports them on the last chunk in its x_groq extension field.
+    """
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        extension = getattr(chunk, "x_groq", None)
+        usage = extension.get("usage") if isinstance(extension, dict) else getattr(extension, "usage", None)
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return usage.prompt_tokens, usage.completion_tokens
+
+def stream_profile(messages, label, schema=None, section=None, max_tokens=4096):
+    """
+    Request a profile as a streamed completion, yielding (field, value) pairs
+    as soon as each top-level field of the JSON object is complete. The text
+    is repaired as it arrives. Fields that do not match the schema are held
+    back for repair. Returns the parsed profile once the stream ends.
+    Records the time to the first token, the total time, the time spent
+    repairing and parsing, and the token counts if the API reports them.
+    """
+    repairer = JSONRepairer()
+    parser = IncrementalJSONParser()
+    raw = []
+    emitted = set()
+    labels = dict(section=section or "profile", stage="generate", mode="stream")
+
+    def emit(fields):
+        for field, value in fields:
+            if schema is None or field not in schema or matches(value, schema[field]):
+                emitted.add(field)
+                yield field, value
+
+    admit(label)
+    started = time.perf_counter()
+    try:
+        stream = get_client().create(
+            model=MODEL,
+            messages=messages,
+            temperature=0.5,
+            max_tokens=max_tokens,
+            stream=True
+        )
+    except Exception as e:
+        get_default_admission().release()
+        observe("llm_request_seconds", time.perf_counter() - started, **labels)
+        raise UpstreamError(f"Error fetching {label}: {str(e)}") from e
+
+    parse_seconds = 0.0
+    try:
+        for chunk in stream:
+            counts = stream_usage(chunk)
+            if counts is not None:
+                record_usage(*counts, labels)
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            if not raw:
+                observe("llm_ttft_seconds", time.perf_counter() - started, **labels)
+            raw.append(chunk.choices[0].delta.content)
+            parse_started = time.perf_counter()
+            fields = parser.feed(repairer.feed(raw[-1]))
+            parse_seconds += time.perf_counter() - parse_started
+            yield from emit(fields)
+    except Exception as e:
+        raise ProfileFetchError(f"Error fetching {label}: {str(e)}") from e
+    finally:
+        get_default_admission().release()
+        observe("llm_request_seconds", time.perf_counter() - started, **labels)
+    yield from emit(parser.feed(repairer.close()))
+    observe("json_repair_seconds", parse_seconds, mode="stream")
+
+    # The full document is authoritative; emit anything the incremental parser missed
+    profile = load_profile(parser.buffer, repairer, "".join(raw), label)
+    yield from emit((field, value) for field, value in profile.items() if field not in emitted)
+    return profile
+
+def parse_profile(response_content, label):
+    """
+    Repair and parse a complete profile document, raising ProfileFetchError
+    with the raw content if no JSON object can be recovered from it
+    """
+    with span("json_repair", mode="document"):
+        repairer = JSONRepairer()
+        repaired = repairer.feed(response_content) + repairer.close()
+    return load_profile(repaired, repairer, response_content, label)
+
+def load_profile(repaired, repairer, raw_content, label):
+    """Parse a repaired document, counting the documents that needed repair and those beyond it"""
+    validation_stats.count("documents")
+    if repairer.repairs:
+        validation_stats.count("repaired_documents")
+    try:
+        with span("json_decode"):
+            return json.loads(repaired)
+    except json.JSONDecodeError as e:
+        validation_stats.count("parse_failures")
+        raise ProfileFetchError(f"Error parsing {label} JSON: {str(e)}", raw_content) from e
+
+def section_fields(section):
+    """Fields requested for a cache section: one for "university.location", all for "university" """
+    _, _, field = section.partition(".")
+    return [field] if field else None
+
+def complete_profile(profile, section, messages_for, label, usage=None):
+    """
+    Validate a profile against the schema of its section and re-request only
+    the fields that are missing or malformed, merging them in. Fields still
+    broken are asked for again, up to REPAIR_ATTEMPTS requests in all.
+    Returns the profile and the list of repaired fields, or raises
+    ProfileFetchError if some fields are still invalid after the repair.
+    """
+    schema = schema_for(section)
+    broken = invalid_fields(profile, schema)
+    if not broken:
+        return profile, []
+
+    validation_stats.count("invalid_documents")
+    profile = dict(profile)
+    repaired, error = [], None
+    for _ in range(REPAIR_ATTEMPTS):
+        repair_usage = {}
+        repair = {}
+        try:
+            repair = request_profile(messages_for(broken), f"{label} ({', '.join(broken)})",
+                                     usage=repair_usage, max_tokens=min(4096, SECTION_MAX_TOKENS * len(broken)),
+                                     section=section, stage="repair")
+        except ProfileFetchError as e:
+            error = e
+
+        validation_stats.count("repair_prompt_tokens", repair_usage.get("prompt_tokens", 0))
+        validation_stats.count("repair_completion_tokens", repair_usage.get("completion_tokens", 0))
+        if usage is not None:
+            for name, amount in repair_usage.items():
+                usage[name] = usage.get(name, 0) + amount
+
+        for field in list(broken):
+            if field in repair and matches(repair[field], schema[field]):
+                profile[field] = repair[field]
+                repaired.append(field)
+                broken.remove(field)
+        if not broken:
+            break
+
+    validation_stats.count("repaired_fields", len(repaired))
+    if broken:
+        validation_stats.count("repair_failures")
+        raise ProfileFetchError(f"Error parsing {label} JSON: missing or invalid {', '.join(broken)}",
+                                json.dumps(profile, indent=2)) from error
+    return profile, repaired
+
+def generate_profile(section, messages_for, label, usage=None, max_tokens=4096):
+    """
+    Request a profile and make it match its schema, re-requesting only the
+    fields that came back missing or malformed
+    """
+    profile = request_profile(messages_for(section_fields(section)), label, usage=usage, max_tokens=max_tokens,
+                              section=section)
+    profile, _ = complete_profile(profile, section, messages_for, label, usage=usage)
+    return profile
+
+def regenerator(section, cache_key, messages_for, label, max_tokens=4096):
+    """Return a job that generates the profile for cache_key and stores it in the cache"""
+    def regenerate():
+        profile = generate_profile(section, messages_for, label, max_tokens=max_tokens)
+        get_default_cache().set(cache_key, section, profile)
+        return profile
+    return regenerate
+
+def serve_stale(cache_key, regenerate, cached):
+    """
+    Unpack a cache lookup, marking an expired profile with REFRESHING and
+    queueing a background refresh of it. If the refresh queue is full, the
+    profile is still marked, and the next lookup of it queues the refresh
+    again.
+    """
+    profile, created_at, fresh = cached
+    if not fresh:
+        get_default_refresher().submit(cache_key, regenerate)
+        profile[REFRESHING] = created_at
+    return profile
+
+def profile_items(profile):
+    """(field, value) pairs of a profile, starting with its REFRESHING pair if it has one"""
+    if REFRESHING in profile:
+        yield REFRESHING, profile[REFRESHING]
+    for field, value in profile.items():
+        if field != REFRESHING:
+            yield field, value
+
+def fetch_cached_profile(section, cache_key, messages_for, label, max_tokens=4096):
+    """
+    Return the cached profile for cache_key, requesting it on a miss. An
+    expired profile is returned at once, marked with REFRESHING, while a
+    fresh one is generated in the background.
+    Identical requests already in flight in this process share one call,
+    and a stream of the same profile in flight is waited for instead.
+    If the API is unavailable, an expired cached copy is served if there is one.
+    """
+    regenerate = regenerator(section, cache_key, messages_for, label, max_tokens)
+    record_request(cache_key, regenerate)
+
+    def fetch():
+        cache = get_default_cache()
+        cached = cache.lookup(cache_key)
+        if cached is not None:
+            return serve_stale(cache_key, regenerate, cached)
+
+        try:
+            return regenerate()
+        except UpstreamError:
+            stale = cache.get_stale(cache_key)
+            if stale is None:
+                raise
+            return stale
+
+    return get_default_flights().do(cache_key, fetch, from_items=dict)
+
+def stream_cached_profile(section, cache_key, messages_for, label):
+    """
+    Yield (field, value) pairs of the cached profile for cache_key, streaming
+    it on a miss. An expired profile is yielded at once, starting with a
+    REFRESHING pair, while a fresh one is generated in the background.
+    Identical streams already in flight in this process are replayed to
+    later callers instead of being requested again, as is the result of a
+    blocking request of the same profile in flight.
+    If the API is unavailable, an expired cached copy is served if there is one.
+    """
+    regenerate = regenerator(section, cache_key, messages_for, label)
+    record_request(cache_key, regenerate)
+
+    def generate():
+        cache = get_default_cache()
+        cached = cache.lookup(cache_key)
+        if cached is not None:
+            yield from profile_items(serve_stale(cache_key, regenerate, cached))
+            return
+
+        try:
+            profile = yield from stream_profile(messages_for(section_fields(section)), label, schema_for(section),
+                                                section=section)
+        except UpstreamError:
+            # Raised before any field was yielded, so the stale copy can stand in whole
+            stale = cache.get_stale(cache_key)
+            if stale is None:
+                raise
+            yield from stale.items()
+            return
+
+        profile, repaired = complete_profile(profile, section, messages_for, label)
+        for field in repaired:
+            yield field, profile[field]
+
+        cache.set(cache_key, section, profile)
+
+    return get_default_flights().stream(cache_key, generate, to_items=profile_items)
+
+def profile_key(section, university, course=None):
+    """
+    Cache key of a university or course profile under the current model and prompt
+    """
+    return make_key(section, university, course, model=MODEL, prompt_version=PROMPT_VERSION)
+
+def canonical_names(university, course=None):
+    """
+    Map typed university and course names onto their canonical forms, so
+    every spelling of the same query shares one cached profile and prompt
+    """
+    return canonical_university(university), canonical_course(course) if course else course
+
+def fetch_profile_sections(section, university, course, messages_for, label):
+    """
+    Generate every top-level field of a profile with its own request, in
+    parallel, yielding (field, value) pairs as each one completes. Fields are
+    cached separately under their own TTL, so stable fields outlive volatile
+    ones and one malformed field does not throw the rest away. Failed fields
+    are reported after all the others have been yielded. A REFRESHING pair is
+    yielded before the first field served stale.
+    """
+    fields = COURSE_FIELDS if section == "course" else UNIVERSITY_FIELDS
+    futures = {}
+    for field in fields:
+        field_section = f"{section}.{field}"
+        # Copied context, so the section requests count towards the caller's session
+        future = section_executor.submit(
+            contextvars.copy_context().run,
+            fetch_cached_profile,
+            field_section,
+            profile_key(field_section, university, course),
+            messages_for,
+            f"{label} ({field})",
+            SECTION_MAX_TOKENS,
+        )
+        futures[future] = field
+
+    errors = []
+    refreshing = False
+    for future in as_completed(futures):
+        field = futures[future]
+        try:
+            value = future.result()
+        except ProfileFetchError as e:
+            errors.append(e)
+            continue
+        if REFRESHING in value and not refreshing:
+            refreshing = True
+            yield REFRESHING, value[REFRESHING]
+        yield field, value[field]
+
+    if errors:
+        raise errors[0]
+
+def tag_fields(pairs, kinds):
+    """
+    Yield (kind, field, value) for the (field, value) pairs of a profile
+    stream, where kinds maps each field to its profile, and return the
+    stream's result
+    """
+    while True:
+        try:
+            field, value = next(pairs)
+        except StopIteration as stop:
+            return stop.value
+        if field in kinds:
+            yield kinds[field], field, value
+
+def stream_fused_profiles(university, course):
+    """
+    Stream the university and course profiles from one request, yielding
+    (kind, field, value) triples. Each profile is then validated, repaired
+    and cached under its own key as if it had been requested alone. A
+    profile that cannot be completed is reported as (kind, None, error).
+    """
+    parts = {
+        "university": (UNIVERSITY_FIELDS, profile_key("university", university),
+                       lambda fields: university_messages(university, fields), "university information"),
+        "course": (COURSE_FIELDS, profile_key("course", university, course),
+                   lambda fields: course_messages(university, course, fields), "course information"),
+    }
+    kinds = {field: kind for kind, (fields, _, _, _) in parts.items() for field in fields}
+    schema = {**schema_for("university"), **schema_for("course")}
+
+    try:
+        profile = yield from tag_fields(
+            stream_profile(fused_messages(university, course), "university and course information", schema,
+                           section="fused", max_tokens=FUSED_MAX_TOKENS),
+            kinds,
+        )
+    except ProfileFetchError as e:
+        for kind in parts:
+            yield kind, None, e
+        return
+
+    cache = get_default_cache()
+    for kind, (fields, cache_key, messages_for, label) in parts.items():
+        try:
+            part, repaired = complete_profile({field: profile[field] for field in fields if field in profile},
+                                              kind, messages_for, label)
+        except ProfileFetchError as e:
+            yield kind, None, e
+            continue
+        for field in repaired:
+            yield kind, field, part[field]
+        cache.set(cache_key, kind, part)
+
+def stored_fused_profiles(university, course):
+    """
+    Yield the university and course profiles of a search from the cache, as
+    (kind, field, value) triples like stream_fused_profiles
+    """
+    parts = {
+        "university": (profile_key("university", university),
+                       lambda fields: university_messages(university, fields), "university information"),
+        "course": (profile_key("course", university, course),
+                   lambda fields: course_messages(university, course, fields), "course information"),
+    }
+    for kind, (cache_key, messages_for, label) in parts.items():
+        try:
+            for field, value in stream_cached_profile(kind, cache_key, messages_for, label):
+                yield kind, field, value
+        except ProfileFetchError as e:
+            yield kind, None, e
+
+def fusable(university, course):
+    """True if a search should be answered by one fused request: neither profile is stored"""
+    if not (FUSED and course) or SECTIONED:
+        return False
+    cache = get_default_cache()
+    return (cache.expiry(profile_key("university", university)) is None
+            and cache.expiry(profile_key("course", university, course)) is None)
+
+def stream_fused_information(kind, university, course):
+    """
+    Yield (field, value) pairs of one profile of a fused request. The
+    university and course sides of a search join the same single flight,
+    so the request is made once and each side picks out its own fields.
+    """
+    key = make_key("fused", university, course, model=MODEL, prompt_version=PROMPT_VERSION)
+
+    def lead():
+        # fusable() was checked when this side was called. If the other side has
+        # since read the whole fused request, both profiles are cached by now.
+        if not fusable(university, course):
+            return stored_fused_profiles(university, course)
+        return stream_fused_profiles(university, course)
+
+    error = None
+    # Read to the end even after an error, so the other side still gets its fields
+    for item_kind, field, value in get_default_flights().stream(key, lead):
+        if item_kind != kind:
+            continue
+        if field is None:
+            error = value
+        else:
+            yield field, value
+    if error is not None:
+        raise error
+
+def get_course_information(university, course):
+    """
+    Get detailed course information using OpenAI API
+    """
+    university, course = canonical_names(university, course)
+    messages_for = lambda fields: course_messages(university, course, fields)
+    if fusable(university, course):
+        return dict(stream_fused_information("course", university, course))
+    if SECTIONED:
+        return dict(fetch_profile_sections("course", university, course, messages_for, "course information"))
+    return fetch_cached_profile("course", profile_key("course", university, course),
+                                messages_for, "course information")
+
+def stream_course_information(university, course):
+    """
+    Yield (field, value) pairs of the course profile as each field completes
+    """
+    university, course = canonical_names(university, course)
+    messages_for = lambda fields: course_messages(university, course, fields)
+    if fusable(university, course):
+        return stream_fused_information("course", university, course)
+    if SECTIONED:
+        return fetch_profile_sections("course", university, course, messages_for, "course information")
+    return stream_cached_profile("course", profile_key("course", university, course),
+                                 messages_for, "course information")
+
+def get_university_info(university, course=None):
+    """
+    Get detailed information about the university using OpenAI API. Pass
+    the course searched for with it, if any, so fused mode can request both
+    profiles at once.
+    """
+    university, course = canonical_names(university, course)
+    messages_for = lambda fields: university_messages(university, fields)
+    if fusable(university, course):
+        return dict(stream_fused_information("university", university, course))
+    if SECTIONED:
+        return dict(fetch_profile_sections("university", university, None, messages_for,
+                                           "university information"))
+    return fetch_cached_profile("university", profile_key("university", university),
+                                messages_for, "university information")
+
+def stream_university_info(university, course=None):
+    """
+    Yield (field, value) pairs of the university profile as each field
+    completes. Pass the course searched for with it, if any, so fused mode
+    can request both profiles at once.
+    """
+    university, course = canonical_names(university, course)
+    messages_for = lambda fields: university_messages(university, fields)
+    if fusable(university, course):
+        return stream_fused_information("university", university, course)
+    if SECTIONED:
+        return fetch_profile_sections("university", university, None, messages_for,
+                                      "university information")
+    return stream_cached_profile("university", profile_key("university", university),
+                                 messages_for, "university information")
@@ -0,0 +1,138 @@
+"""
+Compact, validated records of university and course profiles.
+
+Profiles arrive as nested dicts parsed from the model's JSON. The page
+converts each field into a record once, as it arrives, and renders only
+records from then on:
+
+- Every nested object becomes a namedtuple and every list a tuple, so a
+  profile kept in a session's search history holds no per-object dicts.
+- Text is coerced to str, and values that are missing or of the wrong type
+  are replaced by a placeholder, so a malformed field cannot raise KeyError
+  halfway through a page.
+- Short strings are interned. States, ranks and skills repeated across the
+  profiles a session keeps then share one copy.
+- The salary and tuition ranges the page charts are parsed here, once per
+  profile rather than on every rerun.
+
+Records are immutable and hashable, so rendered sections are memoized on
+the record itself.
+"""
+import sys
+from collections import namedtuple
+
+from metrics import span
+from salary import parse_salary
+from schemas import COURSE_SCHEMA, UNIVERSITY_SCHEMA
+
+# Shown in place of text the model left out or wrote as the wrong type
+MISSING = "Not available"
+
+# Strings up to this length are interned; longer prose rarely repeats
+INTERN_MAX_LENGTH = 80
+
+Location = namedtuple("Location", ["city", "state", "campus_description"])
+Rankings = namedtuple("Rankings", ["world_rank", "national_rank", "subject_strengths"])
+Research = namedtuple("Research", ["focus_areas", "achievements"])
+StudentLife = namedtuple("StudentLife", ["total_students", "international_students", "clubs_societies",
+                                         "accommodation"])
+# The descriptions as written, and their amounts as SalaryRanges in AUD, or None if they have none
+Tuition = namedtuple("Tuition", ["per_semester", "full_course", "per_semester_aud", "full_course_aud"])
+Earnings = namedtuple("Earnings", ["starting", "mid_career", "starting_aud", "mid_career_aud"])
+
+# Whole profiles, with None for fields that did not arrive
+UniversityProfile = namedtuple("UniversityProfile", list(UNIVERSITY_SCHEMA),
+                               defaults=[None] * len(UNIVERSITY_SCHEMA))
+CourseProfile = namedtuple("CourseProfile", list(COURSE_SCHEMA), defaults=[None] * len(COURSE_SCHEMA))
+
+
+def text(value):
+    """A scalar as an interned str if it is short, or the placeholder for anything else"""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return MISSING
+    value = str(value).strip()
+    if not value:
+        return MISSING
+    return sys.intern(value) if len(value) <= INTERN_MAX_LENGTH else value
+
+
+def texts(value):
+    """A list of scalars as a tuple of str; a lone scalar counts as a list of one"""
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        value = [value]
+    if not isinstance(value, list):
+        return ()
+    return tuple(item for item in map(text, value) if item is not MISSING)
+
+
+def structure(record, value, lists=()):
+    """Fill record's fields from the dict value: names in lists as tuples of text, the rest as text"""
+    if not isinstance(value, dict):
+        value = {}
+    return record._make(texts(value.get(name)) if name in lists else text(value.get(name))
+                        for name in record._fields)
+
+
+def amount(description):
+    return parse_salary(description) if description is not MISSING else None
+
+
+def tuition(value):
+    fields = structure(Tuition, value)
+    with span("salary_parse", mode="record"):
+        return fields._replace(per_semester_aud=amount(fields.per_semester),
+                               full_course_aud=amount(fields.full_course))
+
+
+def earnings(value):
+    fields = structure(Earnings, value)
+    with span("salary_parse", mode="record"):
+        return fields._replace(starting_aud=amount(fields.starting), mid_career_aud=amount(fields.mid_career))
+
+
+# Converters of each profile field, by kind
+FIELDS = {
+    "university": {
+        "overview": text,
+        "location": lambda value: structure(Location, value),
+        "rankings": lambda value: structure(Rankings, value, lists=("subject_strengths",)),
+        "facilities": texts,
+        "research": lambda value: structure(Research, value, lists=("focus_areas", "achievements")),
+        "student_life": lambda value: structure(StudentLife, value),
+    },
+    "course": {
+        "course_overview": text,
+        "tuition": tuition,
+        "faculty_reviews": texts,
+        "alumni_reviews": texts,
+        "career_prospects": texts,
+        "skills_taught": texts,
+        "average_earnings": earnings,
+    },
+}
+
+PROFILES = {
+    "university": UniversityProfile,
+    "course": CourseProfile,
+}
+
+
+def field_record(kind, field, value):
+    """The record of one profile field, or None for fields the page does not show"""
+    convert = FIELDS[kind].get(field)
+    return convert(value) if convert is not None else None
+
+
+def profile_record(kind, fields):
+    """A whole profile record from a dict of field records, as built by field_record"""
+    return PROFILES[kind](**{field: value for field, value in fields.items() if field in FIELDS[kind]})
+
+
+def to_record(kind, profile):
+    """Convert a profile dict, as returned by the fetch functions, in one go"""
+    return profile_record(kind, {field: field_record(kind, field, value) for field, value in profile.items()})
+
+
+def record_fields(record):
+    """(field, value) pairs of the fields present in a profile record"""
+    return ((field, value) for field, value in zip(record._fields, record) if value is not None)
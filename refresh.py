@@ -0,0 +1,185 @@
+"""
+Background regeneration of cached profiles.
+
+A profile past its TTL is still served from the cache while a fresh copy is
+generated here, on a small bounded thread pool, so no user waits on a
+regeneration. Every cache hit also counts towards the profile's popularity,
+an exponentially decayed hit count. A scheduler thread periodically
+regenerates popular profiles shortly before they expire, so hot universities
+stay fresh; profiles nobody asks for are left to expire.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import DAY, get_default_cache
+
+REFRESH_WORKERS = int(os.getenv("UNIADVISOR_REFRESH_WORKERS", "2"))
+# Refreshes waiting or running at once; further stale hits are not queued
+REFRESH_QUEUE = int(os.getenv("UNIADVISOR_REFRESH_QUEUE", "64"))
+# Seconds between passes of the scheduler over popular profiles; 0 disables it
+REFRESH_INTERVAL = float(os.getenv("UNIADVISOR_REFRESH_INTERVAL", "300"))
+# Decayed hits a profile needs to be refreshed ahead of expiry, and their half-life
+REFRESH_MIN_HITS = float(os.getenv("UNIADVISOR_REFRESH_MIN_HITS", "3"))
+REFRESH_HALF_LIFE = float(os.getenv("UNIADVISOR_REFRESH_HALF_LIFE", str(DAY)))
+
+# Popular profiles are refreshed once this fraction of their TTL is left
+REFRESH_AHEAD = 0.1
+# Profiles whose popularity is tracked; the least popular are forgotten beyond this
+MAX_TRACKED = 10000
+
+logger = logging.getLogger(__name__)
+
+
+class Refresher:
+    """
+    Regenerates profiles in the background, at most once at a time per key.
+
+    Jobs are callables that regenerate a profile and store it in the cache.
+    The job for each key is remembered with its popularity, so the scheduler
+    can run it again when the cached copy is about to expire.
+    """
+
+    def __init__(self, cache, workers=REFRESH_WORKERS, max_pending=REFRESH_QUEUE, min_hits=REFRESH_MIN_HITS,
+                 half_life=REFRESH_HALF_LIFE, ahead=REFRESH_AHEAD):
+        self.cache = cache
+        self.max_pending = max_pending
+        self.min_hits = min_hits
+        self.half_life = half_life
+        self.ahead = ahead
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="profile-refresh")
+        self._pending = set()
+        self._popularity = {}  # key -> [decayed hits, updated_at, job]
+        self._stop = threading.Event()
+        self._counters = {"queued": 0, "refreshed": 0, "failed": 0, "dropped": 0, "scheduled": 0}
+
+    def _decayed(self, hits, updated_at, now):
+        return hits * 0.5 ** ((now - updated_at) / self.half_life)
+
+    def record(self, key, job):
+        """Count a request for key and remember how to regenerate it"""
+        now = time.time()
+        with self._lock:
+            entry = self._popularity.get(key)
+            hits = self._decayed(entry[0], entry[1], now) if entry is not None else 0.0
+            self._popularity[key] = [hits + 1, now, job]
+            if len(self._popularity) > MAX_TRACKED:
+                self._forget_coldest(now)
+
+    def _forget_coldest(self, now):
+        # Caller must hold self._lock; drops the least popular tenth in one go
+        ranked = sorted(self._popularity, key=lambda key: self._decayed(*self._popularity[key][:2], now))
+        for key in ranked[:max(1, len(ranked) // 10)]:
+            del self._popularity[key]
+
+    def popularity(self, key):
+        """Decayed hit count of key"""
+        with self._lock:
+            entry = self._popularity.get(key)
+            return self._decayed(entry[0], entry[1], time.time()) if entry is not None else 0.0
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def submit(self, key, job):
+        """
+        Queue a regeneration of key unless one is already pending. Returns
+        False if the queue is full and the refresh was dropped.
+        """
+        with self._lock:
+            if key in self._pending:
+                return True
+            if len(self._pending) >= self.max_pending:
+                self._counters["dropped"] += 1
+                return False
+            self._pending.add(key)
+            self._counters["queued"] += 1
+        self._executor.submit(self._run, key, job)
+        return True
+
+    def _run(self, key, job):
+        try:
+            job()
+        except Exception as e:
+            logger.warning("Background refresh of %s failed: %s", key, e)
+            outcome = "failed"
+        else:
+            outcome = "refreshed"
+        with self._lock:
+            self._pending.discard(key)
+            self._counters[outcome] += 1
+
+    def due(self):
+        """
+        Popular keys whose cached copy has less than `ahead` of its TTL left,
+        most popular first, as (key, job) pairs
+        """
+        now = time.time()
+        with self._lock:
+            candidates = [(self._decayed(hits, updated_at, now), key, job)
+                          for key, (hits, updated_at, job) in self._popularity.items()
+                          if key not in self._pending]
+        candidates = sorted((c for c in candidates if c[0] >= self.min_hits), key=lambda c: c[0], reverse=True)
+
+        due = []
+        for _, key, job in candidates:
+            expiry = self.cache.expiry(key)
+            if expiry is None:
+                continue
+            created_at, expires_at = expiry
+            if expires_at - now < self.ahead * (expires_at - created_at):
+                due.append((key, job))
+        return due
+
+    def schedule_due(self):
+        """Queue refreshes of the popular profiles about to expire; returns how many were queued"""
+        queued = 0
+        for key, job in self.due():
+            if not self.submit(key, job):
+                break
+            queued += 1
+        with self._lock:
+            self._counters["scheduled"] += queued
+        return queued
+
+    def start(self, interval=REFRESH_INTERVAL):
+        """Run schedule_due every interval seconds on a daemon thread"""
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.schedule_due()
+                except Exception:
+                    logger.exception("Refresh scheduler pass failed")
+
+        if interval > 0:
+            threading.Thread(target=loop, daemon=True, name="refresh-scheduler").start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        """Return refresh counters, the refreshes pending and the profiles tracked"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._pending)
+            stats["tracked"] = len(self._popularity)
+        return stats
+
+
+_default_refresher = None
+_default_refresher_lock = threading.Lock()
+
+
+def get_default_refresher():
+    """Return the process-wide refresher, starting its scheduler on first use"""
+    global _default_refresher
+    with _default_refresher_lock:
+        if _default_refresher is None:
+            _default_refresher = Refresher(get_default_cache())
+            _default_refresher.start()
+        return _default_refresher
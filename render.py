@@ -0,0 +1,508 @@
+"""
+HTML rendering of profile sections.
+
+Streamlit sends every st.* call to the browser as a separate delta, so each
+profile section is built as one HTML block from a template and emitted
+with a single st.markdown call. Sections are built from the records in
+records.py and memoized on them, so reruns that show the same profile only
+look the HTML up.
+"""
+import html
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from metrics import observe
+
+_CSS = """
+@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=Poppins:wght@400;500;600;700&display=swap');
+
+:root {
+    --primary-color: #1e3c72;
+    --secondary-color: #2a5298;
+    --accent-color: #4CAF50;
+    --background-color: #f8f9fa;
+    --card-background: #ffffff;
+    --text-color: #2c3e50;
+    --border-radius: 12px;
+    --box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+}
+
+* {
+    font-family: 'Inter', sans-serif;
+    color: var(--text-color);
+}
+
+h1, h2, h3, .section-header {
+    font-family: 'Poppins', sans-serif !important;
+}
+
+/* Main header styling */
+.main-header {
+    text-align: center;
+    padding: 3rem 2rem;
+    background: linear-gradient(135deg, var(--primary-color) 0%, var(--secondary-color) 100%);
+    border-radius: var(--border-radius);
+    margin-bottom: 2rem;
+    box-shadow: var(--box-shadow);
+    position: relative;
+    overflow: hidden;
+}
+
+.main-header::before {
+    content: "";
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    bottom: 0;
+    background: linear-gradient(45deg, rgba(255,255,255,0.1) 0%, rgba(255,255,255,0) 100%);
+    pointer-events: none;
+}
+
+.main-header h1 {
+    font-size: 3.5rem !important;
+    font-weight: 700 !important;
+    margin-bottom: 1rem !important;
+    color: white !important;
+    text-shadow: 2px 2px 4px rgba(0,0,0,0.2);
+}
+
+.main-header p {
+    font-size: 1.4rem !important;
+    color: rgba(255, 255, 255, 0.9) !important;
+    max-width: 800px;
+    margin: 0 auto !important;
+}
+
+/* Card styling */
+.card {
+    background: var(--card-background);
+    padding: 1.8rem;
+    border-radius: var(--border-radius);
+    box-shadow: var(--box-shadow);
+    margin-bottom: 1.5rem;
+    border: 1px solid rgba(0,0,0,0.05);
+    transition: transform 0.3s ease, box-shadow 0.3s ease;
+}
+
+.card:hover {
+    transform: translateY(-5px);
+    box-shadow: 0 6px 12px rgba(0,0,0,0.15);
+}
+
+/* Metric card styling */
+.metric-card {
+    background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
+    padding: 1.8rem;
+    border-radius: var(--border-radius);
+    box-shadow: var(--box-shadow);
+    transition: all 0.3s ease;
+    border: 1px solid rgba(0,0,0,0.05);
+}
+
+.metric-card:hover {
+    transform: translateY(-5px);
+    box-shadow: 0 6px 12px rgba(0,0,0,0.15);
+}
+
+/* Section headers */
+.section-header {
+    color: var(--primary-color);
+    padding: 1rem 0;
+    border-bottom: 2px solid rgba(30, 60, 114, 0.1);
+    margin: 2rem 0 1.5rem 0;
+    font-size: 2rem !important;
+    font-weight: 600 !important;
+    display: flex;
+    align-items: center;
+    gap: 0.5rem;
+}
+
+/* Form styling */
+.stTextInput input {
+    font-size: 1.1rem !important;
+    padding: 0.8rem 1rem !important;
+    border-radius: var(--border-radius) !important;
+    border: 1px solid rgba(0,0,0,0.1) !important;
+    transition: all 0.3s ease;
+}
+
+.stTextInput input:focus {
+    border-color: var(--primary-color) !important;
+    box-shadow: 0 0 0 2px rgba(30, 60, 114, 0.1) !important;
+}
+
+.stButton button {
+    font-size: 1.2rem !important;
+    padding: 0.8rem 1.5rem !important;
+    font-weight: 600 !important;
+    border-radius: var(--border-radius) !important;
+    background: linear-gradient(135deg, var(--primary-color) 0%, var(--secondary-color) 100%) !important;
+    transition: all 0.3s ease !important;
+    border: none !important;
+}
+
+.stButton button:hover {
+    transform: translateY(-2px) !important;
+    box-shadow: 0 4px 8px rgba(0,0,0,0.2) !important;
+}
+
+/* Overview text styling */
+.overview-text {
+    font-size: 1.2rem !important;
+    line-height: 1.8 !important;
+    padding: 2rem;
+    background: linear-gradient(135deg, #f8f9fa 0%, #ffffff 100%);
+    border-radius: var(--border-radius);
+    margin-bottom: 2rem;
+    border-left: 4px solid var(--primary-color);
+    box-shadow: var(--box-shadow);
+}
+
+/* Alert styling */
+.stAlert {
+    font-size: 1.1rem !important;
+    padding: 1rem !important;
+    margin-bottom: 1rem !important;
+    border-radius: var(--border-radius) !important;
+    animation: slideIn 0.5s ease-out;
+}
+
+/* Statistics cards */
+.stat-card {
+    text-align: center;
+    padding: 1.5rem;
+    background: white;
+    border-radius: var(--border-radius);
+    box-shadow: var(--box-shadow);
+    transition: all 0.3s ease;
+    border: 1px solid rgba(0,0,0,0.05);
+}
+
+.stat-card:hover {
+    transform: translateY(-5px);
+    box-shadow: 0 6px 12px rgba(0,0,0,0.15);
+}
+
+.stat-value {
+    font-size: 2rem !important;
+    font-weight: 700 !important;
+    color: var(--primary-color) !important;
+    margin-bottom: 0.5rem !important;
+}
+
+.stat-label {
+    font-size: 1.1rem !important;
+    color: #666 !important;
+    font-weight: 500 !important;
+}
+
+/* Bullet points */
+.bullet-point {
+    font-size: 1.1rem !important;
+    line-height: 1.8 !important;
+    margin-bottom: 0.8rem !important;
+    padding-left: 1.5rem !important;
+    position: relative;
+}
+
+.bullet-point::before {
+    content: "•";
+    color: var(--primary-color);
+    font-size: 1.5rem;
+    position: absolute;
+    left: 0;
+    top: -0.2rem;
+}
+
+/* Animations */
+@keyframes slideIn {
+    from {
+        transform: translateY(20px);
+        opacity: 0;
+    }
+    to {
+        transform: translateY(0);
+        opacity: 1;
+    }
+}
+
+/* Expander styling */
+.streamlit-expanderHeader {
+    font-size: 1.1rem !important;
+    font-weight: 600 !important;
+    color: var(--primary-color) !important;
+    background-color: rgba(30, 60, 114, 0.05) !important;
+    border-radius: var(--border-radius) !important;
+    transition: all 0.3s ease !important;
+}
+
+.streamlit-expanderHeader:hover {
+    background-color: rgba(30, 60, 114, 0.1) !important;
+}
+
+/* Custom scrollbar */
+::-webkit-scrollbar {
+    width: 10px;
+}
+
+::-webkit-scrollbar-track {
+    background: #f1f1f1;
+    border-radius: 5px;
+}
+
+::-webkit-scrollbar-thumb {
+    background: var(--primary-color);
+    border-radius: 5px;
+}
+
+::-webkit-scrollbar-thumb:hover {
+    background: var(--secondary-color);
+}
+
+/* Loading spinner */
+.stSpinner > div {
+    border-color: var(--primary-color) !important;
+}
+/* Grids replacing Streamlit columns inside a single HTML block */
+.stat-grid, .metric-grid {
+    display: grid;
+    gap: 1rem;
+}
+
+.stat-grid {
+    grid-template-columns: repeat(auto-fit, minmax(160px, 1fr));
+}
+
+.metric-grid {
+    grid-template-columns: repeat(auto-fit, minmax(240px, 1fr));
+}
+
+.card h3 {
+    color: var(--primary-color) !important;
+}
+
+.metric-label {
+    font-size: 0.9rem;
+    color: #666 !important;
+}
+
+.metric-value {
+    font-size: 2rem;
+    font-weight: 600;
+}
+
+/* Reviews, coloured like Streamlit's info and success alerts */
+.review {
+    padding: 1rem;
+    margin-bottom: 1rem;
+    border-radius: var(--border-radius);
+    animation: slideIn 0.5s ease-out;
+}
+
+.review-faculty {
+    background-color: rgba(28, 131, 225, 0.1);
+}
+
+.review-alumni {
+    background-color: rgba(33, 195, 84, 0.1);
+}
+"""
+
+
+def minify_css(css):
+    """Drop comments and collapse whitespace"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,>])\s*", r"\1", css).strip()
+
+
+# Built once per process and injected with one call per page
+STYLESHEET = f"<style>{minify_css(_CSS)}</style>"
+
+PAGE_HEADER = (
+    '<div class="main-header">'
+    "<h1>🎓 Manish Paneru's AID to Australian Universities</h1>"
+    "<p>Comprehensive information about courses and universities in Australia</p>"
+    "</div>"
+)
+
+# Section templates. Everything is kept on one line: a blank line would end
+# the HTML block and hand the rest to the markdown parser.
+SECTION_HEADER = '<h2 class="section-header">{title}</h2>'
+OVERVIEW = SECTION_HEADER + '<div class="overview-text">{text}</div>'
+CARD = '<div class="card"><h3>{title}</h3>{body}</div>'
+LINE = "<p>{text}</p>"
+ITEM = "<p>• {text}</p>"
+FIELD = "<p><strong>{label}:</strong> {text}</p>"
+STAT = '<div class="stat-card"><div class="stat-value">{value}</div><div class="stat-label">{label}</div></div>'
+METRIC = '<div class="metric-card"><div class="metric-label">{label}</div><div class="metric-value">{value}</div></div>'
+REVIEW = '<div class="review review-{kind}">💬 {text}</div>'
+BULLET = '<div class="bullet-point">• {text}</div>'
+
+
+def text(value):
+    """Escape a model-written value for HTML, keeping its line breaks"""
+    return html.escape(str(value), quote=False).replace("\r\n", "\n").replace("\n", "<br>")
+
+
+def lines(template, values, **fields):
+    return "".join(template.format(text=text(value), **fields) for value in values)
+
+
+def overview_html(title, overview):
+    return OVERVIEW.format(title=title, text=text(overview))
+
+
+def location_html(location):
+    return CARD.format(title="📍 Location", body=(
+        FIELD.format(label="City", text=text(location.city))
+        + FIELD.format(label="State", text=text(location.state))
+        + FIELD.format(label="Campus", text=text(location.campus_description))
+    ))
+
+
+def rankings_html(rankings):
+    return CARD.format(title="🏆 Rankings", body=(
+        FIELD.format(label="World Rank", text=text(rankings.world_rank))
+        + FIELD.format(label="National Rank", text=text(rankings.national_rank))
+        + LINE.format(text="<strong>Subject Strengths:</strong>")
+        + lines(ITEM, rankings.subject_strengths)
+    ))
+
+
+def student_life_html(student_life):
+    stats = [
+        (student_life.total_students, "Total Students"),
+        (student_life.international_students, "International Students"),
+        (student_life.clubs_societies, "Clubs & Societies"),
+        ("24/7", "Campus Support"),
+    ]
+    return (SECTION_HEADER.format(title="👥 Student Life")
+            + '<div class="stat-grid">'
+            + "".join(STAT.format(value=text(value), label=html.escape(label)) for value, label in stats)
+            + "</div>")
+
+
+def tuition_html(tuition):
+    return (SECTION_HEADER.format(title="💰 Tuition Costs")
+            + '<div class="metric-grid">'
+            + METRIC.format(label="Per Semester", value=text(tuition.per_semester))
+            + METRIC.format(label="Full Course", value=text(tuition.full_course))
+            + "</div>")
+
+
+def list_html(title, template, values, **fields):
+    return SECTION_HEADER.format(title=title) + lines(template, values, **fields)
+
+
+# Builders of each profile field's HTML, from the field's record
+SECTIONS = {
+    "university": {
+        "overview": lambda value: overview_html("🏛️ University Overview", value),
+        "location": location_html,
+        "rankings": rankings_html,
+        "student_life": student_life_html,
+        "facilities": lambda value: CARD.format(title="🏢 Facilities", body=lines(LINE, value)),
+        "research": lambda value: CARD.format(title="🔬 Research Focus", body=lines(ITEM, value.focus_areas)),
+    },
+    "course": {
+        "course_overview": lambda value: overview_html("📋 Course Details", value),
+        "tuition": tuition_html,
+        "faculty_reviews": lambda value: list_html("👨‍🏫 Faculty Reviews", REVIEW, value, kind="faculty"),
+        "alumni_reviews": lambda value: list_html("👨‍🎓 Alumni Reviews", REVIEW, value, kind="alumni"),
+        "career_prospects": lambda value: list_html("🎯 Career Prospects", BULLET, value),
+        "skills_taught": lambda value: list_html("🔧 Skills Taught", BULLET, value),
+        "average_earnings": lambda value: SECTION_HEADER.format(title="💸 Average Earnings"),
+    },
+}
+
+
+def section_html(kind, field, record):
+    """
+    HTML of one profile field's record, or None for fields without a
+    section. Memoized on the record, so a profile shown again is not rebuilt.
+    """
+    if field not in SECTIONS[kind]:
+        return None
+    return _section_html(kind, field, record)
+
+
+@lru_cache(maxsize=1024)
+def _section_html(kind, field, record):
+    return SECTIONS[kind][field](record)
+
+
+class RenderStats:
+    """
+    Deltas sent to the browser per page and the time spent rendering
+    profile sections, to keep the cost of a rerun visible
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {
+            "pages": 0,
+            "deltas": 0,
+            "delta_bytes": 0,
+            "sections": 0,
+            "render_seconds": 0.0,
+            "last_page_deltas": 0,
+        }
+
+    @contextmanager
+    def page(self):
+        """Count the deltas the current script run sends while the block runs"""
+        ctx = get_script_run_ctx()
+        if ctx is None:
+            yield
+            return
+        counted = {"deltas": 0, "delta_bytes": 0}
+        enqueue = ctx._enqueue
+
+        def counting_enqueue(msg):
+            if msg.WhichOneof("type") == "delta":
+                counted["deltas"] += 1
+                counted["delta_bytes"] += msg.ByteSize()
+            enqueue(msg)
+
+        ctx._enqueue = counting_enqueue
+        try:
+            yield
+        finally:
+            ctx._enqueue = enqueue
+            with self._lock:
+                self._counters["pages"] += 1
+                self._counters["deltas"] += counted["deltas"]
+                self._counters["delta_bytes"] += counted["delta_bytes"]
+                self._counters["last_page_deltas"] = counted["deltas"]
+
+    @contextmanager
+    def section(self, field):
+        """Time the rendering of one profile section"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            observe("render_section_seconds", elapsed, field=field)
+            with self._lock:
+                self._counters["sections"] += 1
+                self._counters["render_seconds"] += elapsed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        pages, sections = stats["pages"], stats["sections"]
+        stats["deltas_per_page"] = stats["deltas"] / pages if pages else 0.0
+        stats["bytes_per_page"] = stats["delta_bytes"] / pages if pages else 0.0
+        stats["ms_per_section"] = 1000 * stats["render_seconds"] / sections if sections else 0.0
+        return stats
+
+
+render_stats = RenderStats()
@@ -0,0 +1,208 @@
+"""
+Salary normalization for the free-text figures models write, such as
+"$65,000 - $80,000 after 3 years", "$65-80k", "$35 per hour" or
+"120K AUD p.a.".
+
+Every amount is converted to AUD per year. Numbers qualified as years or
+percentages, calendar years and small bare numbers are not amounts. A
+description yields the minimum, maximum and median of its amounts.
+
+parse_salary() handles one value in plain Python. parse_salaries() handles
+a whole pandas Series or array with the same pattern in one findall pass,
+applying the rules column-wise.
+
+Tuition descriptions often give several figures on different bases, such
+as "$45,000 per year, $135,000 total", so no median of them means anything.
+parse_tuition() picks the one amount stated on the basis asked for instead.
+"""
+import re
+from collections import namedtuple
+from statistics import median
+
+import pandas as pd
+
+SalaryRange = namedtuple("SalaryRange", ["minimum", "maximum", "median"])
+
+# One amount, with the qualifiers that decide whether and how it counts. The
+# pay period, if any, follows the amount ("$35 per hour", "120K AUD p.a.")
+AMOUNT = re.compile(
+    r"(?P<currency>A?\$|AUD\s*)?"
+    r"(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+    r"(?P<thousands>\s*(?:[kK]|thousand)\b)?"
+    r"(?P<percent>\s*%)?"
+    r"(?P<years>\s*\+?\s*(?:years?|yrs?)\b)?"
+    r"(?:\s*AUD)?"
+    r"(?i:\s*(?:(?:per|an?|each)\s+|/\s*)(?P<period>hour|hr|week|wk|fortnight|month|mth|year|yr|annum)\b"
+    r"|\s*(?P<adverb>hourly|weekly|fortnightly|monthly|annually|yearly|p\.?\s?a|p\.?\s?w|p\.?\s?h)(?![a-z]))?"
+    r"(?P<range>\s*(?:-|–|—|to|and)\s*(?=(?:A?\$|AUD\s*)?\d))?"
+)
+
+_GROUPS = list(AMOUNT.groupindex)
+
+# Multipliers from a pay period to a year, assuming a 38-hour week
+ANNUAL_FACTORS = {
+    "hour": 38 * 52, "hr": 38 * 52, "hourly": 38 * 52, "ph": 38 * 52,
+    "week": 52, "wk": 52, "weekly": 52, "pw": 52,
+    "fortnight": 26, "fortnightly": 26,
+    "month": 12, "mth": 12, "monthly": 12,
+    "year": 1, "yr": 1, "annum": 1, "annually": 1, "yearly": 1, "pa": 1,
+}
+
+# Bare numbers in this range without a "$" or thousands separator are years, e.g. "(QS 2024)"
+CALENDAR_YEARS = (1900, 2100)
+
+
+def period_factor(period, adverb):
+    """Multiplier turning an amount paid per period into a yearly figure"""
+    unit = (period or adverb or "").lower().replace(".", "").replace(" ", "")
+    return ANNUAL_FACTORS.get(unit, 1)
+
+
+def parse_salary(value):
+    """
+    Return the SalaryRange of a salary description in AUD per year, or None
+    if it contains no amount. Numbers are read like a description of them.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    text = value if isinstance(value, str) else str(value)
+
+    matches = list(AMOUNT.finditer(text))
+    amounts = []
+    factor = None
+    for i, match in enumerate(matches):
+        if factor is None and (match["period"] or match["adverb"]):
+            # The first pay period mentioned applies to the whole description
+            factor = period_factor(match["period"], match["adverb"])
+        if match["percent"] or match["years"]:
+            continue
+        number = float(match["number"].replace(",", ""))
+        thousands = match["thousands"] is not None
+        if (not thousands and match["range"] and number < 1000
+                and i + 1 < len(matches) and matches[i + 1]["thousands"]):
+            # "$65-80k": the suffix applies to both ends of the range
+            thousands = True
+        if thousands:
+            number *= 1000
+        elif not match["currency"]:
+            calendar = CALENDAR_YEARS[0] <= number <= CALENDAR_YEARS[1] and len(match["number"]) == 4
+            if number < 1000 or calendar:
+                continue
+        amounts.append(number)
+
+    if not amounts:
+        return None
+    if factor is not None:
+        amounts = [amount * factor for amount in amounts]
+    return SalaryRange(min(amounts), max(amounts), median(amounts))
+
+
+def parse_salaries(values):
+    """
+    Parse many salary descriptions at once. Returns a DataFrame with
+    minimum, maximum and median columns, aligned with values, holding NaN
+    where a description has no amount.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    # Descriptions repeat (the same course in several comparisons), so each
+    # distinct one is parsed once and the results are spread back out
+    codes, uniques = pd.factorize(series.astype("string"))
+    text = pd.Series(uniques, dtype=object)
+    result = pd.DataFrame(index=text.index, columns=list(SalaryRange._fields), dtype=float)
+
+    found = text.str.findall(AMOUNT).explode().dropna()
+    if not found.empty:
+        found = pd.DataFrame(found.tolist(), index=found.index, columns=_GROUPS)
+        number = pd.Series([float(n.replace(",", "")) for n in found["number"]], index=found.index)
+        has_thousands = found["thousands"] != ""
+        next_has_thousands = has_thousands.groupby(level=0).shift(-1, fill_value=False)
+        thousands = has_thousands | ((found["range"] != "") & (number < 1000) & next_has_thousands)
+
+        bare = (found["currency"] == "") & ~thousands
+        calendar = number.between(*CALENDAR_YEARS) & (found["number"].str.len() == 4)
+        keep = ((found["percent"] == "") & (found["years"] == "")
+                & ~(bare & ((number < 1000) | calendar)))
+
+        # Few distinct periods occur, so each is looked up once
+        period = found["period"] + found["adverb"]
+        factors = {unit: period_factor(unit, None) for unit in period.unique() if unit}
+        factor = period.map(factors).groupby(level=0).first()
+
+        amounts = number.where(~thousands, number * 1000)[keep]
+        amounts = amounts.mul(factor.reindex(amounts.index.unique()).fillna(1))
+        grouped = amounts.groupby(level=0)
+        result["minimum"] = grouped.min()
+        result["maximum"] = grouped.max()
+        result["median"] = grouped.median()
+
+    return result.reindex(codes).set_axis(series.index)
+
+
+# One tuition amount and the basis it is stated on: after it ("per
+# semester", "p.a.", "in total", "for the full degree") or before it ("Total: $135,000")
+TUITION_AMOUNT = re.compile(
+    r"(?i:(?P<lead>\btotal(?:\s+(?:of|cost|fees?))?\s*:?\s*))?"
+    r"(?P<currency>A?\$|AUD\s*)?"
+    r"(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+    r"(?P<thousands>\s*(?:[kK]|thousand)\b)?"
+    r"(?P<aud>\s*AUD)?"
+    r"(?i:\s*(?:(?:per|an?|each)\s+|/\s*)(?P<period>semester|year|yr|annum)\b"
+    r"|\s*(?P<adverb>p\.?\s?a|annually|yearly)(?![a-z])"
+    r"|\s*(?P<total>(?:in\s+)?total|overall|for\s+the\s+(?:full|whole|entire)\s+(?:course|degree|program(?:me)?)\b))?"
+)
+
+# Australian universities teach two semesters a year
+SEMESTERS_PER_YEAR = 2
+
+# Amounts accepted for each basis, in order of preference, with the factor
+# converting them; an amount stated on no basis is taken to be on the field's own
+TUITION_BASES = {
+    "semester": [("semester", 1), ("year", 1 / SEMESTERS_PER_YEAR), (None, 1)],
+    "total": [("total", 1), (None, 1)],
+}
+
+
+def parse_tuition(value, basis="semester"):
+    """
+    Return the tuition in AUD per semester, or for the whole course if basis
+    is "total", of a tuition description, or None if it states no amount
+    on that basis. A yearly amount is halved for the semester basis; the
+    course total is never derived, since the course length is not known.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    text = value if isinstance(value, str) else str(value)
+
+    amounts = {}  # basis -> first amount stated on it
+    for match in TUITION_AMOUNT.finditer(text):
+        # Bare numbers are durations, years and counts rather than fees
+        if not (match["currency"] or match["aud"] or match["thousands"] or "," in match["number"]):
+            continue
+        number = float(match["number"].replace(",", ""))
+        if match["thousands"]:
+            number *= 1000
+        if match["lead"] or match["total"]:
+            unit = "total"
+        elif match["period"]:
+            unit = "semester" if match["period"].lower() == "semester" else "year"
+        elif match["adverb"]:
+            unit = "year"
+        else:
+            unit = None
+        amounts.setdefault(unit, number)
+
+    for unit, factor in TUITION_BASES[basis]:
+        if unit in amounts:
+            return amounts[unit] * factor
+    return None
+
+
+def parse_tuitions(values, basis="semester"):
+    """
+    Parse many tuition descriptions at once on one basis. Returns a float
+    Series aligned with values, holding NaN where no amount is found.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    codes, uniques = pd.factorize(series.astype("string"))
+    amounts = pd.Series([parse_tuition(text, basis) for text in uniques], dtype=float)
+    return amounts.reindex(codes).set_axis(series.index)
@@ -0,0 +1,113 @@
+import threading
+
+# Placeholder for a scalar the page prints as text. Models often answer
+# numbers (e.g. total_students) where the prompt shows a string, so both pass.
+TEXT = "text"
+
+# Declared structure of each profile type. A dict requires every listed key,
+# a one-element list requires a non-empty list whose items match the element.
+UNIVERSITY_SCHEMA = {
+    "overview": TEXT,
+    "location": {
+        "city": TEXT,
+        "state": TEXT,
+        "campus_description": TEXT,
+    },
+    "rankings": {
+        "world_rank": TEXT,
+        "national_rank": TEXT,
+        "subject_strengths": [TEXT],
+    },
+    "facilities": [TEXT],
+    "research": {
+        "focus_areas": [TEXT],
+        "achievements": [TEXT],
+    },
+    "student_life": {
+        "total_students": TEXT,
+        "international_students": TEXT,
+        "clubs_societies": TEXT,
+        "accommodation": TEXT,
+    },
+}
+
+COURSE_SCHEMA = {
+    "course_overview": TEXT,
+    "tuition": {
+        "per_semester": TEXT,
+        "full_course": TEXT,
+    },
+    "faculty_reviews": [TEXT],
+    "alumni_reviews": [TEXT],
+    "career_prospects": [TEXT],
+    "skills_taught": [TEXT],
+    "average_earnings": {
+        "starting": TEXT,
+        "mid_career": TEXT,
+    },
+}
+
+SCHEMAS = {
+    "university": UNIVERSITY_SCHEMA,
+    "course": COURSE_SCHEMA,
+}
+
+
+def schema_for(section):
+    """
+    Schema for a cache section: a whole profile ("university") or a single
+    top-level field of one ("university.location")
+    """
+    kind, _, field = section.partition(".")
+    schema = SCHEMAS[kind]
+    if field:
+        return {field: schema[field]}
+    return schema
+
+
+def matches(value, spec):
+    """Return True if value has the structure described by spec"""
+    if spec == TEXT:
+        return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+    if isinstance(spec, list):
+        return isinstance(value, list) and len(value) > 0 and all(matches(item, spec[0]) for item in value)
+    if isinstance(spec, dict):
+        return isinstance(value, dict) and all(key in value and matches(value[key], item)
+                                               for key, item in spec.items())
+    return False
+
+
+def invalid_fields(profile, schema):
+    """Return the top-level fields of schema that are missing from profile or malformed"""
+    if not isinstance(profile, dict):
+        return list(schema)
+    return [field for field, spec in schema.items() if field not in profile or not matches(profile[field], spec)]
+
+
+class ValidationStats:
+    """Counters for malformed output, schema violations and the cost of repairing them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {
+            "documents": 0,
+            "repaired_documents": 0,
+            "parse_failures": 0,
+            "invalid_documents": 0,
+            "repaired_fields": 0,
+            "repair_failures": 0,
+            "repair_prompt_tokens": 0,
+            "repair_completion_tokens": 0,
+        }
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        documents = stats["documents"]
+        stats["parse_failure_rate"] = stats["parse_failures"] / documents if documents else 0.0
+        stats["repair_tokens"] = stats["repair_prompt_tokens"] + stats["repair_completion_tokens"]
+        return stats
@@ -0,0 +1,319 @@
+"""
+Full-text, facet and numeric-range search over generated profiles.
+
+Questions such as "which courses teach machine learning and start above
+$70k?" are answered from profiles already in the cache, without any API
+call. Every profile row written to the cache is indexed as a document: a
+course with its skills, career prospects, tuition and salaries, or a
+university with its research focus areas and subject strengths. Postings are
+kept per field as term -> {document: term frequency}; salaries are
+normalized to AUD per year and tuition to AUD per semester or for the whole
+course with the salary engine, and both are kept sorted for range queries.
+
+The index follows the cache incrementally, reading only rows written since
+its last sync, so profiles generated by any worker process or by prewarm.py
+show up on the next query. The extracted documents, not the postings, are
+persisted gzipped at UNIADVISOR_INDEX_PATH; the postings are rebuilt from
+them on load.
+"""
+import gzip
+import json
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+
+from cache import get_default_cache
+from canonical import COURSE_INDEX, UNIVERSITY_INDEX
+from salary import parse_salary, parse_tuition
+
+INDEX_PATH = os.getenv("UNIADVISOR_INDEX_PATH", "uniadvisor_index.json.gz")
+
+# Bump whenever the extracted fields change so saved indexes are rebuilt from the cache
+INDEX_VERSION = 2
+
+# Seconds between syncs with the cache, and between saves of a changed index
+SYNC_INTERVAL = 1.0
+SAVE_INTERVAL = 10.0
+# Rows written this long before the last one seen are read again, in case
+# another process committed them late; indexing a row twice is harmless
+SYNC_OVERLAP = 5.0
+
+# Searchable text of each kind of profile: index field -> path in the profile
+TEXT_FIELDS = {
+    "course": {
+        "skills_taught": ("skills_taught",),
+        "career_prospects": ("career_prospects",),
+    },
+    "university": {
+        "research.focus_areas": ("research", "focus_areas"),
+        "rankings.subject_strengths": ("rankings", "subject_strengths"),
+    },
+}
+
+# Numeric fields of course profiles: salaries in AUD per year, tuition in AUD
+NUMBER_FIELDS = {
+    "tuition_per_semester": ("tuition", "per_semester"),
+    "tuition_full_course": ("tuition", "full_course"),
+    "starting_salary": ("average_earnings", "starting"),
+    "mid_career_salary": ("average_earnings", "mid_career"),
+}
+# Basis of each tuition field; the other number fields are salaries
+TUITION_FIELDS = {"tuition_per_semester": "semester", "tuition_full_course": "total"}
+
+STOPWORDS = frozenset({"a", "an", "and", "are", "as", "at", "by", "for", "from", "in", "into", "is", "it", "of",
+                       "on", "or", "the", "to", "with", "within", "their", "its", "that", "this"})
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[+#][a-z0-9+#]*)?")
+
+
+def tokens(text):
+    """Lower-case terms of text without stopwords, with a plural "s" dropped"""
+    terms = []
+    for term in _TOKEN.findall(text.casefold()):
+        if term in STOPWORDS:
+            continue
+        if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+def lookup(profile, path):
+    for part in path:
+        if not isinstance(profile, dict):
+            return None
+        profile = profile.get(part)
+    return profile
+
+
+def display_name(index, normalized):
+    """Canonical name of a normalized name from a cache key, or the name in title case"""
+    return index.canonical(normalized) or normalized.title()
+
+
+class ProfileIndex:
+    """
+    Inverted index over profile documents. Safe to query and update from any
+    thread.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.synced_at = 0.0
+        self._lock = threading.Lock()
+        self._docs = {}
+        self._postings = {field: defaultdict(dict) for fields in TEXT_FIELDS.values() for field in fields}
+        self._numbers = {name: [] for name in NUMBER_FIELDS}  # sorted (value, document id)
+        self._last_sync = 0.0
+        self._last_save = time.monotonic()
+        self._dirty = False
+
+    def load(self):
+        """Read the saved documents, if any, and rebuild their postings. Returns True if they were read."""
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return self.restore(saved)
+
+    def restore(self, saved):
+        """Rebuild the postings of documents as returned by dump(); False if they are of another version"""
+        if not saved or saved.get("version") != INDEX_VERSION:
+            return False
+        with self._lock:
+            for doc_id, doc in saved["docs"].items():
+                self._add(doc_id, doc)
+            self.synced_at = saved["synced_at"]
+        return True
+
+    def dump(self):
+        """A copy of the documents and sync time, as saved"""
+        with self._lock:
+            return {"version": INDEX_VERSION, "synced_at": self.synced_at, "docs": dict(self._docs)}
+
+    def save(self):
+        """Write the documents to disk atomically"""
+        with self._lock:
+            data = json.dumps({"version": INDEX_VERSION, "synced_at": self.synced_at, "docs": self._docs},
+                              separators=(",", ":"), ensure_ascii=False)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        temporary = f"{self.path}.tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temporary, self.path)
+
+    def sync(self, cache, force=False):
+        """
+        Index the cache rows written since the last sync, at most once per
+        SYNC_INTERVAL unless forced. Returns how many rows were read.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_sync < SYNC_INTERVAL:
+                return 0
+            self._last_sync = now
+            synced_at = self.synced_at
+        # The bundle never changes, so only the database's rows need the overlap
+        rows = cache.changed_since(synced_at - SYNC_OVERLAP, bundle_since=synced_at)
+        with self._lock:
+            for key, section, value, created_at in rows:
+                self._index_row(key, section, value)
+                self.synced_at = max(self.synced_at, created_at)
+            self._dirty = self._dirty or self.synced_at > synced_at
+            save = self._dirty and now - self._last_save >= SAVE_INTERVAL
+        if save:
+            self.save()
+        return len(rows)
+
+    def _index_row(self, key, section, value):
+        # Caller must hold self._lock. Field-by-field sections merge into their profile's document.
+        kind = section.split(".", 1)[0]
+        parts = key.split("|")
+        if kind not in TEXT_FIELDS or len(parts) != (5 if kind == "course" else 4) or not isinstance(value, dict):
+            return
+        doc_id = "|".join([kind] + parts[3:])
+        old = self._docs.get(doc_id)
+        doc = {
+            "kind": kind,
+            "university": display_name(UNIVERSITY_INDEX, parts[3]),
+            "course": display_name(COURSE_INDEX, parts[4]) if kind == "course" else None,
+            "text": dict(old["text"]) if old else {},
+            "numbers": dict(old["numbers"]) if old else {},
+        }
+        if kind == "university":
+            doc["state"] = lookup(value, ("location", "state")) or (old or {}).get("state")
+        for field, path in TEXT_FIELDS[kind].items():
+            items = lookup(value, path)
+            if isinstance(items, list):
+                doc["text"][field] = [str(item) for item in items]
+        if kind == "course":
+            for name, path in NUMBER_FIELDS.items():
+                if path[0] in value:
+                    text = str(lookup(value, path) or "")
+                    if name in TUITION_FIELDS:
+                        doc["numbers"][name] = parse_tuition(text, TUITION_FIELDS[name])
+                    else:
+                        amount = parse_salary(text)
+                        doc["numbers"][name] = amount.median if amount is not None else None
+        if old is not None:
+            self._remove(doc_id)
+        self._add(doc_id, doc)
+
+    def _add(self, doc_id, doc):
+        # Caller must hold self._lock
+        self._docs[doc_id] = doc
+        for field, items in doc["text"].items():
+            for term, count in Counter(term for item in items for term in tokens(item)).items():
+                self._postings[field][term][doc_id] = count
+        for name, value in doc["numbers"].items():
+            if value is not None:
+                insort(self._numbers[name], (value, doc_id))
+
+    def _remove(self, doc_id):
+        # Caller must hold self._lock
+        doc = self._docs.pop(doc_id)
+        for field, items in doc["text"].items():
+            for term in {term for item in items for term in tokens(item)}:
+                postings = self._postings[field][term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[field][term]
+        for name, value in doc["numbers"].items():
+            if value is not None:
+                numbers = self._numbers[name]
+                del numbers[bisect_left(numbers, (value, doc_id))]
+
+    def search(self, text="", kind=None, fields=None, universities=None, states=None, ranges=None, limit=50):
+        """
+        Find documents containing every term of text in any of the given
+        fields (all fields by default), of the given kind, at one of the
+        given universities or in one of the given states, with numbers
+        inside ranges ({name: (low, high)}, either bound may be None).
+        Returns (results, facets): results ranked by TF-IDF, each with the
+        text items that matched, and facet counts over all matches.
+        """
+        terms = tokens(text)
+        with self._lock:
+            candidates = None
+            scores = defaultdict(float)
+            searched = [field for field in self._postings if fields is None or field in fields]
+            for term in dict.fromkeys(terms):
+                matched = defaultdict(int)
+                for field in searched:
+                    for doc_id, count in self._postings[field].get(term, {}).items():
+                        matched[doc_id] += count
+                idf = math.log(1 + len(self._docs) / (1 + len(matched)))
+                for doc_id, count in matched.items():
+                    scores[doc_id] += count * idf
+                candidates = set(matched) if candidates is None else candidates & set(matched)
+
+            for name, (low, high) in (ranges or {}).items():
+                numbers = self._numbers[name]
+                start = 0 if low is None else bisect_left(numbers, (low,))
+                end = len(numbers) if high is None else bisect_right(numbers, (high, "\uffff"))
+                in_range = {doc_id for _, doc_id in numbers[start:end]}
+                candidates = in_range if candidates is None else candidates & in_range
+
+            if candidates is None:
+                candidates = set(self._docs)
+
+            states_by_university = {doc["university"]: doc.get("state") for doc in self._docs.values()
+                                    if doc["kind"] == "university"}
+            results = []
+            for doc_id in candidates:
+                doc = self._docs[doc_id]
+                state = states_by_university.get(doc["university"])
+                if kind and doc["kind"] != kind:
+                    continue
+                if universities and doc["university"] not in universities:
+                    continue
+                if states and state not in states:
+                    continue
+                matches = [item for field in searched for item in doc["text"].get(field, ())
+                           if terms and set(terms) & set(tokens(item))]
+                results.append({"kind": doc["kind"], "university": doc["university"], "course": doc["course"],
+                                "state": state, "score": scores.get(doc_id, 0.0), "matches": matches,
+                                **{name: doc["numbers"].get(name) for name in NUMBER_FIELDS}})
+
+        results.sort(key=lambda result: (-result["score"], result["university"], result["course"] or ""))
+        facets = {
+            "kind": Counter(result["kind"] for result in results),
+            "state": Counter(result["state"] for result in results if result["state"]),
+            "university": Counter(result["university"] for result in results),
+        }
+        return results[:limit], facets
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "courses": sum(doc["kind"] == "course" for doc in self._docs.values()),
+                "terms": sum(len(postings) for postings in self._postings.values()),
+                "synced_at": self.synced_at,
+            }
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_index():
+    """Return the process-wide index, loading it from disk and syncing it with the cache"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            index = ProfileIndex()
+            if not index.load():
+                # A fresh replica starts from the index exported with the cache's bundle, if any
+                bundle = get_default_cache().bundle
+                if bundle is not None:
+                    index.restore(bundle.index())
+            _default_index = index
+    _default_index.sync(get_default_cache())
+    return _default_index
@@ -0,0 +1,162 @@
+import threading
+from concurrent.futures import Future
+
+
+class _Broadcast:
+    """
+    Items produced by a streaming leader, replayed to every follower.
+    Followers that join late first receive everything published so far.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._items = []
+        self._closed = False
+        self._error = None
+
+    def publish(self, item):
+        with self._cond:
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def close(self, error=None):
+        with self._cond:
+            self._closed = True
+            self._error = error
+            self._cond.notify_all()
+
+    def subscribe(self):
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._items) and not self._closed:
+                    self._cond.wait()
+                items = self._items[index:]
+                index += len(items)
+                finished = self._closed and index >= len(self._items)
+                error = self._error
+            yield from items
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+
+class Abandoned(RuntimeError):
+    """Raised to the followers of a stream whose leader stopped iterating before it completed"""
+
+
+class SingleFlight:
+    """
+    Registry of in-flight calls keyed by request.
+
+    The first caller for a key becomes the leader and performs the call;
+    callers arriving while it is in progress become followers and share the
+    leader's result instead of issuing a duplicate request.
+
+    Blocking calls and streams of the same key are kept apart, since one
+    produces a value and the other items. Callers that pass a converter
+    join a flight of the other kind: a blocking caller waits for an
+    in-flight stream to finish and builds its value from the items, and a
+    stream replays the items of an in-flight call's value.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self._counters = {"leaders": 0, "followers": 0}
+
+    def do(self, key, fn, from_items=None):
+        """
+        Call fn() unless a call for key is already in flight, and return its
+        result. If from_items is given and a stream for key is in flight,
+        return from_items() of its items instead.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            broadcast = self._streams.get(key) if future is None and from_items is not None else None
+            leader = future is None and broadcast is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._counters["leaders"] += 1
+            else:
+                self._counters["followers"] += 1
+
+        if broadcast is not None:
+            try:
+                return from_items(broadcast.subscribe())
+            except Abandoned:
+                # The stream's reader went away; nobody is producing the value now
+                return self.do(key, fn, from_items)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stream(self, key, fn, to_items=None):
+        """
+        Iterate over fn() unless a stream for key is already in flight, in
+        which case the leader's items are replayed as they are produced. If
+        to_items is given and a blocking call for key is in flight, iterate
+        over to_items() of its result once it is ready instead.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            future = self._calls.get(key) if broadcast is None and to_items is not None else None
+            leader = broadcast is None and future is None
+            if leader:
+                broadcast = _Broadcast()
+                self._streams[key] = broadcast
+                self._counters["leaders"] += 1
+            else:
+                self._counters["followers"] += 1
+
+        if future is not None:
+            yield from to_items(future.result())
+            return
+        if not leader:
+            yield from broadcast.subscribe()
+            return
+
+        try:
+            for item in fn():
+                broadcast.publish(item)
+                yield item
+        except GeneratorExit:
+            broadcast.close(Abandoned(f"Request for {key!r} was abandoned before it completed"))
+            raise
+        except BaseException as e:
+            broadcast.close(e)
+            raise
+        else:
+            broadcast.close()
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+
+    def stats(self):
+        """Return how many calls led a flight and how many joined one in progress"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._calls) + len(self._streams)
+        return stats
+
+
+_default_flights = SingleFlight()
+
+
+def get_default_flights():
+    """Return the process-wide registry shared by all Streamlit sessions"""
+    return _default_flights
@@ -0,0 +1,88 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+def wait_for_waiting(admission, count):
+    while admission.stats()["waiting"] < count:
+        threading.Event().wait(0.01)
+
+
+def queue(pool, admission, sessions, admitted=None):
+    """Queue one request per entry of sessions, in order, each releasing its slot once admitted"""
+    def request(session_id):
+        admission.acquire(session_id)
+        if admitted is not None:
+            admitted.append(session_id)
+        admission.release()
+
+    futures = []
+    for session_id in sessions:
+        futures.append(pool.submit(request, session_id))
+        wait_for_waiting(admission, len(futures))
+    return futures
+
+
+def test_freed_slots_go_to_sessions_in_turn():
+    admission = AdmissionController(slots=1, shed_depth=10, timeout=5)
+    admission.acquire("held")
+    admitted = []
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = queue(pool, admission, ["a", "a", "a", "b", "c"], admitted)
+        assert admission.position("b") == (2, 5)
+        admission.release()
+        for future in futures:
+            future.result(timeout=5)
+    # One session's backlog does not hold up the others
+    assert admitted == ["a", "b", "c", "a", "a"]
+    assert admission.stats()["active"] == 0
+
+
+def test_sheds_new_requests_at_full_queue_depth():
+    admission = AdmissionController(slots=1, shed_depth=2, timeout=5)
+    admission.acquire("held")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = queue(pool, admission, ["a", "b"])
+        with pytest.raises(Overloaded):
+            admission.acquire("c")
+        admission.release()
+        for future in futures:
+            future.result(timeout=5)
+    stats = admission.stats()
+    assert stats["shed"] == 1
+    assert stats["admitted"] == 3
+    assert stats["max_depth"] == 2
+
+
+def test_requests_without_a_session_are_shed_at_half_depth():
+    admission = AdmissionController(slots=1, shed_depth=4, timeout=5)
+    admission.acquire("held")
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = queue(pool, admission, ["a", "b"])
+        with pytest.raises(Overloaded):
+            admission.acquire()
+        # A session still has room to queue
+        futures += queue(pool, admission, ["c"])
+        wait_for_waiting(admission, 3)
+        admission.release()
+        for future in futures:
+            future.result(timeout=5)
+    assert admission.stats()["shed"] == 1
+
+
+def test_sheds_requests_that_wait_too_long():
+    admission = AdmissionController(slots=1, shed_depth=10, timeout=0.05)
+    admission.acquire("held")
+    with pytest.raises(Overloaded):
+        admission.acquire("a")
+    stats = admission.stats()
+    assert stats["timed_out"] == 1
+    assert stats["waiting"] == 0
+    assert stats["sessions_waiting"] == 0
+    admission.release()
+    # The abandoned place in line does not block the next request
+    admission.acquire("b")
+    admission.release()
@@ -0,0 +1,97 @@
+import asyncio
+import gzip
+import json
+from http import HTTPStatus
+
+import pytest
+
+import api
+from admission import Overloaded
+from profiles import UpstreamError
+
+PAYLOAD = {"university": "Monash University", "profile": {"overview": "A university in Melbourne. " * 100}}
+
+
+def test_gzip_and_identity_bodies_have_different_etags():
+    _, identity, body = api.json_response(HTTPStatus.OK, PAYLOAD, {})
+    _, compressed, gzipped = api.json_response(HTTPStatus.OK, PAYLOAD, {"accept-encoding": "gzip, br"})
+    assert compressed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gzipped) == body
+    assert identity["ETag"] != compressed["ETag"]
+
+
+def test_each_etag_revalidates_its_own_representation():
+    _, headers, _ = api.json_response(HTTPStatus.OK, PAYLOAD, {"accept-encoding": "gzip"})
+    status, _, body = api.json_response(HTTPStatus.OK, PAYLOAD,
+                                        {"accept-encoding": "gzip", "if-none-match": headers["ETag"]})
+    assert (status, body) == (HTTPStatus.NOT_MODIFIED, b"")
+    status, _, _ = api.json_response(HTTPStatus.OK, PAYLOAD, {"if-none-match": headers["ETag"]})
+    assert status == HTTPStatus.OK
+
+
+def read(request):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(request)
+        reader.feed_eof()
+        return await api.read_request(reader)
+    return asyncio.run(run())
+
+
+def test_request_body_is_read():
+    request = b"POST /v1/batch HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}"
+    assert read(request) == ("POST", "/v1/batch", "HTTP/1.1", {"content-length": "2"}, b"{}")
+
+
+@pytest.mark.parametrize("length", [b"-1", b"two"])
+def test_invalid_content_length_is_a_bad_request(length):
+    with pytest.raises(api.APIError) as error:
+        read(b"POST /v1/batch HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("accept_encoding, gzipped", [
+    ("gzip", True),
+    ("gzip, br", True),
+    ("br;q=1.0, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, br", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("identity", False),
+    ("", False),
+])
+def test_gzip_follows_accept_encoding_qualities(accept_encoding, gzipped):
+    _, headers, _ = api.json_response(HTTPStatus.OK, PAYLOAD, {"accept-encoding": accept_encoding})
+    assert ("Content-Encoding" in headers) == gzipped
+
+
+@pytest.mark.parametrize("item", [{"university": "MIT", "course": 5}, {"university": "MIT", "course": ["Law"]}])
+def test_batch_rejects_a_course_that_is_not_a_name(item):
+    with pytest.raises(api.APIError) as error:
+        asyncio.run(api.batch(json.dumps({"requests": [item]}).encode()))
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_shed_request_is_answered_503_with_retry_after(monkeypatch):
+    def shed(university, course=None):
+        try:
+            raise Overloaded("Too many requests are waiting")
+        except Overloaded as e:
+            raise UpstreamError(f"Error fetching university information: {e}") from e
+
+    monkeypatch.setattr(api, "profile_result", shed)
+    with pytest.raises(api.APIError) as error:
+        asyncio.run(api.route("GET", "/v1/universities/Monash", b""))
+    assert error.value.status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert error.value.headers == {"Retry-After": str(api.RETRY_AFTER)}
+
+
+def test_failed_fetch_is_a_bad_gateway(monkeypatch):
+    def fail(university, course=None):
+        raise UpstreamError("Error fetching university information: upstream unavailable")
+
+    monkeypatch.setattr(api, "profile_result", fail)
+    with pytest.raises(api.APIError) as error:
+        asyncio.run(api.route("GET", "/v1/universities/Monash", b""))
+    assert error.value.status == HTTPStatus.BAD_GATEWAY
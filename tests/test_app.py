@@ -0,0 +1,32 @@
+import queue
+import threading
+
+import app
+from profiles import ProfileFetchError
+
+
+def failing_fetch(*args):
+    raise ProfileFetchError("Error fetching university information: upstream unavailable")
+
+
+def test_pump_reports_a_failing_fetch_and_ends():
+    events = queue.Queue()
+    app.pump_profile_fields("university", failing_fetch, events, None)
+    kind, field, error = events.get_nowait()
+    assert (kind, field) == ("university", app.FETCH_FAILED)
+    assert isinstance(error, ProfileFetchError)
+    assert events.get_nowait() == ("university", app.FETCH_DONE, None)
+
+
+def test_failing_blocking_fetch_ends_the_event_loop(monkeypatch):
+    monkeypatch.setattr(app, "STREAMING", False)
+    monkeypatch.setattr(app, "get_university_info", failing_fetch)
+    monkeypatch.setattr(app, "get_course_information", failing_fetch)
+
+    result = {}
+    page = threading.Thread(target=lambda: result.update(snapshot=app.display_profiles("Monash", "Law")),
+                            daemon=True)
+    page.start()
+    page.join(timeout=10)
+    assert not page.is_alive(), "display_profiles is still waiting for the failed fetches"
+    assert result["snapshot"] is None
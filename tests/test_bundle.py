@@ -0,0 +1,44 @@
+import pytest
+
+from bundle import HEADER, BundleError, ProfileBundle, write_bundle
+
+ROWS = [
+    ("university:monash", "university", '{"overview": "Monash"}', 100.0, 200.0),
+    ("course:monash:law", "course", '{"course_overview": "Law"}', 110.0, 210.0),
+]
+
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    path = str(tmp_path / "profiles.bin")
+    write_bundle(path, ROWS)
+    return path
+
+
+def corrupt(path, offset):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def test_lookups(bundle_path):
+    bundle = ProfileBundle(bundle_path)
+    assert bundle.get("course:monash:law") == (b'{"course_overview": "Law"}', 110.0, 210.0)
+    assert bundle.get("course:monash:arts") is None
+    assert bundle.expiry("university:monash") == (100.0, 200.0)
+
+
+def test_checksum_is_only_checked_when_asked(bundle_path):
+    corrupt(bundle_path, HEADER.size + 2)
+    ProfileBundle(bundle_path)
+    with pytest.raises(BundleError, match="checksum"):
+        ProfileBundle(bundle_path, verify=True)
+
+
+def test_truncated_bundle_is_rejected_on_open(bundle_path):
+    with open(bundle_path, "r+b") as f:
+        f.truncate(HEADER.size + 10)
+    with pytest.raises(BundleError, match="truncated"):
+        ProfileBundle(bundle_path)
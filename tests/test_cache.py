@@ -0,0 +1,96 @@
+import json
+import time
+
+import pytest
+
+import cache
+from cache import ProfileCache, load_ttl_overrides, make_key
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def encoded_size(value):
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+def test_memory_tier_evicts_least_recently_used_by_size(path):
+    value = {"overview": "x" * 100}
+    size = encoded_size(value)
+    profiles = ProfileCache(path=path, max_bytes=2 * size)
+    profiles.set("a", "university", value)
+    profiles.set("b", "university", value)
+    profiles.get("a")
+    profiles.set("c", "university", value)
+
+    stats = profiles.stats()
+    assert (stats["memory_entries"], stats["memory_bytes"], stats["evictions"]) == (2, 2 * size, 1)
+    # "b" was least recently used, so it is now only on disk
+    assert profiles.get("b") == value
+    assert profiles.stats()["disk_hits"] == 1
+    assert profiles.stats()["memory_hits"] == 1
+
+
+def test_entry_larger_than_the_memory_tier_is_kept_on_disk(path):
+    profiles = ProfileCache(path=path, max_bytes=10)
+    profiles.set("a", "university", {"overview": "x" * 100})
+    assert profiles.stats()["memory_entries"] == 0
+    assert profiles.get("a") == {"overview": "x" * 100}
+    assert profiles.stats()["disk_hits"] == 1
+
+
+def test_misses_are_counted(path):
+    profiles = ProfileCache(path=path)
+    assert profiles.get("missing") is None
+    assert profiles.stats()["misses"] == 1
+
+
+def test_ttls_per_field_section_and_profile(path, monkeypatch):
+    monkeypatch.setattr(cache, "TTL_OVERRIDES", '{"course|The University of Sydney|Law": 60}')
+    profiles = ProfileCache(path=path, ttls={"course.tuition": 120})
+    assert profiles.ttl_for("course.tuition") == 120
+    # Fields without a TTL of their own fall back to their section's
+    assert profiles.ttl_for("course.skills_taught") == cache.DEFAULT_TTLS["course"]
+    sydney_law = make_key("course", "the university of sydney", "LAW", model="m", prompt_version=1)
+    monash_law = make_key("course", "Monash University", "Law", model="m", prompt_version=1)
+    assert profiles.ttl_for("course", sydney_law) == 60
+    assert profiles.ttl_for("course", monash_law) == cache.DEFAULT_TTLS["course"]
+
+
+def test_ttl_overrides_normalize_profile_names():
+    assert load_ttl_overrides('{"university|  Monash   UNIVERSITY": 10, "course.tuition": 5}') == {
+        "university|monash university": 10.0, "course.tuition": 5.0}
+    assert load_ttl_overrides("") == {}
+
+
+def test_expired_entry_is_served_stale_within_the_window(path):
+    profiles = ProfileCache(path=path, ttls={"university": -10}, stale_window=60)
+    profiles.set("a", "university", {"overview": "old"})
+
+    assert profiles.get("a") is None
+    value, created_at, fresh = profiles.lookup("a")
+    assert (value, fresh) == ({"overview": "old"}, False)
+    assert created_at <= time.time()
+    assert profiles.stats()["stale_served"] == 1
+
+
+def test_entry_past_the_stale_window_is_missing_and_purged(path):
+    profiles = ProfileCache(path=path, ttls={"university": -120}, stale_window=60)
+    profiles.set("a", "university", {"overview": "old"})
+    assert profiles.lookup("a") is None
+
+    # Reopening the cache purges the disk tier
+    reopened = ProfileCache(path=path, stale_window=60)
+    assert reopened.stats()["purged"] == 1
+    assert reopened.get_stale("a") is None
+
+
+def test_writes_purge_the_disk_tier_periodically(path, monkeypatch):
+    profiles = ProfileCache(path=path, ttls={"university": -120}, stale_window=60)
+    profiles.set("a", "university", {"overview": "old"})
+    assert profiles.stats()["purged"] == 0
+    monkeypatch.setattr(cache, "PURGE_INTERVAL", 0)
+    profiles.set("b", "university", {"overview": "old"})
+    assert profiles.stats()["purged"] == 2
@@ -0,0 +1,29 @@
+import pytest
+
+from canonical import canonical_course, canonical_university
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("comp sci", "Bachelor of Computer Science"),
+    ("Bachelor of Information Technolgy", "Bachelor of Information Technology"),
+    ("Bachelor of Science (Advanced)", "Bachelor of Advanced Science"),
+])
+def test_course_aliases_and_typos_are_rewritten(text, expected):
+    assert canonical_course(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Bachelor of Commerce and Law",
+    "Bachelor of Arts and Science",
+    "Bachelor of Laws and Arts",
+    "Bachelor of Nursing and Midwifery",
+    "Commerce Law",
+    "Doctor of Medicine and Surgery",
+])
+def test_double_degrees_are_not_collapsed_into_one_part(text):
+    assert canonical_course(text) == text
+
+
+def test_university_typos_are_rewritten_but_not_its_schools():
+    assert canonical_university("uni of melborne") == "The University of Melbourne"
+    assert canonical_university("University of Melbourne Law School") == "University of Melbourne Law School"
@@ -0,0 +1,15 @@
+from comparison import comparison_table
+
+
+def test_tuition_columns_take_the_amount_on_their_basis():
+    profile = {
+        "tuition": {"per_semester": "$45,000 per year, $135,000 total",
+                    "full_course": "$45,000 per year, $135,000 total"},
+        "average_earnings": {"starting": "$65,000 - $80,000", "mid_career": "$110k"},
+    }
+    table = comparison_table([("Monash University", "Law", profile)])
+    row = table.iloc[0]
+    assert row["Tuition per semester (AUD)"] == 22500
+    assert row["Full course tuition (AUD)"] == 135000
+    assert row["Starting salary (AUD)"] == 72500
+    assert row["Mid-career salary (AUD)"] == 110000
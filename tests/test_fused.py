@@ -0,0 +1,51 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import profiles
+from cache import ProfileCache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_groq import COURSE_PROFILE, UNIVERSITY_PROFILE  # noqa: E402
+
+
+@pytest.fixture
+def requests(tmp_path, monkeypatch):
+    """Labels of the profile requests made, answered with the fake API's profiles"""
+    made = []
+
+    def stream_profile(messages, label, schema=None, section=None, max_tokens=4096):
+        made.append(label)
+        profile = {**UNIVERSITY_PROFILE, **COURSE_PROFILE}
+        for field, value in profile.items():
+            yield field, value
+        return profile
+
+    cache = ProfileCache(path=str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(profiles, "FUSED", True)
+    monkeypatch.setattr(profiles, "SECTIONED", False)
+    monkeypatch.setattr(profiles, "get_default_cache", lambda: cache)
+    monkeypatch.setattr(profiles, "stream_profile", stream_profile)
+    return made
+
+
+def test_sides_read_one_after_the_other_share_one_request(requests):
+    # Both sides are called before either is read, as the page's workers do
+    university = profiles.stream_university_info("Monash", "Law")
+    course = profiles.stream_course_information("Monash", "Law")
+
+    assert dict(university) == UNIVERSITY_PROFILE
+    assert dict(course) == COURSE_PROFILE
+    assert requests == ["university and course information"]
+
+
+def test_sides_read_concurrently_share_one_request(requests):
+    university = profiles.stream_university_info("Monash", "Law")
+    course = profiles.stream_course_information("Monash", "Law")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        profiles_read = [pool.submit(dict, university), pool.submit(dict, course)]
+        assert [future.result(timeout=10) for future in profiles_read] == [UNIVERSITY_PROFILE, COURSE_PROFILE]
+    assert requests == ["university and course information"]
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pytest
+
+from groq_client import CircuitBreaker, CircuitOpenError, ResilientClient
+
+
+def client_raising(error):
+    def create(**kwargs):
+        raise error
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        with_raw_response=SimpleNamespace(create=create))))
+
+
+@pytest.mark.parametrize("error", [ValueError("unparseable response"), KeyboardInterrupt()])
+def test_unexpected_error_during_probe_reopens_the_circuit(error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    client = ResilientClient(client_raising(error), max_attempts=1, breaker=breaker)
+
+    with pytest.raises(type(error)):
+        client.create(model="test", messages=[])
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # The probe has ended, so the next call after the timeout is let through as a new probe
+    with pytest.raises(type(error)):
+        client.create(model="test", messages=[])
+
+
+def test_open_circuit_rejects_calls():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    client = ResilientClient(client_raising(ValueError()), max_attempts=1, breaker=breaker)
+    with pytest.raises(CircuitOpenError):
+        client.create(model="test", messages=[])
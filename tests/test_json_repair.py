@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from json_repair import JSONRepairer, repair_json
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "corpus",
+                      "malformed_responses.jsonl")
+
+MESSY = ('Sure! Here is the profile:\n```json\n{\n  "overview": "A "sandstone" university\nin Sydney",\n'
+         '  "facilities": ["Fisher\\_Library", "Sports centre",],\n  "rankings": {"world": 19 "national": 1},\n'
+         '  "accredited": True,\n  "notes": null,\n}\n```\nLet me know if you need more.')
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ("Here you go: {\"a\": 1} hope it helps", {"a": 1}),
+    ('{"a": "line one\nline two\ttabbed"}', {"a": "line one\nline two\ttabbed"}),
+    ('{"a": "snake\\_case \\u00e9"}', {"a": "snake_case é"}),
+    ('{"a": "he said "hi" to me", "b": "x"}', {"a": 'he said "hi" to me', "b": "x"}),
+    ('{"a": 1 "b": 2}', {"a": 1, "b": 2}),
+    ('{"a": "x"\n "b": ["y" "z"]}', {"a": "x", "b": ["y", "z"]}),
+    ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}),
+    ('{"a": True, "b": None, "c": False}', {"a": True, "b": None, "c": False}),
+])
+def test_defects_are_repaired(raw, expected):
+    assert json.loads(repair_json(raw)) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"a": "done", "b": "cut off mid', {"a": "done"}),
+    ('{"a": ["x", "y', {"a": ["x"]}),
+    # A scalar at the very end is kept if it is valid as it stands
+    ('{"a": {"b": 1, "c": [2, 3', {"a": {"b": 1, "c": [2, 3]}}),
+    ('{"a": 12', {"a": 12}),
+    ('{"a": tr', {}),
+    ('{"a": 1, "b"', {"a": 1}),
+])
+def test_truncated_output_keeps_its_complete_values(raw, expected):
+    assert json.loads(repair_json(raw)) == expected
+
+
+def test_valid_json_passes_through_unchanged():
+    valid = json.dumps({"a": [1, 2.5, "x"], "b": {"c": None, "d": "café"}}, indent=2)
+    assert repair_json(valid) == valid
+
+
+def test_text_without_an_object_repairs_to_nothing():
+    assert repair_json("I could not find that university.") == ""
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_chunked_feed_matches_whole_input(size):
+    repairer = JSONRepairer()
+    chunks = [repairer.feed(MESSY[i:i + size]) for i in range(0, len(MESSY), size)]
+    assert "".join(chunks) + repairer.close() == repair_json(MESSY)
+    assert json.loads(repair_json(MESSY)) == {
+        "overview": 'A "sandstone" university\nin Sydney',
+        "facilities": ["Fisher_Library", "Sports centre"],
+        "rankings": {"world": 19, "national": 1},
+        "accredited": True,
+        "notes": None,
+    }
+
+
+def test_feed_only_returns_complete_values():
+    repairer = JSONRepairer()
+    assert repairer.feed('{"a": "complete", "b": "partial') == '{"a": "complete"'
+    assert repairer.feed(' value"}') == ', "b": "partial value"}'
+    assert repairer.done
+
+
+def corpus():
+    with open(CORPUS, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("entry", corpus(), ids=lambda entry: entry["defect"])
+def test_corpus_of_model_responses(entry):
+    assert json.loads(repair_json(entry["raw"])) == entry["expected"]
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+
+import prefetch
+import profiles
+from cache import ProfileCache
+from prefetch import Prefetcher
+from refresh import Refresher
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_groq import COURSE_PROFILE  # noqa: E402
+
+UNIVERSITY, _ = profiles.canonical_names("Monash University")
+LAW = profiles.canonical_names(UNIVERSITY, "Law")[1]
+MEDICINE = profiles.canonical_names(UNIVERSITY, "Medicine")[1]
+
+
+def test_transitions_are_course_searches_following_the_university_in_a_session(tmp_path):
+    prefetcher = Prefetcher(path=str(tmp_path / "prefetch.sqlite3"), min_hits=2)
+
+    # Course searches with no university search before them in the session
+    prefetcher.record(UNIVERSITY, LAW, "first")
+    prefetcher.record(UNIVERSITY, LAW)
+
+    prefetcher.record(UNIVERSITY, None, "first")
+    prefetcher.record(UNIVERSITY, LAW, "first")
+    prefetcher.record(UNIVERSITY, LAW, "first")
+    prefetcher.record(UNIVERSITY, MEDICINE, "first")
+    prefetcher.record("University of Sydney", LAW, "first")
+
+    prefetcher.record(UNIVERSITY, None, "second")
+    prefetcher.record(UNIVERSITY, LAW, "second")
+
+    assert prefetcher.stats()["transitions"] == 3
+    assert prefetcher.predict(UNIVERSITY) == [LAW]
+    assert prefetcher.predict("University of Sydney") == []
+
+
+def test_prefetch_generates_uncached_courses_without_making_them_popular(tmp_path, monkeypatch):
+    cache = ProfileCache(path=str(tmp_path / "cache.sqlite3"))
+    cache.set(profiles.profile_key("course", UNIVERSITY, MEDICINE), "course", COURSE_PROFILE)
+    refresher = Refresher(cache)
+    monkeypatch.setattr(profiles, "get_default_cache", lambda: cache)
+    monkeypatch.setattr(prefetch, "get_default_cache", lambda: cache)
+    monkeypatch.setattr(profiles, "get_default_refresher", lambda: refresher)
+
+    def stream_profile(messages, label, schema=None, section=None, max_tokens=4096):
+        yield from COURSE_PROFILE.items()
+        return dict(COURSE_PROFILE)
+
+    monkeypatch.setattr(profiles, "stream_profile", stream_profile)
+
+    prefetcher = Prefetcher(path=str(tmp_path / "prefetch.sqlite3"), min_hits=1)
+    for course in (LAW, MEDICINE):
+        prefetcher.record(UNIVERSITY, None, "session")
+        prefetcher.record(UNIVERSITY, course, "session")
+
+    # The cached course is not generated again
+    assert prefetcher.prefetch(UNIVERSITY) == [LAW]
+    deadline = time.monotonic() + 5
+    while prefetcher.stats()["pending"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert prefetch.stored(UNIVERSITY, LAW)
+    assert refresher.stats()["tracked"] == 0
+
+    assert prefetcher.record(UNIVERSITY, LAW, "another session")
+    assert dict(profiles.stream_course_information(UNIVERSITY, LAW)) == COURSE_PROFILE
+    assert refresher.popularity(profiles.profile_key("course", UNIVERSITY, LAW)) > 0
+    stats = prefetcher.stats()
+    assert stats["prefetched"] == 1
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 1.0
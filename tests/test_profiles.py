@@ -0,0 +1,73 @@
+import threading
+import time
+
+import api
+import profiles
+from cache import ProfileCache
+from refresh import Refresher
+
+PROFILE = {"overview": "A university in Melbourne."}
+
+
+def expired_cache(tmp_path):
+    cache = ProfileCache(path=str(tmp_path / "cache.sqlite3"), ttls={"university": -60})
+    cache.set(profiles.profile_key("university", "Monash University"), "university", PROFILE)
+    return cache
+
+
+def fail_if_called():
+    raise AssertionError("regenerated in the foreground")
+
+
+def test_expired_profile_is_marked_when_the_refresh_queue_is_full(tmp_path, monkeypatch):
+    cache = expired_cache(tmp_path)
+    full = Refresher(cache, max_pending=0)
+    monkeypatch.setattr(profiles, "get_default_cache", lambda: cache)
+    monkeypatch.setattr(profiles, "get_default_refresher", lambda: full)
+    monkeypatch.setattr(profiles, "generate_profile", lambda *args, **kwargs: fail_if_called())
+
+    result = api.profile_result("Monash")
+    assert result["profile"] == PROFILE
+    assert result["refreshing"] is True
+    assert result["generated_at"] > 0
+    assert full.stats()["dropped"] == 1
+
+
+def test_expired_profile_queues_a_refresh(tmp_path, monkeypatch):
+    cache = expired_cache(tmp_path)
+    refresher = Refresher(cache)
+    monkeypatch.setattr(profiles, "get_default_cache", lambda: cache)
+    monkeypatch.setattr(profiles, "get_default_refresher", lambda: refresher)
+    monkeypatch.setattr(profiles, "generate_profile", lambda *args, **kwargs: {"overview": "Updated."})
+
+    assert api.profile_result("Monash")["refreshing"] is True
+    deadline = time.monotonic() + 5
+    while refresher.is_pending(profiles.profile_key("university", "Monash University")):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert refresher.stats()["refreshed"] == 1
+
+
+def test_streamed_expired_profile_stays_marked_until_a_refresh_is_queued(tmp_path, monkeypatch):
+    cache = expired_cache(tmp_path)
+    refresher = Refresher(cache, max_pending=1)
+    monkeypatch.setattr(profiles, "get_default_cache", lambda: cache)
+    monkeypatch.setattr(profiles, "get_default_refresher", lambda: refresher)
+    monkeypatch.setattr(profiles, "generate_profile", lambda *args, **kwargs: {"overview": "Updated."})
+    key = profiles.profile_key("university", "Monash University")
+
+    # Another refresh holds the only place in the queue
+    release = threading.Event()
+    refresher.submit("other", lambda: release.wait(5))
+    pairs = list(profiles.stream_university_info("Monash"))
+    assert pairs[0][0] == profiles.REFRESHING
+    assert dict(pairs[1:]) == PROFILE
+    assert not refresher.is_pending(key)
+    assert refresher.stats()["dropped"] == 1
+
+    release.set()
+    while refresher.is_pending("other"):
+        time.sleep(0.01)
+    pairs = list(profiles.stream_university_info("Monash"))
+    assert pairs[0][0] == profiles.REFRESHING
+    assert refresher.stats()["queued"] == 2
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from refresh import Refresher
+
+
+class ExpiryTable:
+    """Stands in for the cache; the refresher only asks it when keys expire"""
+
+    def __init__(self, expiries):
+        self.expiries = expiries
+
+    def expiry(self, key):
+        return self.expiries.get(key)
+
+
+def expiring_in(fraction_left, ttl=1000):
+    now = time.time()
+    return now - ttl * (1 - fraction_left), now + ttl * fraction_left
+
+
+def record(refresher, key, hits, job=None):
+    for _ in range(hits):
+        refresher.record(key, job or (lambda: None))
+
+
+def test_due_lists_popular_keys_about_to_expire_most_popular_first():
+    cache = ExpiryTable({
+        "warm": expiring_in(0.05),
+        "hot": expiring_in(0.05),
+        "rarely asked": expiring_in(0.05),
+        "fresh": expiring_in(0.5),
+    })
+    refresher = Refresher(cache, min_hits=3, ahead=0.1)
+    record(refresher, "warm", 4)
+    record(refresher, "hot", 6)
+    record(refresher, "rarely asked", 1)
+    record(refresher, "fresh", 10)
+    record(refresher, "not cached", 10)
+
+    assert [key for key, _ in refresher.due()] == ["hot", "warm"]
+
+
+def test_schedule_due_submits_the_most_popular_first_when_the_queue_is_short():
+    cache = ExpiryTable({"warm": expiring_in(0.05), "hot": expiring_in(0.05)})
+    refresher = Refresher(cache, max_pending=1, min_hits=3, ahead=0.1)
+    ran, release = [], threading.Event()
+
+    def job_for(key):
+        def job():
+            ran.append(key)
+            release.wait(5)
+        return job
+
+    record(refresher, "warm", 4, job_for("warm"))
+    record(refresher, "hot", 6, job_for("hot"))
+
+    assert refresher.schedule_due() == 1
+    assert refresher.is_pending("hot")
+    assert not refresher.is_pending("warm")
+    release.set()
+    deadline = time.monotonic() + 5
+    while refresher.is_pending("hot"):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert ran == ["hot"]
+    stats = refresher.stats()
+    assert stats["scheduled"] == 1
+    assert stats["dropped"] == 1
+    assert stats["refreshed"] == 1
@@ -0,0 +1,77 @@
+import math
+
+import pandas as pd
+import pytest
+
+from salary import SalaryRange, parse_salaries, parse_salary, parse_tuition, parse_tuitions
+
+CASES = [
+    ("$65,000 - $80,000 after 3 years", (65000, 80000, 72500)),
+    ("$65-80k", (65000, 80000, 72500)),
+    ("$90k-$110k annually", (90000, 110000, 100000)),
+    ("$65k - $80k with 20% bonus", (65000, 80000, 72500)),
+    ("120K AUD p.a.", (120000, 120000, 120000)),
+    ("$35 per hour", (35 * 38 * 52,) * 3),
+    ("$50 an hour", (50 * 38 * 52,) * 3),
+    ("$1,200 per week", (1200 * 52,) * 3),
+    ("$4,500 per month", (4500 * 12,) * 3),
+    ("$70,000 in 2024", (70000, 70000, 70000)),
+    ("Graduates earn around $60,000 (QS 2023 data)", (60000, 60000, 60000)),
+    ("Around 75000", (75000, 75000, 75000)),
+    ("15% higher than average", None),
+    ("Ranked in 2024 after 5 years of growth", None),
+    ("Competitive", None),
+    ("Not available", None),
+    ("", None),
+]
+
+
+@pytest.mark.parametrize("text, expected", CASES)
+def test_parse_salary(text, expected):
+    assert parse_salary(text) == (SalaryRange(*map(float, expected)) if expected else None)
+
+
+def test_non_text_values():
+    assert parse_salary(None) is None
+    assert parse_salary(True) is None
+    assert parse_salary(85000) == SalaryRange(85000.0, 85000.0, 85000.0)
+
+
+def test_batch_parsing_agrees_with_scalar_parsing():
+    texts = [text for text, _ in CASES] * 2 + [None]
+    batch = parse_salaries(pd.Series(texts, index=range(100, 100 + len(texts))))
+    assert list(batch.index) == list(range(100, 100 + len(texts)))
+    for (_, row), text in zip(batch.iterrows(), texts):
+        expected = parse_salary(text)
+        if expected is None:
+            assert all(math.isnan(value) for value in row)
+        else:
+            assert tuple(row) == tuple(expected)
+
+
+TUITION_CASES = [
+    ("$45,000 per year, $135,000 total", 22500, 135000),
+    ("$25,500 AUD", 25500, 25500),
+    ("$153,000 AUD plus materials", 153000, 153000),
+    ("$22,750 per semester ($45,500 per year)", 22750, None),
+    ("Total: $135,000 over 3 years", None, 135000),
+    ("A$40,000 annually; $120,000 for the full degree", 20000, 120000),
+    ("$45k p.a.", 22500, None),
+    ("4 years full time", None, None),
+]
+
+
+@pytest.mark.parametrize("text, semester, total", TUITION_CASES)
+def test_parse_tuition_picks_the_amount_on_each_basis(text, semester, total):
+    assert parse_tuition(text, "semester") == semester
+    assert parse_tuition(text, "total") == total
+
+
+def test_batch_tuition_parsing_agrees_with_scalar_parsing():
+    texts = pd.Series([text for text, _, _ in TUITION_CASES] + [None], index=range(10, 10 + len(TUITION_CASES) + 1))
+    for basis in ("semester", "total"):
+        batch = parse_tuitions(texts, basis)
+        assert list(batch.index) == list(texts.index)
+        for text, amount in zip(texts, batch):
+            expected = parse_tuition(text, basis)
+            assert math.isnan(amount) if expected is None else amount == expected
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+from bundle import ProfileBundle, write_bundle
+from cache import ProfileCache
+from search_index import ProfileIndex
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_groq import UNIVERSITY_PROFILE  # noqa: E402
+
+
+def university_key(name):
+    return f"university|model|1|{name}"
+
+
+@pytest.fixture
+def bundled_cache(tmp_path):
+    """A cache over a bundle of two profiles with the index built from them, and that index"""
+    source = ProfileCache(path=str(tmp_path / "source.sqlite3"))
+    for name in ("monash university", "deakin university"):
+        source.set(university_key(name), "university", UNIVERSITY_PROFILE)
+    index = ProfileIndex(path=os.devnull)
+    index.sync(source, force=True)
+    bundle_path = str(tmp_path / "profiles.bin")
+    write_bundle(bundle_path, source.rows(), index.dump())
+
+    bundle = ProfileBundle(bundle_path)
+    restored = ProfileIndex(path=os.devnull)
+    assert restored.restore(bundle.index())
+    return ProfileCache(path=str(tmp_path / "cache.sqlite3"), bundle=bundle), restored
+
+
+def test_sync_after_restoring_from_a_bundle_reads_no_bundled_rows(bundled_cache, monkeypatch):
+    cache, index = bundled_cache
+    read = []
+    rows = cache.bundle.rows
+    monkeypatch.setattr(cache.bundle, "rows", lambda since=None: (read.append(row) or row for row in rows(since)))
+
+    assert index.sync(cache, force=True) == 0
+    assert index.sync(cache, force=True) == 0
+    assert read == []
+
+
+def test_sync_indexes_profiles_written_after_the_bundle(bundled_cache):
+    cache, index = bundled_cache
+    cache.set(university_key("bond university"), "university", UNIVERSITY_PROFILE)
+    assert index.sync(cache, force=True) == 1
+    assert index.stats()["documents"] == 3
@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from singleflight import SingleFlight
+
+
+def not_called():
+    raise AssertionError("issued a duplicate request")
+
+
+def wait_for_follower(flights):
+    while flights.stats()["followers"] == 0:
+        threading.Event().wait(0.01)
+
+
+def test_blocking_call_joins_a_stream_in_flight():
+    flights = SingleFlight()
+
+    def produce():
+        yield "overview", "A university."
+        yield "location", "Melbourne"
+
+    stream = flights.stream("monash", produce, to_items=dict.items)
+    assert next(stream) == ("overview", "A university.")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        joined = pool.submit(flights.do, "monash", not_called, from_items=dict)
+        wait_for_follower(flights)
+        assert list(stream) == [("location", "Melbourne")]
+        assert joined.result(timeout=5) == {"overview": "A university.", "location": "Melbourne"}
+    assert flights.stats() == {"leaders": 1, "followers": 1, "in_flight": 0}
+
+
+def test_stream_joins_a_blocking_call_in_flight():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait()
+        return {"overview": "A university."}
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flights.do, "monash", fetch, from_items=dict)
+        started.wait()
+        stream = pool.submit(list, flights.stream("monash", not_called, to_items=dict.items))
+        wait_for_follower(flights)
+        release.set()
+        assert stream.result(timeout=5) == [("overview", "A university.")]
+        assert leader.result(timeout=5) == {"overview": "A university."}
+
+
+def test_blocking_call_makes_its_own_request_when_the_stream_is_abandoned():
+    flights = SingleFlight()
+
+    def produce():
+        yield "overview", "A university."
+        yield "location", "Melbourne"
+
+    stream = flights.stream("monash", produce)
+    next(stream)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        joined = pool.submit(flights.do, "monash", lambda: {"overview": "Fetched again."}, from_items=dict)
+        wait_for_follower(flights)
+        stream.close()
+        assert joined.result(timeout=5) == {"overview": "Fetched again."}
+
+
+def test_calls_without_converters_do_not_join_the_other_kind():
+    flights = SingleFlight()
+    stream = flights.stream("monash", lambda: iter([("overview", "A university.")]))
+    next(stream, None)
+    assert flights.do("monash", lambda: "called") == "called"